@@ -0,0 +1,53 @@
+"""Memory footprint and lookup throughput of ``HashEmbed`` and ``PQEmbed``
+against the dense ``Embed``.
+"""
+from timeit import timeit
+import jax
+from jax import (
+    random,
+    tree_util as jtu
+)
+from mlax.nn import Embed, HashEmbed, PQEmbed
+
+def _nbytes(model):
+    return sum(leaf.nbytes for leaf in jtu.tree_leaves(model))
+
+@jax.jit
+def lookup(model, x):
+    return model(x, None, True)[0]
+
+def main(vocab_size=1_000_000, embed_dim=128, n_ids=65536, number=20):
+    x = random.randint(random.PRNGKey(1), (n_ids,), 0, vocab_size)
+    layers = (
+        ("Embed", Embed(random.PRNGKey(0), vocab_size, embed_dim)),
+        (
+            "HashEmbed 2^16 x 2",
+            HashEmbed(random.PRNGKey(0), 2 ** 16, embed_dim, n_hashes=2)
+        ),
+        (
+            "HashEmbed 2^16 x 4",
+            HashEmbed(random.PRNGKey(0), 2 ** 16, embed_dim, n_hashes=4)
+        ),
+        (
+            "PQEmbed 16 x 256",
+            PQEmbed(random.PRNGKey(0), vocab_size, embed_dim, 16, 256)
+        ),
+        (
+            "PQEmbed 32 x 256",
+            PQEmbed(random.PRNGKey(0), vocab_size, embed_dim, 32, 256)
+        )
+    )
+    for name, layer in layers:
+        layer = layer.initialize(x[0])
+        jax.block_until_ready(lookup(layer, x))
+        t = timeit(
+            lambda: jax.block_until_ready(lookup(layer, x)), number=number
+        ) / number
+        print(
+            f"  {name:<20} params {_nbytes(layer) / 2**20:8.1f} MiB  "
+            f"{n_ids / t / 1e6:8.1f} M lookups/s"
+        )
+        del layer
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Forward time of ``mlax.nn.Conv`` lowered directly against each alternative
+lowering and the one picked by ``algorithm="autotune"``, on small-channel,
+large-filter, and 1x1 convolutions, and inference latency of the ResNet example
+with all of its ``Conv`` layers autotuned.
+
+On a single-core CPU at batch size 32, autotuning speeds up the 11x11 and
+15x15 convolutions about 4x and 3x with the FFT lowering, and the 1x1
+convolution 1.3x with the matmul lowering. The 3x3 convolution stays direct,
+as no lowering beats it by the required 25%. In the ResNet example, every
+convolution stays direct, so inference takes the same time as without
+autotuning: 18.9 to 24.0 ms for either, varying with run order. The first call
+takes about 7.5 s instead of 0.7 s, as tuning compiles and times every
+candidate for each convolution shape, unless the results are already cached on
+disk. Autotuning does not pay off for this model.
+"""
+import os
+import sys
+import tempfile
+from timeit import timeit, default_timer
+import jax
+from jax import (
+    numpy as jnp,
+    random,
+    tree_util as jtu
+)
+from mlax.nn import Conv
+
+sys.path.append(os.path.dirname(__file__))
+from initialize import resnet
+
+os.environ.setdefault(
+    "MLAX_CONV_AUTOTUNE_CACHE",
+    os.path.join(tempfile.mkdtemp(), "conv_autotune.json")
+)
+
+CASES = (
+    (
+        "3 -> 16, 3x3, 32x32", (32, 32, 3),
+        {"out_channels": 16, "filter_shape": 3}
+    ),
+    (
+        "4 -> 4, 11x11, 64x64", (64, 64, 4),
+        {"out_channels": 4, "filter_shape": 11, "padding": "SAME"}
+    ),
+    (
+        "16 -> 16, 15x15 channel_first, 48x48", (16, 48, 48),
+        {
+            "out_channels": 16, "filter_shape": 15, "padding": "SAME",
+            "data_format": "channel_first"
+        }
+    ),
+    (
+        "64 -> 64, 1x1, 16x16", (16, 16, 64),
+        {"out_channels": 64, "filter_shape": 1}
+    ),
+)
+
+def _time(fn, *args, number):
+    jax.block_until_ready(fn(*args))
+    return timeit(
+        lambda: jax.block_until_ready(fn(*args)), number=number
+    ) / number
+
+def _infer(model, x):
+    return jax.vmap(
+        model.__call__,
+        in_axes=(0, None, None, None),
+        out_axes=(0, None),
+        axis_name="N"
+    )(x, None, True, "N")[0]
+
+def with_algorithm(model, algorithm):
+    def set_algorithm(node):
+        if isinstance(node, Conv):
+            node = jtu.tree_map(lambda leaf: leaf, node)
+            node.algorithm = algorithm
+        return node
+    return jtu.tree_map(
+        set_algorithm, model, is_leaf=lambda node: isinstance(node, Conv)
+    )
+
+def main(batch_size=32, number=20):
+    print(f"cache: {os.environ['MLAX_CONV_AUTOTUNE_CACHE']}")
+    for name, shape, config in CASES:
+        x = random.normal(random.PRNGKey(0), (batch_size, *shape))
+        print(name)
+        times = {}
+        for algorithm in (
+            "direct", "channel_last", "channel_first", "im2col", "fft",
+            "matmul", "autotune"
+        ):
+            layer = Conv(random.PRNGKey(1), **config, algorithm=algorithm)
+            start = default_timer()
+            try:
+                layer = layer.initialize(x[0])
+            except ValueError:
+                continue
+            init_time = default_timer() - start
+            apply = jax.jit(_infer)
+            times[algorithm] = _time(apply, layer, x, number=number)
+            note = f"  (init incl. tuning {init_time:.2f} s)" if (
+                algorithm == "autotune"
+            ) else ""
+            print(f"  {algorithm:<14} {times[algorithm] * 1e3:8.3f} ms{note}")
+        speedup = times["direct"] / times["autotune"]
+        print(f"  autotune speedup over direct {speedup:.2f}x")
+
+    model, x, _ = resnet()
+    model = model.initialize(x)
+    x = random.randint(
+        random.PRNGKey(1), (batch_size, *x.shape), 0, 256
+    ).astype(jnp.uint8)
+    print(f"ResNet inference, batch size {batch_size}")
+    for algorithm in ("direct", "autotune"):
+        m = with_algorithm(model, algorithm)
+        apply = jax.jit(_infer)
+        start = default_timer()
+        jax.block_until_ready(apply(m, x))
+        first = default_timer() - start
+        t = _time(apply, m, x, number=number)
+        print(
+            f"  {algorithm:<9} {t * 1e3:8.2f} ms  "
+            f"(first call incl. compile/tuning {first:.2f} s)"
+        )
+
+if __name__ == "__main__":
+    main()
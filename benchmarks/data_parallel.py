@@ -0,0 +1,109 @@
+"""Scaling of data-parallel ``mlax.make_train_step`` over 1 to 8 host devices,
+and number of gradient all-reduces against a per-parameter ``psum``.
+
+Host devices share the machine's cores, so scaling efficiency here reflects
+the overhead of sharding and collectives rather than the speedup on
+accelerators.
+"""
+import os
+
+os.environ["XLA_FLAGS"] = " ".join([
+    os.environ.get("XLA_FLAGS", ""),
+    "--xla_force_host_platform_device_count=8"
+]).strip()
+
+from timeit import timeit
+import numpy as np
+import jax
+from jax import (
+    numpy as jnp,
+    random,
+    lax,
+    tree_util as jtu
+)
+from jax.sharding import Mesh, NamedSharding, PartitionSpec
+from mlax import make_train_step
+from mlax.nn import Series, Linear, Bias, ZNorm, F
+from mlax.optim import SGD
+
+def make_model(n_blocks, width):
+    keys_iter = iter(random.split(random.PRNGKey(0), 3 * n_blocks))
+    return Series([
+        Series([
+            Linear(next(keys_iter), width),
+            Bias(next(keys_iter), -1),
+            ZNorm(next(keys_iter), "channel_last"),
+            F(jax.nn.relu)
+        ])
+        for _ in range(n_blocks)
+    ]).initialize(jnp.ones((width,)))
+
+def loss_fn(preds, targets):
+    return jnp.mean((preds - targets) ** 2)
+
+def count_all_reduces(lowered):
+    return lowered.as_text().count("all_reduce")
+
+def per_leaf_all_reduces(model, mesh, x, y):
+    def grads(model, x, y):
+        def loss(model):
+            preds, _ = jax.vmap(
+                model.__call__,
+                in_axes=(0, None, None, None),
+                out_axes=(0, None),
+                axis_name="N"
+            )(x, None, False, ("N", "data"))
+            return loss_fn(preds, y)
+        return jtu.tree_map(
+            lambda g: lax.pmean(g, "data"), jax.grad(loss)(model)
+        )
+    step = jax.jit(jax.shard_map(
+        grads, mesh=mesh,
+        in_specs=(PartitionSpec(), PartitionSpec("data"), PartitionSpec("data")),
+        out_specs=PartitionSpec(), check_vma=False
+    ))
+    return count_all_reduces(step.lower(model, x, y))
+
+def main(n_blocks=8, width=256, per_device_batch=64, number=10):
+    optimizer = SGD(1e-2, 0.9)
+    baseline = None
+    for n_devices in (1, 2, 4, 8):
+        if n_devices > jax.device_count():
+            break
+        mesh = Mesh(np.array(jax.devices()[:n_devices]), ("data",))
+        batch_sharding = NamedSharding(mesh, PartitionSpec("data"))
+        batch_size = per_device_batch * n_devices
+        x = jax.device_put(
+            random.normal(random.PRNGKey(1), (batch_size, width)),
+            batch_sharding
+        )
+        y = jax.device_put(
+            random.normal(random.PRNGKey(2), (batch_size, width)),
+            batch_sharding
+        )
+
+        model = make_model(n_blocks, width)
+        state = optimizer.init(model.partition()[0])
+        train_step = make_train_step(loss_fn, optimizer, mesh=mesh)
+        bucketed = count_all_reduces(
+            train_step.lower(model, state, None, x, y)
+        )
+        per_leaf = per_leaf_all_reduces(model, mesh, x, y)
+
+        model, state, sums = train_step(model, state, None, x, y)
+        def run():
+            nonlocal model, state, sums
+            model, state, sums = train_step(model, state, sums, x, y)
+            jax.block_until_ready(sums)
+        run()
+        t = timeit(run, number=number) / number
+        throughput = batch_size / t
+        baseline = baseline or throughput
+        print(
+            f"  {n_devices} devices: {throughput:9.1f} examples/s  "
+            f"efficiency {throughput / (baseline * n_devices):5.2f}  "
+            f"all-reduces incl. ZNorm {bucketed} (per-parameter: {per_leaf})"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Inference latency of the ResNet example before and after folding its
+``ZNorm``, ``Scaler``, and ``Bias`` layers into the preceding ``Conv`` layers
+with ``mlax.nn.fold``.
+
+On a single-core CPU, folding lowers the latency at batch sizes 1 (0.93 ms to
+0.80 ms) and 32 (22.8 ms to 18.8 ms), but raises it at batch size 128 (75.2 ms
+to 87.6 ms). At batch size 128 the convolutions dominate, and XLA:CPU's YNN
+fusion pass partitions the folded program differently: it pulls the first
+residual block's epilogue into the custom fusion of the later convolutions.
+With that pass disabled, ``XLA_FLAGS=--xla_cpu_experimental_ynn_fusion_type=``,
+both models take 71.5 ms, so folding saves no measurable time at this batch
+size.
+"""
+import os
+import sys
+from timeit import timeit
+import jax
+from jax import (
+    numpy as jnp,
+    random
+)
+from mlax.nn import fold
+
+sys.path.append(os.path.dirname(__file__))
+from initialize import resnet
+
+def _apply(model, x, inference_mode):
+    return jax.vmap(
+        model.__call__,
+        in_axes=(0, None, None, None),
+        out_axes=(0, None),
+        axis_name="N"
+    )(x, None, inference_mode, "N")
+
+@jax.jit
+def train(model, x):
+    return _apply(model, x, False)[1]
+
+@jax.jit
+def infer(model, x):
+    return _apply(model, x, True)[0]
+
+def main(number=20):
+    model, x, _ = resnet()
+    model = model.initialize(x)
+    for batch_size in (1, 32, 128):
+        x = random.randint(
+            random.PRNGKey(1), (batch_size, 32, 32, 3), 0, 256
+        ).astype(jnp.uint8)
+        model = train(model, x)
+        folded = fold(model)
+        expected = infer(model, x)
+        error = float(jnp.max(jnp.abs(infer(folded, x) - expected)))
+
+        print(f"batch size {batch_size}")
+        for name, m in (("unfolded", model), ("folded", folded)):
+            jax.block_until_ready(infer(m, x))
+            t = timeit(
+                lambda: jax.block_until_ready(infer(m, x)), number=number
+            ) / number
+            print(f"  {name:<9} latency {t * 1e3:8.2f} ms")
+        print(f"  max abs output difference {error:.1e}")
+
+if __name__ == "__main__":
+    main()
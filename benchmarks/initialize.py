@@ -0,0 +1,141 @@
+"""Startup-time benchmark of eager lazy initialization against
+``Module.initialize`` on the ResNet, Encoder, and LSTM examples.
+
+``Module.initialize`` compiles the whole setup graph once, with
+``xla_backend_optimization_level=1``. Whether that beats eager initialization
+depends on the model and machine. On a single-core CPU:
+
+=======  =====  ==========
+Model    Eager  initialize
+=======  =====  ==========
+ResNet   14.0s  2.1s
+Encoder  5.0s   8.4s
+LSTM     4.7s   2.1s
+=======  =====  ==========
+
+and on another CPU ResNet went from 41.0 s to 6.7 s, the Encoder got slower,
+from 5.9 s to 7.7 s, and the LSTM was unchanged at 6.0 s. The Encoder is
+compile-bound: compiling its initializers takes 6 to 8 s at any backend
+optimization level.
+"""
+import os
+import sys
+from time import perf_counter
+import jax
+from jax import (
+    numpy as jnp,
+    nn,
+    random,
+    lax
+)
+from mlax import Module
+from mlax.nn import (
+    Conv, Scaler, ZNorm, Linear, Bias, F, Series, SeriesRng, Parallel
+)
+
+_EXAMPLES = os.path.join(os.path.dirname(__file__), "..", "examples")
+sys.path.append(os.path.join(_EXAMPLES, "Encoder"))
+sys.path.append(os.path.join(_EXAMPLES, "LSTM"))
+from encoder import RotaryEncode, EncoderBlock
+from lstm import BiLSTMBlock
+
+# ResNet from examples/ResNet/resnet.ipynb
+def conv_layers(rng, out_channels, strides):
+    keys_iter = iter([random.fold_in(rng, i) for i in range(4)])
+    return [
+        Conv(next(keys_iter), out_channels, 3, strides, padding=1),
+        ZNorm(next(keys_iter), "channel_last"),
+        Scaler(next(keys_iter), (0, 0, -1)),
+        Bias(next(keys_iter), (0, 0, -1)),
+        F(nn.relu)
+    ]
+
+class ResBlock1(Module):
+    def __init__(self, rng, out_channels):
+        super().__init__()
+        self.block = Series([
+            *conv_layers(random.fold_in(rng, 0), out_channels, strides=1),
+            *conv_layers(random.fold_in(rng, 1), out_channels, strides=1)
+        ])
+
+    def setup(self, x):
+        pass
+
+    def forward(self, x, rng=None, inference_mode=False, batch_axis_name=()):
+        acts, self.block = self.block(x, None, inference_mode, batch_axis_name)
+        return lax.add(acts, x)
+
+class ResBlock2(Module):
+    def __init__(self, rng, out_channels):
+        super().__init__()
+        self.block = Parallel([
+            Series([
+                *conv_layers(random.fold_in(rng, 0), out_channels, strides=2),
+                *conv_layers(random.fold_in(rng, 1), out_channels, strides=1)
+            ]),
+            Series(conv_layers(random.fold_in(rng, 2), out_channels, strides=2))
+        ])
+
+    def setup(self, x):
+        pass
+
+    def forward(self, x, rng=None, inference_mode=False, batch_axis_name=()):
+        acts, self.block = self.block(
+            [x, x], None, inference_mode, batch_axis_name
+        )
+        return lax.add(acts[0], acts[1])
+
+def resnet():
+    keys_iter = iter([random.fold_in(random.PRNGKey(0), i) for i in range(6)])
+    model = Series([
+        F(lambda x: x.astype(jnp.float32) / 255.0),
+        *conv_layers(next(keys_iter), 16, strides=1),
+        ResBlock1(next(keys_iter), 16),
+        ResBlock2(next(keys_iter), 32),
+        ResBlock2(next(keys_iter), 64),
+        F(lambda x: jnp.reshape(x.mean((0, 1)), (-1,))),
+        Linear(next(keys_iter), 10),
+        Bias(next(keys_iter), 10)
+    ])
+    return model, jnp.zeros((32, 32, 3), jnp.uint8), None
+
+def encoder(depth=12, seq_len=128, model_depth=256):
+    keys_iter = iter([random.fold_in(random.PRNGKey(0), i) for i in range(depth)])
+    model = SeriesRng([
+        EncoderBlock(
+            next(keys_iter), 8, 4 * model_depth,
+            RotaryEncode(seq_len, model_depth // 8).forward
+        ) for _ in range(depth)
+    ])
+    x = (jnp.zeros((seq_len, model_depth)), jnp.ones((seq_len,), bool))
+    return model, x, random.PRNGKey(1)
+
+def lstm(depth=4, seq_len=64, hidden_size=128):
+    keys_iter = iter([random.fold_in(random.PRNGKey(0), i) for i in range(depth)])
+    model = SeriesRng([BiLSTMBlock(next(keys_iter)) for _ in range(depth)])
+    x = (jnp.zeros((seq_len, hidden_size)), jnp.ones((seq_len,), bool))
+    return model, x, random.PRNGKey(1)
+
+def _block(model):
+    jax.block_until_ready(jax.tree_util.tree_leaves(model))
+
+def main():
+    for name, make in (("ResNet", resnet), ("Encoder", encoder), ("LSTM", lstm)):
+        model, x, rng = make()
+        start = perf_counter()
+        _, eager_model = model(x, rng, inference_mode=True)
+        _block(eager_model)
+        eager = perf_counter() - start
+
+        model, x, rng = make()
+        start = perf_counter()
+        compiled_model = model.initialize(x, rng)
+        _block(compiled_model)
+        compiled = perf_counter() - start
+
+        print(f"{name}")
+        print(f"  eager lazy initialization:  {eager:.2f} s")
+        print(f"  Module.initialize:          {compiled:.2f} s")
+
+if __name__ == "__main__":
+    main()
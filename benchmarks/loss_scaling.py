@@ -0,0 +1,90 @@
+"""Gradient underflow and throughput of float16 training with and without
+``mlax.precision.DynamicLossScale``.
+"""
+from timeit import timeit
+import jax
+from jax import (
+    numpy as jnp,
+    random,
+    tree_util as jtu
+)
+from mlax import make_train_step
+from mlax.nn import Series, Linear, Bias, ZNorm, F
+from mlax.optim import SGD
+from mlax.precision import Policy, DynamicLossScale
+
+def make_model(n_blocks, width):
+    keys_iter = iter(random.split(random.PRNGKey(0), 3 * n_blocks))
+    return Series([
+        Series([
+            Linear(next(keys_iter), width),
+            Bias(next(keys_iter), -1),
+            ZNorm(next(keys_iter), "channel_last"),
+            F(jax.nn.relu)
+        ])
+        for _ in range(n_blocks)
+    ]).initialize(jnp.ones((width,)))
+
+def loss_fn(preds, targets):
+    # Small loss, as with a mean over many tokens or a small regularizer
+    return 1e-3 * jnp.mean((preds - targets) ** 2)
+
+def underflow(policy, loss_scale, model, x, y):
+    trainables, non_trainables = model.partition()
+
+    @jax.jit
+    def gradients(trainables, non_trainables):
+        def loss(params):
+            preds, _ = jax.vmap(
+                params.combine(non_trainables).__call__,
+                in_axes=(0, None, None, None),
+                out_axes=(0, None),
+                axis_name="N"
+            )(policy.cast_to_compute(x), None, False, "N")
+            loss = loss_fn(policy.cast_to_output(preds), y)
+            if loss_scale is None:
+                return loss
+            return loss_scale.scale(loss, loss_scale.init())
+        return jax.grad(loss)(policy.compute_copy(trainables))
+
+    leaves = jtu.tree_leaves(gradients(trainables, non_trainables))
+    zeros = sum(int(jnp.sum(leaf == 0)) for leaf in leaves)
+    return zeros / sum(leaf.size for leaf in leaves)
+
+def main(n_blocks=8, width=256, batch_size=1024, number=10):
+    x = random.normal(random.PRNGKey(1), (batch_size, width))
+    y = random.normal(random.PRNGKey(2), (batch_size, width))
+    optimizer = SGD(1e-2, 0.9)
+    policy = Policy(compute_dtype=jnp.float16)
+    loss_scale = DynamicLossScale()
+
+    for name, step_loss_scale in (
+        ("no loss scale", None), ("dynamic loss scale", loss_scale)
+    ):
+        model = make_model(n_blocks, width)
+        zeros = underflow(policy, step_loss_scale, model, x, y)
+        state = optimizer.init(model.partition()[0])
+        if step_loss_scale is not None:
+            state = (state, step_loss_scale.init())
+        train_step = make_train_step(
+            loss_fn, optimizer, policy=policy, loss_scale=step_loss_scale
+        )
+        sums = jax.tree_util.tree_map(
+            lambda s: jnp.zeros(s.shape, s.dtype),
+            jax.eval_shape(train_step, model, state, None, x, y)[2]
+        )
+
+        def run():
+            nonlocal model, state, sums
+            model, state, sums = train_step(model, state, sums, x, y)
+            jax.block_until_ready(sums)
+
+        run()
+        t = timeit(run, number=number) / number
+        print(
+            f"  {name:<20} zero gradients {100 * zeros:5.1f}%  "
+            f"{1 / t:8.1f} steps/s"
+        )
+
+if __name__ == "__main__":
+    main()
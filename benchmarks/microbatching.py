@@ -0,0 +1,65 @@
+"""Peak temporary memory and throughput of ``mlax.make_train_step`` as the
+batch is split into more microbatches.
+"""
+from timeit import timeit
+import jax
+from jax import (
+    numpy as jnp,
+    random
+)
+from mlax import make_train_step
+from mlax.nn import Series, Linear, Bias, ZNorm, F
+from mlax.optim import SGD
+
+def make_model(n_blocks, width):
+    keys_iter = iter(random.split(random.PRNGKey(0), 3 * n_blocks))
+    return Series([
+        Series([
+            Linear(next(keys_iter), width),
+            Bias(next(keys_iter), -1),
+            ZNorm(next(keys_iter), "channel_last"),
+            F(jax.nn.relu)
+        ])
+        for _ in range(n_blocks)
+    ]).initialize(jnp.ones((width,)))
+
+def loss_fn(preds, targets):
+    return jnp.mean((preds - targets) ** 2)
+
+def main(n_blocks=8, width=256, batch_size=1024, number=10):
+    x = random.normal(random.PRNGKey(1), (batch_size, width))
+    y = random.normal(random.PRNGKey(2), (batch_size, width))
+    optimizer = SGD(1e-2, 0.9)
+
+    for n_microbatches in (1, 2, 4, 8, 16):
+        model = make_model(n_blocks, width)
+        state = optimizer.init(model.partition()[0])
+        train_step = make_train_step(
+            loss_fn, optimizer, n_microbatches=n_microbatches
+        )
+        sums = jax.tree_util.tree_map(
+            lambda s: jnp.zeros(s.shape, s.dtype),
+            jax.eval_shape(train_step, model, state, None, x, y)[2]
+        )
+        memory = train_step.lower(
+            model, state, sums, x, y
+        ).compile().memory_analysis()
+
+        def run():
+            nonlocal model, state, sums
+            model, state, sums = train_step(model, state, sums, x, y)
+            jax.block_until_ready(sums)
+
+        run()
+        t = timeit(run, number=number) / number
+        temp = (
+            f"{memory.temp_size_in_bytes / 2**20:8.1f} MiB"
+            if memory is not None else "     n/a"
+        )
+        print(
+            f"  n_microbatches={n_microbatches:<3} temp {temp} "
+            f"{1 / t:8.1f} steps/s"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Throughput of the mixed-precision ResNet from
+examples/ResNet/resnet_mixed_precision.ipynb, with weights cast to half
+precision in every forward against a ``mlax.precision.Policy`` compute copy
+cast once per step.
+"""
+from timeit import timeit
+import jax
+from jax import (
+    numpy as jnp,
+    nn,
+    random,
+    lax
+)
+from mlax import Module, PathFilter, make_train_step
+from mlax.nn import Conv, Scaler, ZNorm, Linear, Bias, F, Series, Parallel
+from mlax.optim import Adam
+from mlax.precision import Policy
+
+full_precision = jnp.float32
+half_precision = jnp.float16
+
+def conv_layers(rng, out_channels, strides):
+    keys_iter = iter([random.fold_in(rng, i) for i in range(4)])
+    return [
+        Conv(next(keys_iter), out_channels, 3, strides, padding=1),
+        F(lambda x: x.astype(full_precision)),
+        ZNorm(next(keys_iter), "channel_last"),
+        Scaler(next(keys_iter), (0, 0, -1)),
+        Bias(next(keys_iter), (0, 0, -1)),
+        F(lambda x: nn.relu(x.astype(half_precision)))
+    ]
+
+class ResBlock1(Module):
+    def __init__(self, rng, out_channels):
+        super().__init__()
+        self.block = Series([
+            *conv_layers(random.fold_in(rng, 0), out_channels, strides=1),
+            *conv_layers(random.fold_in(rng, 1), out_channels, strides=1)
+        ])
+
+    def setup(self, x):
+        pass
+
+    def forward(self, x, rng=None, inference_mode=False, batch_axis_name=()):
+        acts, self.block = self.block(x, None, inference_mode, batch_axis_name)
+        return lax.add(acts, x)
+
+class ResBlock2(Module):
+    def __init__(self, rng, out_channels):
+        super().__init__()
+        self.block = Parallel([
+            Series([
+                *conv_layers(random.fold_in(rng, 0), out_channels, strides=2),
+                *conv_layers(random.fold_in(rng, 1), out_channels, strides=1)
+            ]),
+            Series(conv_layers(random.fold_in(rng, 2), out_channels, strides=2))
+        ])
+
+    def setup(self, x):
+        pass
+
+    def forward(self, x, rng=None, inference_mode=False, batch_axis_name=()):
+        acts, self.block = self.block(
+            [x, x], None, inference_mode, batch_axis_name
+        )
+        return lax.add(acts[0], acts[1])
+
+def resnet():
+    keys_iter = iter([random.fold_in(random.PRNGKey(0), i) for i in range(6)])
+    return Series([
+        F(lambda x: x.astype(half_precision) / 255.0),
+        *conv_layers(next(keys_iter), 16, strides=1),
+        ResBlock1(next(keys_iter), 16),
+        ResBlock2(next(keys_iter), 32),
+        ResBlock2(next(keys_iter), 64),
+        F(lambda x: jnp.reshape(x.mean((0, 1)), (-1,))),
+        Linear(next(keys_iter), 10),
+        Bias(next(keys_iter), 10)
+    ]).initialize(jnp.zeros((32, 32, 3), jnp.uint8))
+
+def loss_fn(preds, targets):
+    return jnp.mean(
+        -jnp.take_along_axis(
+            nn.log_softmax(preds.astype(full_precision)),
+            targets[:, None], axis=1
+        )
+    )
+
+def main(batch_size=128, number=5):
+    x = random.randint(
+        random.PRNGKey(1), (batch_size, 32, 32, 3), 0, 256
+    ).astype(jnp.uint8)
+    y = random.randint(random.PRNGKey(2), (batch_size,), 0, 10)
+    optimizer = Adam(1e-2)
+    policy = Policy(
+        full_precision, half_precision, full_precision, full_precision,
+        f=PathFilter.from_regex("conv_kernel|linear_kernel")
+    )
+
+    for n_microbatches in (1, 4):
+        for name, step_policy in (
+            ("per-forward casts", None), ("policy compute copy", policy)
+        ):
+            model = resnet()
+            state = optimizer.init(model.partition()[0])
+            train_step = make_train_step(
+                loss_fn, optimizer, n_microbatches=n_microbatches,
+                policy=step_policy
+            )
+            sums = jax.tree_util.tree_map(
+                lambda s: jnp.zeros(s.shape, s.dtype),
+                jax.eval_shape(train_step, model, state, None, x, y)[2]
+            )
+
+            def run():
+                nonlocal model, state, sums
+                model, state, sums = train_step(model, state, sums, x, y)
+                jax.block_until_ready(sums)
+
+            run()
+            t = timeit(run, number=number) / number
+            print(
+                f"  n_microbatches={n_microbatches} {name:<20} "
+                f"step {t * 1e3:8.1f} ms"
+            )
+
+if __name__ == "__main__":
+    with jax.default_matmul_precision("bfloat16"):
+        main()
@@ -0,0 +1,46 @@
+"""Microbenchmark of ``Module`` flattening on deep ``Series`` trees.
+
+Compares flattening with cached field layouts against recomputing the layout
+of every module on each flatten.
+"""
+from timeit import timeit
+from jax import (
+    numpy as jnp,
+    random,
+    tree_util as jtu
+)
+from mlax.nn import Series, Linear, Bias
+
+def make_model(depth):
+    keys_iter = iter(random.split(random.PRNGKey(0), 2 * depth))
+    return Series([
+        Series([Linear(next(keys_iter), 8), Bias(next(keys_iter), -1)])
+        for _ in range(depth)
+    ])
+
+def main(depth=300, number=100):
+    model = make_model(depth)
+    _, model = model(jnp.ones((8,)), None)
+
+    def flatten_unflatten():
+        leaves, treedef = jtu.tree_flatten(model)
+        return jtu.tree_unflatten(treedef, leaves)
+
+    def uncached_flatten_unflatten():
+        for layer in model.layers.data:
+            object.__setattr__(layer, "_module_layout", None)
+            for sublayer in layer.layers.data:
+                object.__setattr__(sublayer, "_module_layout", None)
+        object.__setattr__(model, "_module_layout", None)
+        return flatten_unflatten()
+
+    flatten_unflatten()
+    cached = timeit(flatten_unflatten, number=number) / number
+    uncached = timeit(uncached_flatten_unflatten, number=number) / number
+    print(f"depth={depth}")
+    print(f"  uncached layout: {uncached * 1e3:.3f} ms")
+    print(f"  cached layout:   {cached * 1e3:.3f} ms")
+    print(f"  speedup:         {uncached / cached:.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Throughput benchmark of ``mlax.optim.SGD`` against the example optimizer in
+``examples/MLP/optim.py`` on a model with many small parameters.
+"""
+import os
+import sys
+from timeit import timeit
+import jax
+from jax import (
+    numpy as jnp,
+    random,
+    tree_util as jtu
+)
+from mlax import FlatParams
+from mlax.nn import Series, Linear, Bias
+from mlax.optim import SGD
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "examples", "MLP"))
+import optim as example_optim
+
+def make_trainables(n_blocks):
+    keys_iter = iter(random.split(random.PRNGKey(0), 2 * n_blocks))
+    model = Series([
+        Series([Linear(next(keys_iter), 16), Bias(next(keys_iter), -1)])
+        for _ in range(n_blocks)
+    ]).initialize(jnp.ones((16,)))
+    return model.partition()[0]
+
+def main(n_blocks=500, number=50):
+    trainables = make_trainables(n_blocks)
+    print(f"parameter leaves: {len(jtu.tree_leaves(trainables))}")
+
+    # Example optimizer, one update per leaf and a tree transpose
+    @jax.jit
+    def example_step(grads, params, state):
+        updates, state = example_optim.sgd_step(grads, state, 1e-2, 0.9)
+        return example_optim.apply_updates(updates, params), state
+
+    params = trainables
+    grads = jtu.tree_map(jnp.ones_like, params)
+    state = example_optim.sgd_init(params)
+    def run_example():
+        nonlocal params, state
+        params, state = example_step(grads, params, state)
+        jax.block_until_ready(state)
+
+    # mlax.optim on partitioned modules, packed every step
+    optimizer = SGD(1e-2, 0.9)
+    step = optimizer.jit()
+    module_params = trainables
+    module_state = optimizer.init(module_params)
+    def run_module():
+        nonlocal module_params, module_state
+        module_params, module_state = step(grads, module_params, module_state)
+        jax.block_until_ready(module_state)
+
+    # mlax.optim on FlatParams, kept packed between steps
+    flat_params = FlatParams.pack(trainables)
+    flat_grads = FlatParams.pack(grads)
+    flat_state = optimizer.init(flat_params)
+    def run_flat():
+        nonlocal flat_params, flat_state
+        flat_params, flat_state = step(flat_grads, flat_params, flat_state)
+        jax.block_until_ready(flat_state)
+
+    for name, fn in (
+        ("examples/MLP/optim.py", run_example),
+        ("mlax.optim (modules)", run_module),
+        ("mlax.optim (FlatParams)", run_flat)
+    ):
+        fn()
+        t = timeit(fn, number=number) / number
+        print(f"  {name:<24} {1 / t:8.1f} steps/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Benchmark of ``Module.partition`` and ``Module.combine`` on a model with
+~10k parameter leaves.
+
+Compares the single-pass implementations against the previous two-pass,
+copy-per-parameter implementations.
+"""
+from timeit import timeit
+import jax
+from jax import (
+    numpy as jnp,
+    random,
+    tree_util as jtu
+)
+from mlax import is_trainable_param, is_leaf_param
+from mlax.nn import Series, Bias, ZNorm
+from mlax._utils import _identity
+
+def make_model(n_blocks):
+    keys_iter = iter(random.split(random.PRNGKey(0), 2 * n_blocks))
+    return Series([
+        Series([Bias(next(keys_iter), -1), ZNorm(next(keys_iter), "channel_last")])
+        for _ in range(n_blocks)
+    ])
+
+def _reference_filter(module, f, inverse=False):
+    def _filter(arg):
+        arg_copy = jtu.tree_map(_identity, arg)
+        if (f(arg_copy) ^ inverse):
+            return arg_copy
+        else:
+            arg_copy.data = None
+            return arg_copy
+    return jtu.tree_map(_filter, module, is_leaf=is_leaf_param)
+
+def reference_partition(module, f=is_trainable_param):
+    return (
+        _reference_filter(module, f, inverse=False),
+        _reference_filter(module, f, inverse=True)
+    )
+
+def reference_combine(module, *rest):
+    def _combine(*args):
+        arg_copy = jtu.tree_map(_identity, args[0])
+        for arg in args[1:]:
+            if arg.data is not None:
+                arg_copy.data = arg.data
+                break
+        return arg_copy
+    return jtu.tree_map(_combine, module, *rest, is_leaf=is_leaf_param)
+
+def main(n_blocks=3334, number=10):
+    model = make_model(n_blocks)
+    _, model = jax.jit(model.__call__, static_argnums=(2, 3))(
+        jnp.ones((2, 4)), None, True, ()
+    )
+    n_leaves = len(jtu.tree_leaves(model))
+    print(f"parameter leaves: {n_leaves}")
+
+    def reference():
+        return reference_combine(*reference_partition(model))
+
+    def single_pass():
+        trainables, non_trainables = model.partition()
+        return trainables.combine(non_trainables)
+
+    for name, fn in (("reference", reference), ("single-pass", single_pass)):
+        fn()
+        t = timeit(fn, number=number) / number
+        print(f"  {name:<12} partition + combine: {t * 1e3:.2f} ms")
+
+if __name__ == "__main__":
+    main()
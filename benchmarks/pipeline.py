@@ -0,0 +1,84 @@
+"""Throughput and bubble fraction of ``mlax.pipeline.Pipeline`` training an
+MLP split into stages over host devices, against a single device.
+
+Host devices share the machine's cores, so throughput here reflects the
+overhead of scheduling and transfers rather than the speedup on accelerators.
+"""
+import os
+
+os.environ["XLA_FLAGS"] = " ".join([
+    os.environ.get("XLA_FLAGS", ""),
+    "--xla_force_host_platform_device_count=8"
+]).strip()
+
+from timeit import timeit
+import jax
+from jax import (
+    numpy as jnp,
+    random
+)
+from mlax import make_train_step
+from mlax.pipeline import Pipeline
+from mlax.nn import Series, Linear, Bias, F
+from mlax.optim import SGD
+
+def make_model(n_layers, width):
+    keys_iter = iter(random.split(random.PRNGKey(0), 2 * n_layers))
+    return Series([
+        layer for _ in range(n_layers) for layer in (
+            Linear(next(keys_iter), width),
+            Bias(next(keys_iter), -1),
+            F(jax.nn.relu)
+        )
+    ]).initialize(jnp.ones((width,)))
+
+def loss_fn(preds, targets):
+    return jnp.mean((preds - targets) ** 2)
+
+def main(n_layers=16, width=512, batch_size=256, n_microbatches=8, number=5):
+    x = random.normal(random.PRNGKey(1), (batch_size, width))
+    y = random.normal(random.PRNGKey(2), (batch_size, width))
+    optimizer = SGD(1e-3, 0.9)
+
+    model = make_model(n_layers, width)
+    state = optimizer.init(model.partition()[0])
+    train_step = make_train_step(
+        loss_fn, optimizer, n_microbatches=n_microbatches
+    )
+    sums = None
+    def run_single():
+        nonlocal model, state, sums
+        model, state, sums = train_step(model, state, sums, x, y)
+        jax.block_until_ready(sums)
+    run_single()
+    t = timeit(run_single, number=number) / number
+    print(f"  single device       {1000 * t:8.1f} ms")
+
+    for n_stages in (2, 4, 8):
+        if n_stages > jax.device_count():
+            break
+        layers_per_stage = 3 * n_layers // n_stages
+        boundaries = tuple(
+            layers_per_stage * i for i in range(1, n_stages)
+        )
+        for schedule in ("gpipe", "1f1b"):
+            pipeline = Pipeline(
+                make_model(n_layers, width), boundaries,
+                n_microbatches=n_microbatches, schedule=schedule
+            )
+            states = pipeline.init_optimizer(optimizer)
+            def run_pipeline():
+                nonlocal states
+                loss, gradients = pipeline.value_and_grad(loss_fn, x, y)
+                states = pipeline.apply_gradients(optimizer, gradients, states)
+                jax.block_until_ready((loss, states))
+            run_pipeline()
+            t = timeit(run_pipeline, number=number) / number
+            print(
+                f"  {n_stages} stages {schedule:<5} {1000 * t:8.1f} ms  "
+                f"bubble {pipeline.bubble_fraction:.2f}  "
+                f"peak activations {pipeline.peak_activations}"
+            )
+
+if __name__ == "__main__":
+    main()
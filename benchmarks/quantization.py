@@ -0,0 +1,76 @@
+"""Accuracy, kernel memory, and inference latency of the ResNet and Encoder
+examples with their ``Linear`` and ``Conv`` layers quantized to int8 by
+``mlax.nn.quantize``, against the float layers.
+"""
+import os
+import sys
+from timeit import timeit
+import jax
+from jax import (
+    numpy as jnp,
+    random,
+    tree_util as jtu
+)
+from mlax.nn import quantize
+
+sys.path.append(os.path.dirname(__file__))
+from initialize import resnet, encoder
+
+def _nbytes(model):
+    return sum(leaf.nbytes for leaf in jtu.tree_leaves(model))
+
+def _resnet(batch_size):
+    model, x, rng = resnet()
+    model = model.initialize(x, rng)
+    x = random.randint(
+        random.PRNGKey(1), (batch_size, *x.shape), 0, 256
+    ).astype(x.dtype)
+    return model, x, rng
+
+def _encoder(batch_size):
+    model, x, rng = encoder()
+    model = model.initialize(x, rng)
+    x = (
+        random.normal(random.PRNGKey(1), (batch_size, *x[0].shape)),
+        jnp.ones((batch_size, *x[1].shape), bool)
+    )
+    return model, x, rng
+
+@jax.jit
+def infer(model, x, rng):
+    return jax.vmap(
+        model.__call__,
+        in_axes=(0, None, None, None),
+        out_axes=(0, None),
+        axis_name="N"
+    )(x, rng, True, "N")[0]
+
+def main(batch_size=32, number=10):
+    for name, make in (("ResNet", _resnet), ("Encoder", _encoder)):
+        model, x, rng = make(batch_size)
+        q_model = quantize(model)
+        expected = jtu.tree_leaves(infer(model, x, rng))[0]
+        y = jtu.tree_leaves(infer(q_model, x, rng))[0]
+        error = float(
+            jnp.linalg.norm(y - expected) / jnp.linalg.norm(expected)
+        )
+
+        print(name)
+        for label, m in (("float", model), ("int8", q_model)):
+            jax.block_until_ready(infer(m, x, rng))
+            t = timeit(
+                lambda: jax.block_until_ready(infer(m, x, rng)), number=number
+            ) / number
+            print(
+                f"  {label:<6} params {_nbytes(m) / 2**20:7.2f} MiB  "
+                f"latency {t * 1e3:8.2f} ms"
+            )
+        print(f"  relative output error {error:.2e}")
+        if name == "ResNet":
+            agreement = float(jnp.mean(
+                jnp.argmax(y, -1) == jnp.argmax(expected, -1)
+            ))
+            print(f"  top-1 agreement       {100 * agreement:.1f}%")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Activation memory against step time of training the ResNet and Encoder
+examples with their blocks wrapped in ``Remat``/``RematRng`` under different
+policies.
+
+Residuals are the activations saved by the forward pass for the backward pass,
+independent of the backend. XLA:CPU may schedule rematerialized computations
+early, so its temporary buffer sizes need not reflect the savings seen on
+accelerators.
+"""
+import os
+import sys
+from timeit import timeit
+import jax
+from jax import (
+    numpy as jnp,
+    random,
+    tree_util as jtu
+)
+from mlax.nn import Remat, RematRng, SeriesRng
+
+sys.path.append(os.path.dirname(__file__))
+sys.path.append(
+    os.path.join(os.path.dirname(__file__), "..", "examples", "Encoder")
+)
+from initialize import resnet, ResBlock1, ResBlock2
+from encoder import RotaryEncode, EncoderBlock
+
+POLICIES = (None, "nothing", "dots", "dots_no_batch")
+
+def resnet_model(policy, batch_size=64):
+    model, x, _ = resnet()
+    if policy is not None:
+        model.layers.data = [
+            Remat(layer, policy)
+            if isinstance(layer, (ResBlock1, ResBlock2)) else layer
+            for layer in model.layers.data
+        ]
+    model = model.initialize(x)
+    x = jnp.zeros((batch_size, *x.shape), x.dtype)
+    return model, x, None
+
+def encoder_model(policy, depth=8, batch_size=16, seq_len=128, model_depth=128):
+    encode_fn = RotaryEncode(seq_len, model_depth // 8).forward
+    blocks = [
+        EncoderBlock(
+            random.fold_in(random.PRNGKey(0), i), 8, 4 * model_depth,
+            encode_fn
+        ) for i in range(depth)
+    ]
+    if policy is not None:
+        blocks = [RematRng(block, policy) for block in blocks]
+    x = (jnp.zeros((seq_len, model_depth)), jnp.ones((seq_len,), bool))
+    model = SeriesRng(blocks).initialize(x, random.PRNGKey(1))
+    x = (
+        random.normal(random.PRNGKey(2), (batch_size, seq_len, model_depth)),
+        jnp.ones((batch_size, seq_len), bool)
+    )
+    return model, x, random.PRNGKey(3)
+
+def loss(model, x, rng):
+    y, model = jax.vmap(
+        model.__call__,
+        in_axes=(0, None, None, None),
+        out_axes=(0, None),
+        axis_name="N"
+    )(x, rng, False, "N")
+    return sum(jnp.mean(leaf ** 2) for leaf in jtu.tree_leaves(y))
+
+@jax.jit
+def train_step(model, x, rng):
+    return jax.grad(loss)(model, x, rng)
+
+def residual_bytes(model, x, rng):
+    vjp_fn = jax.eval_shape(
+        lambda model: jax.vjp(lambda m: loss(m, x, rng), model)[1], model
+    )
+    return sum(
+        leaf.size * leaf.dtype.itemsize for leaf in jtu.tree_leaves(vjp_fn)
+    )
+
+def main(number=5):
+    for name, make in (("ResNet", resnet_model), ("Encoder", encoder_model)):
+        print(name)
+        for policy in POLICIES:
+            model, x, rng = make(policy)
+            compiled = train_step.lower(model, x, rng).compile()
+            memory = compiled.memory_analysis()
+            compiled(model, x, rng)
+            t = timeit(
+                lambda: jax.block_until_ready(compiled(model, x, rng)),
+                number=number
+            ) / number
+            residuals = residual_bytes(model, x, rng) / 2**20
+            temp = (
+                f"{memory.temp_size_in_bytes / 2**20:8.1f} MiB"
+                if memory is not None else "     n/a"
+            )
+            print(
+                f"  {str(policy or 'no remat'):<14} "
+                f"residuals {residuals:8.1f} MiB  temp {temp}  "
+                f"step {1000 * t:8.1f} ms"
+            )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Optimizer state memory per device and step time of data-parallel training
+with ``Adam`` state replicated against sharded across 2, 4, and 8 host
+devices.
+"""
+import os
+
+os.environ["XLA_FLAGS"] = " ".join([
+    os.environ.get("XLA_FLAGS", ""),
+    "--xla_force_host_platform_device_count=8"
+]).strip()
+
+from timeit import timeit
+import numpy as np
+import jax
+from jax import (
+    numpy as jnp,
+    random
+)
+from jax.sharding import Mesh, NamedSharding, PartitionSpec
+from mlax import make_train_step, init_sharded_optim_state
+from mlax.nn import Series, Linear, Bias, F
+from mlax.optim import Adam
+
+def make_model(n_blocks, width):
+    keys_iter = iter(random.split(random.PRNGKey(0), 2 * n_blocks))
+    return Series([
+        layer for _ in range(n_blocks) for layer in (
+            Linear(next(keys_iter), width),
+            Bias(next(keys_iter), -1),
+            F(jax.nn.relu)
+        )
+    ]).initialize(jnp.ones((width,)))
+
+def loss_fn(preds, targets):
+    return jnp.mean((preds - targets) ** 2)
+
+def bytes_on_device(tree, device):
+    return sum(
+        shard.data.nbytes
+        for leaf in jax.tree_util.tree_leaves(tree)
+        for shard in leaf.addressable_shards
+        if shard.device == device
+    )
+
+def main(n_blocks=8, width=512, per_device_batch=16, number=5):
+    optimizer = Adam(1e-3)
+    for n_devices in (2, 4, 8):
+        if n_devices > jax.device_count():
+            break
+        mesh = Mesh(np.array(jax.devices()[:n_devices]), ("data",))
+        batch_sharding = NamedSharding(mesh, PartitionSpec("data"))
+        replicated = NamedSharding(mesh, PartitionSpec())
+        batch_size = per_device_batch * n_devices
+        x = jax.device_put(
+            random.normal(random.PRNGKey(1), (batch_size, width)),
+            batch_sharding
+        )
+        print(f"{n_devices} devices")
+        for shard_optim_state in (False, True):
+            model = jax.device_put(make_model(n_blocks, width), replicated)
+            if shard_optim_state:
+                state = init_sharded_optim_state(
+                    optimizer, model.partition()[0], mesh
+                )
+            else:
+                state = jax.device_put(
+                    optimizer.init(model.partition()[0]), replicated
+                )
+            train_step = make_train_step(
+                loss_fn, optimizer, mesh=mesh,
+                shard_optim_state=shard_optim_state
+            )
+            model, state, sums = train_step(model, state, None, x, x)
+            def run():
+                nonlocal model, state, sums
+                model, state, sums = train_step(model, state, sums, x, x)
+                jax.block_until_ready(sums)
+            run()
+            t = timeit(run, number=number) / number
+            device = jax.devices()[0]
+            name = "sharded" if shard_optim_state else "replicated"
+            params = bytes_on_device(model, device) / 2**20
+            optim_state = bytes_on_device(state, device) / 2**20
+            print(
+                f"  {name:<10} params {params:6.2f} MiB  "
+                f"optimizer state {optim_state:6.2f} MiB  "
+                f"step {1000 * t:7.1f} ms"
+            )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Trace and compile time of a deep stack of ``EncoderBlock``s from
+``examples/Encoder/encoder.py`` in ``SeriesRng`` against ``StackedRng``.
+"""
+import os
+import sys
+from time import perf_counter
+from timeit import timeit
+import jax
+from jax import (
+    numpy as jnp,
+    random
+)
+from mlax.nn import SeriesRng, StackedRng
+
+sys.path.append(
+    os.path.join(os.path.dirname(__file__), "..", "examples", "Encoder")
+)
+from encoder import RotaryEncode, EncoderBlock
+
+def make_model(container, depth, seq_len, model_depth):
+    encode_fn = RotaryEncode(seq_len, model_depth // 8).forward
+    model = container([
+        EncoderBlock(
+            random.fold_in(random.PRNGKey(0), i), 8, 4 * model_depth,
+            encode_fn
+        ) for i in range(depth)
+    ])
+    x = (jnp.zeros((seq_len, model_depth)), jnp.ones((seq_len,), bool))
+    return model.initialize(x, random.PRNGKey(1))
+
+def main(depth=24, batch_size=8, seq_len=64, model_depth=128, number=10):
+    x = random.normal(random.PRNGKey(2), (batch_size, seq_len, model_depth))
+    mask = jnp.ones((batch_size, seq_len), bool)
+    rng = random.PRNGKey(3)
+
+    @jax.jit
+    def train_step(model, x, mask, rng):
+        def loss(model):
+            (y, _), model = jax.vmap(
+                model.__call__,
+                in_axes=((0, 0), None, None, None),
+                out_axes=(0, None),
+                axis_name="N"
+            )((x, mask), rng, False, "N")
+            return jnp.mean(y ** 2)
+        return jax.grad(loss)(model)
+
+    for name, container in (("SeriesRng", SeriesRng), ("StackedRng", StackedRng)):
+        model = make_model(container, depth, seq_len, model_depth)
+
+        start = perf_counter()
+        lowered = train_step.lower(model, x, mask, rng)
+        trace = perf_counter() - start
+        start = perf_counter()
+        compiled = lowered.compile()
+        compile = perf_counter() - start
+
+        compiled(model, x, mask, rng)
+        t = timeit(
+            lambda: jax.block_until_ready(compiled(model, x, mask, rng)),
+            number=number
+        ) / number
+        print(f"{name} (depth={depth})")
+        print(f"  trace:   {trace:6.2f} s")
+        print(f"  compile: {compile:6.2f} s")
+        print(f"  step:    {1000 * t:6.1f} ms")
+
+if __name__ == "__main__":
+    main()
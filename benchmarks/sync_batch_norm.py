@@ -0,0 +1,111 @@
+"""All-reduces per step and throughput of data-parallel ResNet training over 8
+host devices with ``ZNorm`` normalizing over the global batch, against
+per-device statistics with running statistics merged every ``N`` steps by
+``Trainer.sync_stats``.
+
+Host devices share the machine's cores, so timings reflect the overhead of
+collectives rather than the speedup on accelerators.
+"""
+import os
+
+os.environ["XLA_FLAGS"] = " ".join([
+    os.environ.get("XLA_FLAGS", ""),
+    "--xla_force_host_platform_device_count=8"
+]).strip()
+
+import sys
+from timeit import timeit
+import numpy as np
+import jax
+from jax import (
+    numpy as jnp,
+    random,
+    tree_util as jtu
+)
+from jax.sharding import Mesh, NamedSharding, PartitionSpec
+from mlax import Trainer
+from mlax.nn import ZNorm
+from mlax.optim import SGD
+
+sys.path.append(os.path.dirname(__file__))
+from initialize import resnet
+
+def with_local_stats(model, axis_name):
+    def local(node):
+        if isinstance(node, ZNorm):
+            node = jtu.tree_map(lambda leaf: leaf, node)
+            node.local_axis_name = axis_name
+        return node
+    return jtu.tree_map(
+        local, model, is_leaf=lambda node: isinstance(node, ZNorm)
+    )
+
+def loss_fn(preds, targets):
+    return jnp.mean(
+        -jnp.take_along_axis(jax.nn.log_softmax(preds), targets[:, None], 1)
+    )
+
+def count_all_reduces(lowered):
+    return lowered.as_text().count("all_reduce")
+
+def main(per_device_batch=16, number=10):
+    mesh = Mesh(np.array(jax.devices()), ("data",))
+    batch_sharding = NamedSharding(mesh, PartitionSpec("data"))
+    batch_size = per_device_batch * len(jax.devices())
+    x = jax.device_put(
+        random.randint(
+            random.PRNGKey(1), (batch_size, 32, 32, 3), 0, 256
+        ).astype(jnp.uint8),
+        batch_sharding
+    )
+    y = jax.device_put(
+        random.randint(random.PRNGKey(2), (batch_size,), 0, 10),
+        batch_sharding
+    )
+    model, x0, _ = resnet()
+    model = model.initialize(x0)
+    n_z_norms = sum(
+        isinstance(node, ZNorm) for node in jtu.tree_leaves(
+            model, is_leaf=lambda node: isinstance(node, ZNorm)
+        )
+    )
+    print(f"{len(jax.devices())} devices, {n_z_norms} ZNorm layers")
+
+    for name, local, sync_stats_every in (
+        ("global statistics", False, None),
+        ("local, sync every 10", True, 10),
+        ("local, sync every 100", True, 100)
+    ):
+        # Trainer steps donate the model's buffers
+        m = resnet()[0].initialize(x0)
+        if local:
+            m = with_local_stats(m, "data")
+        trainer = Trainer(
+            m, SGD(1e-2, 0.9), loss_fn, mesh=mesh,
+            sync_stats_every=sync_stats_every
+        )
+        step_all_reduces = count_all_reduces(trainer._train_step.lower(
+            trainer._model, trainer.optim_state, trainer._zero_sums(x, y, None),
+            x, y
+        ))
+        sync_all_reduces = count_all_reduces(
+            trainer._sync_stats.lower(trainer._model)
+        ) if sync_stats_every is not None else 0
+
+        trainer.step(x, y)
+        def run():
+            trainer.step(x, y)
+            jax.block_until_ready(trainer.sums)
+        run()
+        t = timeit(run, number=number) / number
+        per_step = step_all_reduces + (
+            0 if sync_stats_every is None
+            else sync_all_reduces / sync_stats_every
+        )
+        print(
+            f"  {name:<22} all-reduces/step {per_step:6.2f}  "
+            f"{batch_size / t:8.1f} examples/s"
+        )
+
+if __name__ == "__main__":
+    main()
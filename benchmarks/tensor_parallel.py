@@ -0,0 +1,57 @@
+"""Scaling of a column-parallel then row-parallel ``Linear`` MLP block over
+1 to 8 host devices.
+"""
+import os
+
+os.environ["XLA_FLAGS"] = " ".join([
+    os.environ.get("XLA_FLAGS", ""),
+    "--xla_force_host_platform_device_count=8"
+]).strip()
+
+from timeit import timeit
+import numpy as np
+import jax
+from jax import (
+    random
+)
+from jax.sharding import Mesh, NamedSharding, PartitionSpec
+from mlax import sharding
+from mlax.nn import Series, Linear, F
+
+def make_model(width, hidden):
+    return Series([
+        Linear(random.PRNGKey(0), hidden, kernel_sharding=(None, "model")),
+        F(jax.nn.gelu),
+        Linear(random.PRNGKey(1), width, kernel_sharding=("model", None))
+    ])
+
+def main(batch_size=256, width=1024, hidden=4096, number=10):
+    x = random.normal(random.PRNGKey(2), (batch_size, width))
+    baseline = None
+    for n_devices in (1, 2, 4, 8):
+        if n_devices > jax.device_count():
+            break
+        mesh = Mesh(np.array(jax.devices()[:n_devices]), ("model",))
+        with sharding.use_mesh(mesh):
+            model = make_model(width, hidden).initialize(x[0])
+        apply = sharding.jit_apply(mesh, inference_mode=True, batch_axis_name="N")
+        _x = jax.device_put(x, NamedSharding(mesh, PartitionSpec()))
+        jax.block_until_ready(apply(model, _x))
+        t = timeit(
+            lambda: jax.block_until_ready(apply(model, _x)), number=number
+        ) / number
+        baseline = baseline or t
+        per_device = sum(
+            shard.data.nbytes
+            for leaf in jax.tree_util.tree_leaves(model)
+            for shard in leaf.addressable_shards
+            if shard.device == jax.devices()[0]
+        )
+        print(
+            f"  {n_devices} devices: {1000 * t:8.1f} ms  "
+            f"speedup {baseline / t:5.2f}x  "
+            f"weights/device {per_device / 2**20:6.1f} MiB"
+        )
+
+if __name__ == "__main__":
+    main()
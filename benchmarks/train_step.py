@@ -0,0 +1,83 @@
+"""Throughput benchmark of ``mlax.Trainer`` against a training loop in the
+style of ``examples/MLP``, which transfers the loss to the host every step and
+does not donate buffers.
+"""
+from timeit import timeit
+import jax
+from jax import (
+    numpy as jnp,
+    random
+)
+from mlax import Trainer
+from mlax.nn import Series, Linear, Bias, ZNorm, F
+from mlax.optim import SGD
+
+def make_model(n_blocks, width):
+    keys_iter = iter(random.split(random.PRNGKey(0), 3 * n_blocks))
+    return Series([
+        Series([
+            Linear(next(keys_iter), width),
+            Bias(next(keys_iter), -1),
+            ZNorm(next(keys_iter), "channel_last"),
+            F(jax.nn.relu)
+        ])
+        for _ in range(n_blocks)
+    ]).initialize(jnp.ones((width,)))
+
+def loss_fn(preds, targets):
+    return jnp.mean((preds - targets) ** 2)
+
+def main(n_blocks=8, width=64, batch_size=32, number=200):
+    x = random.normal(random.PRNGKey(1), (batch_size, width))
+    y = random.normal(random.PRNGKey(2), (batch_size, width))
+
+    # Example-style loop: no donation, loss read back every step
+    optimizer = SGD(1e-2, 0.9)
+    model = make_model(n_blocks, width)
+    trainables, non_trainables = model.partition()
+    state = optimizer.init(trainables)
+
+    @jax.jit
+    def example_step(trainables, non_trainables, state, x, y):
+        def _loss(trainables):
+            model = trainables.combine(non_trainables)
+            preds, model = jax.vmap(
+                model.__call__,
+                in_axes=(0, None, None, None),
+                out_axes=(0, None),
+                axis_name="N"
+            )(x, None, False, "N")
+            return loss_fn(preds, y), model
+        (loss, model), grads = jax.value_and_grad(_loss, has_aux=True)(
+            trainables
+        )
+        trainables, state = optimizer.step(grads, trainables, state)
+        return trainables, model.partition()[1], state, loss
+
+    def run_example():
+        nonlocal trainables, non_trainables, state
+        trainables, non_trainables, state, loss = example_step(
+            trainables, non_trainables, state, x, y
+        )
+        float(loss)
+
+    def make_run_trainer(sync_every):
+        trainer = Trainer(
+            make_model(n_blocks, width), SGD(1e-2, 0.9), loss_fn,
+            sync_every=sync_every
+        )
+        def run_trainer():
+            trainer.step(x, y)
+        return run_trainer
+
+    for name, fn in (
+        ("example loop", run_example),
+        ("Trainer (sync_every=1)", make_run_trainer(1)),
+        ("Trainer (sync_every=100)", make_run_trainer(100))
+    ):
+        fn()
+        t = timeit(fn, number=number) / number
+        print(f"  {name:<26} {1 / t:8.1f} steps/s")
+
+if __name__ == "__main__":
+    main()
@@ -3,5 +3,19 @@ from mlax.module import (
     is_trainable_param,
     is_non_trainable_param,
     is_leaf_param,
+    hyperparams,
+    PathFilter,
     Module
 )
+from mlax.flat import FlatParams
+from mlax.train import (
+    make_train_step,
+    bucketed_pmean,
+    init_sharded_optim_state,
+    shard_local_stats,
+    merge_local_stats,
+    Trainer
+)
+from mlax import sharding
+from mlax import precision
+from mlax.pipeline import Pipeline
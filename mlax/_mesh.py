@@ -0,0 +1,24 @@
+"""Mesh set by ``mlax.sharding.use_mesh``, importable by ``mlax.module``
+without importing ``mlax.sharding``.
+"""
+from contextlib import contextmanager
+from typing import Optional
+from jax.sharding import Mesh
+
+_meshes = []
+
+@contextmanager
+def use_mesh(mesh: Mesh):
+    """Context manager setting the mesh that sharding annotations refer to.
+
+    :param mesh: ``jax.sharding.Mesh``.
+    """
+    _meshes.append(mesh)
+    try:
+        yield mesh
+    finally:
+        _meshes.pop()
+
+def current_mesh() -> Optional[Mesh]:
+    """Innermost mesh set by ``use_mesh``, or None."""
+    return _meshes[-1] if _meshes else None
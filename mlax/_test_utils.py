@@ -24,6 +24,19 @@ def assert_equal_pytree(a, b):
     """Assert two PyTrees contain equal arrays."""
     jtu.tree_map(assert_equal_array, a, b)
 
+class TraceCounter:
+    """Wrapper around a function that counts the number of times it is called.
+    When jit-compiled, this is the number of traces, i.e. compilation cache
+    misses.
+    """
+    def __init__(self, fn):
+        self.fn = fn
+        self.count = 0
+
+    def __call__(self, *args, **kwargs):
+        self.count += 1
+        return self.fn(*args, **kwargs)
+
 def layer_test_results(
     cls, config, x, rng=None, batch_axis_name="N", x_vmap_axis=0, y_vmap_axis=0
 ):
@@ -1,8 +1,13 @@
 """Utilities."""
 from math import prod
 from inspect import signature
+from typing import Any, Mapping
+import numpy as np
 from jax import (
+    Array,
+    core,
     lax,
+    random,
     dtypes
 )
 
@@ -55,6 +60,69 @@ def _canon_norm_axis(axis):
     else:
         return _canon_int_sequence(axis, 1)
 
+def _canon_axis_names(axis_name):
+    if isinstance(axis_name, tuple):
+        return axis_name
+    return (axis_name,)
+
+class _ArrayFingerprint:
+    """Fingerprint of a device array. Hashed by shape and dtype, so hashing
+    does not transfer the array to the host. Compared by identity first, and by
+    value otherwise, which reads both arrays on the host.
+    """
+    __slots__ = ("array",)
+
+    def __init__(self, array: Array):
+        self.array = array
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, _ArrayFingerprint):
+            return NotImplemented
+        a, b = self.array, other.array
+        if a is b:
+            return True
+        if a.shape != b.shape or a.dtype != b.dtype:
+            return False
+        if dtypes.issubdtype(a.dtype, dtypes.prng_key):
+            a, b = random.key_data(a), random.key_data(b)
+        return bool(np.array_equal(np.asarray(a), np.asarray(b)))
+
+    def __hash__(self) -> int:
+        return hash((self.array.shape, self.array.dtype))
+
+def _fingerprint(value):
+    """Hashable fingerprint of a hyperparameter. Device arrays are
+    fingerprinted by shape, dtype, and value, and NumPy arrays by shape, dtype,
+    and bytes. Tracers are fingerprinted by identity.
+    """
+    if isinstance(value, core.Tracer):
+        return (core.Tracer, id(value))
+    elif isinstance(value, Array):
+        return _ArrayFingerprint(value)
+    elif isinstance(value, (np.ndarray, np.generic)):
+        return (np.ndarray, value.shape, value.dtype.str, value.tobytes())
+    elif isinstance(value, (list, tuple)):
+        return (type(value), tuple(_fingerprint(v) for v in value))
+    elif isinstance(value, Mapping):
+        return (
+            Mapping, tuple((k, _fingerprint(v)) for k, v in value.items())
+        )
+    else:
+        return value
+
+def _is_mutable(value):
+    """Whether a hyperparameter can be changed in place, in which case its
+    fingerprint cannot be cached.
+    """
+    if isinstance(value, (list, dict, np.ndarray)):
+        return True
+    elif isinstance(value, tuple):
+        return any(_is_mutable(v) for v in value)
+    elif isinstance(value, Mapping):
+        return any(_is_mutable(v) for v in value.values())
+    else:
+        return False
+
 def _needs_rng(module):
     return signature(module.forward).parameters["rng"].default is not None
 
@@ -62,33 +130,97 @@ def _needs_axis_name(fn):
     return "axis_name" in signature(fn).parameters.keys()
 
 def _compute_std_stats(x, axis, norm_axis_name=()):
-    n_elems = lax.convert_element_type(lax.mul(
-        prod(d for i, d in enumerate(x.shape) if i in axis),
-        lax.psum(1, norm_axis_name)
-    ), x.dtype)
-    mean = lax.div(
-        lax.psum(lax.reduce(x, 0, lax.add, axis), norm_axis_name), n_elems
-    )
-    mean_of_squares = lax.div(
-        lax.psum(
-            lax.reduce(lax.integer_pow(x, 2), 0, lax.add, axis), norm_axis_name
+    # Single pass over ``x``, shifted by its first element along ``axis`` for
+    # numerical stability and accumulated in at least float32. Returns the
+    # statistics in that dtype.
+    accum_dtype = dtypes.result_type(x.dtype, np.float32)
+    n_local = prod(d for i, d in enumerate(x.shape) if i in axis)
+    # The statistics do not depend on the shift, so neither do their gradients
+    pivot = lax.stop_gradient(lax.convert_element_type(
+        lax.slice(
+            x, [0] * x.ndim,
+            [1 if i in axis else d for i, d in enumerate(x.shape)]
         ),
-        n_elems
+        accum_dtype
+    ))
+    centered = lax.sub(
+        lax.convert_element_type(x, accum_dtype),
+        lax.broadcast_in_dim(
+            lax.reshape(
+                pivot,
+                [d for i, d in enumerate(pivot.shape) if i not in axis]
+            ),
+            x.shape,
+            [i for i in range(x.ndim) if i not in axis]
+        )
+    )
+    sums = lax.reduce(centered, 0.0, lax.add, axis)
+    sums_of_squares = lax.reduce(
+        lax.integer_pow(centered, 2), 0.0, lax.add, axis
     )
-    variance = lax.max(
-        lax.convert_element_type(0, x.dtype),
-        lax.sub(mean_of_squares, lax.integer_pow(mean, 2))
+    pivot = lax.reshape(pivot, sums.shape)
+    n = lax.convert_element_type(n_local, accum_dtype)
+    mean = lax.add(pivot, lax.div(sums, n))
+    variance = lax.div(
+        lax.sub(sums_of_squares, lax.div(lax.integer_pow(sums, 2), n)), n
     )
+    variance = lax.max(lax.convert_element_type(0, accum_dtype), variance)
+    if norm_axis_name != ():
+        mean, variance = _merge_std_stats(mean, variance, norm_axis_name)
+    # Statistics stay in the accumulation dtype so low-precision inputs are
+    # not standardized with rounded statistics
     return mean, variance
 
-def _standardize(x, axis, mean, variance, epsilon=1e-05):
+def _merge_std_stats(mean, variance, axis_name):
+    # Merge equally sized shards with Chan's method: the variance is the mean
+    # of the shards' variances plus the variance of their means, which avoids
+    # cancellation in E[x^2] - E[x]^2 on offset data
+    stats = lax.pmean(
+        lax.concatenate(
+            [lax.broadcast(mean, (1,)), lax.broadcast(variance, (1,))], 0
+        ),
+        axis_name
+    )
+    global_mean = lax.index_in_dim(stats, 0, keepdims=False)
+    variance = lax.add(
+        lax.index_in_dim(stats, 1, keepdims=False),
+        lax.pmean(
+            lax.integer_pow(lax.sub(mean, global_mean), 2), axis_name
+        )
+    )
+    return global_mean, variance
+
+def _standardize(
+    x, axis, mean, variance, epsilon=1e-05, scale=None, shift=None
+):
+    # Normalization, scaling, and shifting as one elementwise expression, so
+    # they compile to a single fused loop over ``x``
     broadcast_dims = [i for i in range(x.ndim) if i not in axis]
-    return lax.mul(
-        lax.sub(x, lax.broadcast_in_dim(mean, x.shape, broadcast_dims)),
+    accum_dtype = dtypes.result_type(x.dtype, np.float32)
+    y = lax.mul(
+        lax.sub(
+            lax.convert_element_type(x, accum_dtype),
+            lax.broadcast_in_dim(
+                lax.convert_element_type(mean, accum_dtype),
+                x.shape, broadcast_dims
+            )
+        ),
         lax.broadcast_in_dim(
-            lax.rsqrt(
-                lax.add(variance, lax.convert_element_type(epsilon, x.dtype))
-            ),
+            lax.rsqrt(lax.add(
+                lax.convert_element_type(variance, accum_dtype),
+                lax.convert_element_type(epsilon, accum_dtype)
+            )),
             x.shape, broadcast_dims
         )
     )
+    if scale is not None:
+        y = lax.mul(y, _broadcast_to(scale, x.shape, accum_dtype))
+    if shift is not None:
+        y = lax.add(y, _broadcast_to(shift, x.shape, accum_dtype))
+    return lax.convert_element_type(y, x.dtype)
+
+def _broadcast_to(a, shape, dtype):
+    a = lax.convert_element_type(a, dtype)
+    return lax.broadcast_in_dim(
+        a, shape, tuple(range(len(shape) - a.ndim, len(shape)))
+    )
@@ -0,0 +1,113 @@
+"""Contiguous per-dtype parameter buffers."""
+from math import prod
+from typing import Any, Dict, NamedTuple, Tuple
+from jax import (
+    Array,
+    numpy as jnp,
+    lax,
+    tree_util as jtu
+)
+from mlax.module import is_trainable_param
+
+class _LeafSlot(NamedTuple):
+    """Location of a leaf in the flat buffers."""
+    dtype: str
+    offset: int
+    shape: Tuple[int, ...]
+
+@jtu.register_pytree_node_class
+class FlatParams:
+    """PyTree of parameters' data packed into one contiguous buffer per dtype,
+    with an offset table to unpack them back into a module.
+    """
+    def __init__(self, buffers: Dict[str, Array], treedef: Any, slots: Tuple):
+        """Initialize flat parameters. Use ``pack`` or ``partition`` instead.
+
+        :param buffers: Dictionary of dtype names to 1D buffers.
+        :param treedef: PyTree definition of the packed module.
+        :param slots: Location of each leaf of the packed module in
+            ``buffers``.
+        """
+        self.buffers = buffers
+        self.treedef = treedef
+        self.slots = slots
+
+    def tree_flatten(self):
+        """Flatten into buffers and auxiliary offset table."""
+        return (self.buffers,), (self.treedef, self.slots)
+
+    @classmethod
+    def tree_unflatten(cls, aux, children):
+        """Unflatten buffers and auxiliary offset table."""
+        return cls(children[0], *aux)
+
+    @classmethod
+    def pack(cls, module: Any) -> "FlatParams":
+        """Pack the ``data`` of ``module``'s parameters into contiguous
+        buffers. Parameters whose ``data`` is ``None`` are skipped.
+
+        :param module: Module, typically one half of ``Module.partition``.
+
+        :returns: Flat parameters.
+        """
+        leaves, treedef = jtu.tree_flatten(module)
+        groups = {}
+        slots = []
+        for leaf in leaves:
+            dtype = jnp.dtype(leaf.dtype).name
+            group = groups.setdefault(dtype, [[], 0])
+            slots.append(_LeafSlot(dtype, group[1], tuple(leaf.shape)))
+            group[0].append(lax.reshape(leaf, (prod(leaf.shape),)))
+            group[1] += prod(leaf.shape)
+        buffers = {
+            dtype: (
+                lax.concatenate(group, 0) if len(group) > 1 else group[0]
+            ) for dtype, (group, _) in groups.items()
+        }
+        return cls(buffers, treedef, tuple(slots))
+
+    @classmethod
+    def partition(
+        cls, module: Any, f=is_trainable_param
+    ) -> Tuple["FlatParams", Any]:
+        """Partition ``module`` on filter ``f`` and pack the selected
+        parameters.
+
+        :param module: Module to partition.
+        :param f: Filter selecting the parameters to pack. Default: trainable
+            parameters.
+
+        :returns: Flat selected parameters.
+        :returns: Module of unselected parameters, as returned by
+            ``Module.partition``.
+        """
+        selected, unselected = module.partition(f)
+        return cls.pack(selected), unselected
+
+    def unpack(self) -> Any:
+        """Unpack into a module whose parameters' ``data`` are views into
+        ``buffers``.
+
+        :returns: Module of the same structure as the packed module.
+        """
+        return self.treedef.unflatten([
+            lax.reshape(
+                lax.slice_in_dim(
+                    self.buffers[slot.dtype],
+                    slot.offset, slot.offset + prod(slot.shape)
+                ),
+                slot.shape
+            ) for slot in self.slots
+        ])
+
+    def combine(self, *rest) -> Any:
+        """Unpack and combine with ``rest`` as in ``Module.combine``."""
+        return self.unpack().combine(*rest)
+
+    @property
+    def sizes(self) -> Dict[str, int]:
+        """Number of elements of each buffer."""
+        return {dtype: buffer.size for dtype, buffer in self.buffers.items()}
+
+    def __repr__(self) -> str:
+        return f"FlatParams(buffers={self.buffers})"
@@ -1,17 +1,32 @@
 """MLAX module base class and parameter."""
+import re
 from abc import ABCMeta
-from typing import Any, Optional, Tuple, Union, Hashable
+from functools import partial
+from typing import (
+    Any, Callable, Dict, Mapping, NamedTuple, Optional, Tuple, Union,
+    Hashable
+)
+import numpy as np
+import jax
 from jax import (
     Array,
+    lax,
     tree_util as jtu
 )
-from mlax._utils import _identity
+from mlax._utils import _identity, _fingerprint, _is_mutable
+from mlax._mesh import current_mesh
 
 @jtu.register_pytree_node_class
 class Parameter:
     """PyTree wrapper around a valid JAX object and metadata."""
+    __slots__ = ("trainable", "data", "metadata")
 
-    def __init__(self, trainable: Optional[bool], data: Any=None):
+    def __init__(
+        self,
+        trainable: Optional[bool],
+        data: Any=None,
+        metadata: Optional[Mapping[str, Hashable]]=None
+    ):
         """Initialize parameter.
 
         :param trainable: Whether the parameter is trainable or non-trainable.
@@ -20,35 +35,82 @@ class Parameter:
         :param data: The content of parameter. Must be a valid JAX type or a
             PyTree of valid JAX types.
             Default: ``None``.
+        :param metadata: Optional mapping of hashable metadata. Metadata can
+            also be read and written as attributes of the parameter.
+            Default: ``None``, no metadata.
         """
         super().__init__()
         self.trainable = trainable
         self.data = data
+        self.metadata = dict(metadata) if metadata else None
 
     def tree_flatten(self):
         """Flatten into a valid JAX object and auxiliary metadata."""
-        meta_names = []
-        meta_values = []
-        for name, value in vars(self).items():
-            if name != "data" and name != "trainable":
-                meta_names.append(name)
-                meta_values.append(value)
-
-        return (self.data,), (
-            self.trainable, tuple(meta_names), tuple(meta_values)
-        )
+        if self.metadata is None:
+            return (self.data,), self.trainable
+        return (self.data,), (self.trainable, tuple(self.metadata.items()))
 
     @classmethod
     def tree_unflatten(cls, aux, children):
         """Unflatten a valid JAX object and auxiliary metadata."""
-        trainable, meta_names, meta_values = aux
-        self = cls(trainable, *children)
-        for name, value in zip(meta_names, meta_values):
-            object.__setattr__(self, name, value)
+        self = object.__new__(cls)
+        if isinstance(aux, tuple):
+            trainable, metadata = aux
+            object.__setattr__(self, "metadata", dict(metadata))
+        else:
+            trainable = aux
+            object.__setattr__(self, "metadata", None)
+        object.__setattr__(self, "trainable", trainable)
+        object.__setattr__(self, "data", children[0])
         return self
 
+    def _replace_data(self, data: Any) -> "Parameter":
+        """Shallow copy of ``self`` with ``data`` replaced."""
+        param = object.__new__(type(self))
+        object.__setattr__(param, "trainable", self.trainable)
+        object.__setattr__(param, "data", data)
+        object.__setattr__(
+            param, "metadata",
+            None if self.metadata is None else dict(self.metadata)
+        )
+        return param
+
+    def __getattr__(self, __name: str) -> Any:
+        # Only called for names that are not slots, look up metadata
+        if __name != "metadata" and self.metadata is not None:
+            try:
+                return self.metadata[__name]
+            except KeyError:
+                pass
+        raise AttributeError(
+            f"'{type(self).__name__}' object has no attribute '{__name}'"
+        )
+
+    def __setattr__(self, __name: str, __value: Any) -> None:
+        if __name in Parameter.__slots__:
+            object.__setattr__(self, __name, __value)
+        elif self.metadata is None:
+            self.metadata = {__name: __value}
+        else:
+            self.metadata[__name] = __value
+
+    def __delattr__(self, __name: str) -> None:
+        if __name in Parameter.__slots__:
+            object.__delattr__(self, __name)
+        elif self.metadata is not None and __name in self.metadata:
+            del self.metadata[__name]
+            if not self.metadata:
+                self.metadata = None
+        else:
+            raise AttributeError(__name)
+
     def __repr__(self) -> str:
-        return f"Parameter(trainable={self.trainable}, data={self.data})"
+        if self.metadata is None:
+            return f"Parameter(trainable={self.trainable}, data={self.data})"
+        return (
+            f"Parameter(trainable={self.trainable}, data={self.data}, "
+            f"metadata={self.metadata})"
+        )
 
 def is_trainable_param(p):
     """Whether ``p`` is a parameter whose ``trainable is True``."""
@@ -62,10 +124,158 @@ def is_leaf_param(p):
     """Whether ``p`` is a parameter whose ``trainable is not None``."""
     return isinstance(p, Parameter) and p.trainable is not None
 
+class PathFilter:
+    """Predicate on parameter paths compiled into boolean masks over the
+    flattened parameters of modules. Masks are cached by PyTree structure, so
+    the predicate is only evaluated once per module structure.
+    """
+    _max_cache_size = 64
+
+    def __init__(self, f: Callable[[Tuple[Any, ...]], bool]):
+        """Initialize a path filter.
+
+        :param f: Predicate on the key path of a leaf parameter.
+        """
+        self.f = f
+        self._masks = {}
+
+    @classmethod
+    def from_regex(cls, pattern: str) -> "PathFilter":
+        """Path filter selecting parameters whose ``jax.tree_util.keystr``
+        path matches the regular expression ``pattern``.
+        """
+        regex = re.compile(pattern)
+        return cls(lambda path: regex.search(jtu.keystr(path)) is not None)
+
+    def compile(self, module: Any) -> Tuple[list, Any, Tuple[bool, ...]]:
+        """Flatten ``module``'s parameters and compute their mask.
+
+        :param module: Module to compile the filter against.
+
+        :returns: Flattened leaf parameters of ``module``.
+        :returns: PyTree definition of ``module``.
+        :returns: Tuple of booleans indicating selected leaf parameters.
+        """
+        params, treedef = jtu.tree_flatten(module, is_leaf=is_leaf_param)
+        mask = self._masks.get(treedef)
+        if mask is None:
+            path_params, _ = jtu.tree_flatten_with_path(
+                module, is_leaf=is_leaf_param
+            )
+            mask = tuple(bool(self.f(path)) for path, _ in path_params)
+            if len(self._masks) >= self._max_cache_size:
+                self._masks.pop(next(iter(self._masks)))
+            self._masks[treedef] = mask
+        return params, treedef, mask
+
+    def filter(self, module: Any, inverse: bool=False) -> Any:
+        """Filter ``module``'s parameters. Filtered out parameters have their
+        ``data`` field replaced with ``None``.
+        """
+        params, treedef, mask = self.compile(module)
+        return treedef.unflatten([
+            param._replace_data(param.data if (selected ^ inverse) else None)
+            for selected, param in zip(mask, params)
+        ])
+
+    def partition(self, module: Any) -> Tuple[Any, Any]:
+        """Partition ``module``'s parameters. Unselected parameters have their
+        ``data`` field replaced with ``None``.
+        """
+        params, treedef, mask = self.compile(module)
+        selected, unselected = [], []
+        for is_selected, param in zip(mask, params):
+            if is_selected:
+                selected.append(param._replace_data(param.data))
+                unselected.append(param._replace_data(None))
+            else:
+                selected.append(param._replace_data(None))
+                unselected.append(param._replace_data(param.data))
+        return treedef.unflatten(selected), treedef.unflatten(unselected)
+
+    def combine(self, selected: Any, unselected: Any) -> Any:
+        """Combine the results of ``partition`` by index."""
+        params, treedef, mask = self.compile(selected)
+        combined = (
+            param if is_selected else other
+            for is_selected, param, other in zip(
+                mask, params, treedef.flatten_up_to(unselected)
+            )
+        )
+        return treedef.unflatten([
+            param._replace_data(param.data) for param in combined
+        ])
+
+def hyperparams(module: "Module") -> Dict[str, Any]:
+    """Hyperparameters of ``module`` by field name, not including those of its
+    submodules.
+    """
+    return dict(zip(
+        module._layout().hyperparam_names, module._hyperparams().values
+    ))
+
+class _ModuleLayout(NamedTuple):
+    """Names of a module's parameter and hyperparameter fields."""
+    param_names: Tuple[str, ...]
+    hyperparam_names: Tuple[str, ...]
+
+class _Hyperparams:
+    """Hashable wrapper around a module's hyperparameter values."""
+    __slots__ = ("values", "_fingerprint")
+
+    def __init__(self, values: Tuple[Any, ...]):
+        self.values = values
+        self._fingerprint = None
+
+    def fingerprint(self) -> Hashable:
+        """Structural fingerprint of ``values``, cached unless a value can be
+        changed in place.
+        """
+        if self._fingerprint is not None:
+            return self._fingerprint
+        fingerprint = _fingerprint(self.values)
+        if not _is_mutable(self.values):
+            self._fingerprint = fingerprint
+        return fingerprint
+
+    def __eq__(self, other: Any) -> bool:
+        if self is other:
+            return True
+        if not isinstance(other, _Hyperparams):
+            return NotImplemented
+        if len(self.values) == len(other.values) and all(
+            a is b for a, b in zip(self.values, other.values)
+        ):
+            return True
+        return self.fingerprint() == other.fingerprint()
+
+    def __hash__(self) -> int:
+        return hash(self.fingerprint())
+
+    def __repr__(self) -> str:
+        return f"_Hyperparams({self.values})"
+
+class _AbstractInit(NamedTuple):
+    """Uninitialized module and inputs an abstract module was created from."""
+    module: Any
+    x: Any
+    rng: Optional[Array]
+
+class _ArraySlot(NamedTuple):
+    """Placeholder for an array hyperparameter passed to ``_jit_init``."""
+    index: int
+
+_CACHE_FIELDS = ("_module_layout", "_module_hyperparams", "_module_abstract")
+
+def _is_param_field(value):
+    return isinstance(value, (Parameter, Module))
+
 class _ModuleMeta(ABCMeta):
     """Registers all modules as a PyTree"""
     def __new__(mcs, name, bases, namespace, **kwargs):
         cls = super().__new__(mcs, name, bases, namespace, **kwargs)
+        # Per-class cache of field layouts, keyed by instance shape
+        cls._layouts = {}
         jtu.register_pytree_with_keys_class(cls)
         return cls
 
@@ -76,34 +286,59 @@ class Module(metaclass=_ModuleMeta):
         """Initialize module hyperparameters."""
         self.initialized = False
 
+    def _layout(self) -> _ModuleLayout:
+        """Return the cached field layout of ``self``, computing it if the
+        fields have changed since the last call.
+        """
+        layout = self.__dict__.get("_module_layout")
+        if layout is None:
+            shape = tuple(
+                (name, _is_param_field(value))
+                for name, value in vars(self).items()
+                if name != "initialized" and name not in _CACHE_FIELDS
+            )
+            layout = self._layouts.get(shape)
+            if layout is None:
+                layout = _ModuleLayout(
+                    tuple(name for name, is_param in shape if is_param),
+                    tuple(name for name, is_param in shape if not is_param)
+                )
+                self._layouts[shape] = layout
+            object.__setattr__(self, "_module_layout", layout)
+        return layout
+
+    def _hyperparams(self) -> _Hyperparams:
+        """Return the cached hyperparameters of ``self``, collecting them if a
+        hyperparameter has been set since the last call.
+        """
+        fields = self.__dict__
+        hyperparams = fields.get("_module_hyperparams")
+        if hyperparams is None:
+            hyperparams = _Hyperparams(
+                tuple(fields[name] for name in self._layout().hyperparam_names)
+            )
+            object.__setattr__(self, "_module_hyperparams", hyperparams)
+        return hyperparams
+
     def tree_flatten_with_keys(self):
         """Flatten into parameters and auxiliary hyperparameters."""
-        param_names = []
-        param_values = []
-        hyperparam_names = []
-        hyperparam_values = []
-        for name, value in vars(self).items():
-            if name != "initialized":
-                if isinstance(value, (Parameter, Module)):
-                    param_names.append(name)
-                    param_values.append((name, value))
-                else:
-                    hyperparam_names.append(name)
-                    hyperparam_values.append(value)
-        return param_values, (
-            param_names, hyperparam_names, hyperparam_values, self.initialized
+        layout = self._layout()
+        fields = self.__dict__
+        return [(name, fields[name]) for name in layout.param_names], (
+            layout, self._hyperparams(), fields["initialized"]
         )
 
     @classmethod
     def tree_unflatten(cls, aux, param_values):
         """Unflatten parameters and auxiliary hyperparameters."""
-        param_names, hyperparam_names, hyperparam_values, initialized = aux
+        layout, hyperparams, initialized = aux
         self = cls.__new__(cls)
-        for name, value in zip(param_names, param_values):
-            object.__setattr__(self, name, value)
-        for name, value in zip(hyperparam_names, hyperparam_values):
-            object.__setattr__(self, name, value)
-        object.__setattr__(self, "initialized", initialized)
+        fields = self.__dict__
+        fields.update(zip(layout.param_names, param_values))
+        fields.update(zip(layout.hyperparam_names, hyperparams.values))
+        fields["initialized"] = initialized
+        fields["_module_layout"] = layout
+        fields["_module_hyperparams"] = hyperparams
         return self
 
     def setup(self, x: Any) -> None:
@@ -180,76 +415,314 @@ class Module(metaclass=_ModuleMeta):
             self.initialized = True
         return self.apply(x, rng, inference_mode, batch_axis_name)
 
+    def abstract_init(
+        self,
+        x: Any,
+        rng: Optional[Array]=None,
+        inference_mode: bool = False,
+        batch_axis_name: Union[Hashable, Tuple[Hashable]] = ()
+    ) -> Tuple[Any, Any]:
+        """Initialize ``self`` on abstract inputs without allocating
+        parameters or computing the forward pass. ``setup`` and ``forward``
+        are run under ``jax.eval_shape``.
+
+        :param x: Compatible input features. May be a PyTree of
+            ``jax.ShapeDtypeStruct``.
+        :param rng: PRNG key. Only necessary for some modules. Default: None.
+        :param inference_mode: Whether in inference or training mode. Default:
+            training mode.
+        :param batch_axis_name: See ``__call__``. Default: (), no batch axis.
+
+        :returns: ``jax.ShapeDtypeStruct`` of output features.
+        :returns: Abstract initialized copy of ``self`` whose parameters'
+            ``data`` are ``jax.ShapeDtypeStruct``. Call ``materialize`` on it
+            to allocate the parameters.
+        """
+        x = jtu.tree_map(lambda a: jax.ShapeDtypeStruct(a.shape, a.dtype), x)
+        # Initialize a copy, so ``self`` does not hold tracers afterwards
+        y, module = jax.eval_shape(
+            lambda x, rng: jtu.tree_map(_identity, self)(
+                x, rng, inference_mode, batch_axis_name
+            ),
+            x, rng
+        )
+        module.__dict__["_module_abstract"] = _AbstractInit(self, x, rng)
+        return y, module
+
+    def materialize(self) -> Any:
+        """Allocate the parameters of an abstract module returned by
+        ``abstract_init``. Parameters are initialized in a single compiled
+        program, as if ``setup`` were called on the same inputs, without
+        updating any running statistics.
+
+        :returns: Initialized module.
+        """
+        abstract = self.__dict__.get("_module_abstract")
+        if abstract is None:
+            raise ValueError("module was not returned by abstract_init")
+        return abstract.module.initialize(abstract.x, abstract.rng)
+
+    def initialize(self, x: Any, rng: Optional[Array]=None) -> Any:
+        """Initialize ``self`` and all its submodules in a single jit-compiled
+        program, as if ``setup`` were called on ``x``, without computing the
+        forward pass or updating any running statistics. Compiled programs are
+        cached for modules of the same configuration and inputs of the same
+        shapes and dtypes. Array hyperparameters, such as PRNG keys, are
+        passed to the program, so modules differing only in their values
+        share it.
+
+        :param x: Compatible input features. Only their shapes and dtypes are
+            used. May be a PyTree of ``jax.ShapeDtypeStruct``.
+        :param rng: PRNG key. Only necessary for some modules. Default: None.
+
+        :returns: Initialized copy of ``self``.
+        """
+        if self.initialized is True:
+            return self
+        module, arrays = _lift_array_hyperparams(self)
+        module_leaves, module_treedef = jtu.tree_flatten(module)
+        x_leaves, x_treedef = jtu.tree_flatten(x)
+        module, new_arrays = _jit_init(
+            module_treedef,
+            module_leaves,
+            x_treedef,
+            tuple(jax.ShapeDtypeStruct(a.shape, a.dtype) for a in x_leaves),
+            current_mesh(),
+            rng,
+            arrays
+        )
+        return _restore_array_hyperparams(module, arrays + new_arrays)
+
     def filter(self, f=is_trainable_param, inverse=False) -> Any:
         """Apply a filter ``f`` on ``self``'s parameters. Filtered out
-        parameters have their ``data`` field replaced with ``None``.
+        parameters have their ``data`` field replaced with ``None``. Selected
+        parameters are new ``Parameter`` nodes sharing ``self``'s data.
         """
         if self.initialized is False:
             raise AttributeError("cannot filter an uninitialized module")
 
-        def _filter(arg):
-            arg_copy = jtu.tree_map(_identity, arg)
-            if (f(arg_copy) ^ inverse):
-                return arg_copy
-            else:
-                arg_copy.data = None
-                return arg_copy
-        return jtu.tree_map(_filter, self, is_leaf=is_leaf_param)
+        params, treedef = jtu.tree_flatten(self, is_leaf=is_leaf_param)
+        return treedef.unflatten([
+            param._replace_data(param.data if (f(param) ^ inverse) else None)
+            for param in params
+        ])
 
     def partition(self, f=is_trainable_param) -> Tuple[Any, Any]:
-        """Partition on ``self``'s parameters on filter ``f``. Unselected
-        parameters have their ``data`` field replaced with ``None``.
+        """Partition on ``self``'s parameters on filter ``f`` in a single
+        pass. Unselected parameters have their ``data`` field replaced with
+        ``None``. Selected parameters are new ``Parameter`` nodes sharing
+        ``self``'s data, so layers updating parameters in place, such as
+        ``ZNorm``, do not modify ``self``.
         """
         if self.initialized is False:
             raise AttributeError("cannot partition an uninitialized module")
 
-        return (self.filter(f, inverse=False), self.filter(f, inverse=True))
+        params, treedef = jtu.tree_flatten(self, is_leaf=is_leaf_param)
+        selected, unselected = [], []
+        for param in params:
+            if f(param):
+                selected.append(param._replace_data(param.data))
+                unselected.append(param._replace_data(None))
+            else:
+                selected.append(param._replace_data(None))
+                unselected.append(param._replace_data(param.data))
+        return treedef.unflatten(selected), treedef.unflatten(unselected)
 
     def filter_with_path(self, f, inverse=False) -> Any:
-        """``filter`` with path."""
+        """``filter`` with path. ``f`` is either a function taking a path and
+        a parameter, or a ``PathFilter``.
+        """
         if self.initialized is False:
             raise AttributeError("cannot filter an uninitialized module")
+        if isinstance(f, PathFilter):
+            return f.filter(self, inverse)
 
-        def _filter_w_path(path, arg):
-            arg_copy = jtu.tree_map(_identity, arg)
-            if (not f(path, arg_copy) if inverse else f(path, arg_copy)):
-                return arg_copy
-            else:
-                arg_copy.data = None
-                return arg_copy
-        return jtu.tree_map_with_path(
-            _filter_w_path, self, is_leaf=is_leaf_param
+        path_params, treedef = jtu.tree_flatten_with_path(
+            self, is_leaf=is_leaf_param
         )
+        return treedef.unflatten([
+            param._replace_data(
+                param.data if (f(path, param) ^ inverse) else None
+            )
+            for path, param in path_params
+        ])
 
     def partition_with_path(self, f) -> Tuple[Any, Any]:
-        """``partition`` with path."""
+        """``partition`` with path. ``f`` is either a function taking a path
+        and a parameter, or a ``PathFilter``.
+        """
         if self.initialized is False:
             raise AttributeError("cannot partition an uninitialized module")
+        if isinstance(f, PathFilter):
+            return f.partition(self)
 
-        return (
-            self.filter_with_path(f, inverse=False),
-            self.filter_with_path(f, inverse=True)
+        path_params, treedef = jtu.tree_flatten_with_path(
+            self, is_leaf=is_leaf_param
         )
+        selected, unselected = [], []
+        for path, param in path_params:
+            if f(path, param):
+                selected.append(param._replace_data(param.data))
+                unselected.append(param._replace_data(None))
+            else:
+                selected.append(param._replace_data(None))
+                unselected.append(param._replace_data(param.data))
+        return treedef.unflatten(selected), treedef.unflatten(unselected)
 
     def combine(self, *rest):
-        """Combine ``self``'s parameters with ``rest``'s."""
-        def _combine(*args):
-            arg_copy = jtu.tree_map(_identity, args[0])
-            for arg in args[1:]:
+        """Combine ``self``'s parameters with ``rest``'s. For each parameter,
+        the data of the first parameter in ``rest`` whose ``data`` is not
+        ``None`` is used, falling back to ``self``'s. Parameters are new
+        ``Parameter`` nodes.
+        """
+        params, treedef = jtu.tree_flatten(self, is_leaf=is_leaf_param)
+        rest_params = [treedef.flatten_up_to(r) for r in rest]
+
+        def _combine(param, *rest_param):
+            for arg in rest_param:
                 if isinstance(arg, Parameter) and arg.data is not None:
-                    arg_copy.data = arg.data
-                    break
-            return arg_copy
-        return jtu.tree_map(_combine, self, *rest, is_leaf=is_leaf_param)
+                    return arg._replace_data(arg.data)
+            return param._replace_data(param.data)
+        return treedef.unflatten(list(map(_combine, params, *rest_params)))
 
     def __repr__(self) -> str:
         string = self.__class__.__name__ + "("
         for name, value in vars(self).items():
-            string += f"{name}={value}, "
+            if name not in _CACHE_FIELDS:
+                string += f"{name}={value}, "
         return string[:-2] + ")"
 
+    def __eq__(self, other: Any) -> bool:
+        """Structural equality. Modules are equal if they have the same
+        type, hyperparameters, and PyTree structure, and their parameters
+        hold identical (not just equal) arrays. Uninitialized modules with the
+        same configuration are therefore equal.
+        """
+        if self is other:
+            return True
+        if type(self) is not type(other):
+            return NotImplemented
+        leaves, treedef = jtu.tree_flatten(self)
+        other_leaves, other_treedef = jtu.tree_flatten(other)
+        return treedef == other_treedef and all(
+            a is b for a, b in zip(leaves, other_leaves)
+        )
+
+    def __hash__(self) -> int:
+        """Hash of the cached layout and hyperparameters of ``self`` and the
+        identities of its parameters' arrays, without flattening submodules.
+        Consistent with ``__eq__``.
+        """
+        fields = self.__dict__
+        layout = self._layout()
+        return hash((
+            type(self), layout, self._hyperparams(), fields["initialized"],
+            tuple(
+                id(fields[name].data) if isinstance(fields[name], Parameter)
+                and isinstance(fields[name].data, (Array, np.ndarray))
+                else None for name in layout.param_names
+            )
+        ))
+
+    def __setattr__(self, __name: str, __value: Any) -> None:
+        fields = self.__dict__
+        if __name != "initialized":
+            is_param = _is_param_field(__value)
+            if not is_param:
+                # Hyperparameter changed, invalidate cached hyperparameters
+                fields.pop("_module_hyperparams", None)
+            layout = fields.get("_module_layout")
+            if layout is not None and __name not in (
+                layout.param_names if is_param else layout.hyperparam_names
+            ):
+                # New field or field changed kind, invalidate cached layout
+                fields.pop("_module_layout")
+                fields.pop("_module_hyperparams", None)
+        super().__setattr__(__name, __value)
+
     def __delattr__(self, __name: str) -> None:
         if self.initialized is True:
             raise AttributeError("cannot delete attribute of an initialized module")
         else:
             super().__delattr__(__name)
+            self.__dict__.pop("_module_layout", None)
+            self.__dict__.pop("_module_hyperparams", None)
+
+def _map_hyperparams(tree, f):
+    # Copy of ``tree`` with ``f`` applied to the hyperparameters of all of its
+    # modules, recursing into lists, tuples, and dicts
+    def map_value(value):
+        if type(value) in (list, tuple):
+            return type(value)(map(map_value, value))
+        elif type(value) is dict:
+            return {k: map_value(v) for k, v in value.items()}
+        return f(value)
+
+    def map_module(module):
+        children, (layout, hyperparams, initialized) = (
+            module.tree_flatten_with_keys()
+        )
+        return type(module).tree_unflatten(
+            (
+                layout,
+                _Hyperparams(tuple(map(map_value, hyperparams.values))),
+                initialized
+            ),
+            [map_modules(child) for _, child in children]
+        )
+
+    def map_modules(tree):
+        return jtu.tree_map(
+            lambda node: map_module(node) if isinstance(node, Module) else node,
+            tree,
+            is_leaf=lambda node: isinstance(node, Module)
+        )
+
+    return map_modules(tree)
+
+def _lift_array_hyperparams(tree, arrays=()):
+    # Replace the array hyperparameters of ``tree`` with slots into
+    # ``arrays``, appending those not already in it
+    arrays = list(arrays)
+    indices = {id(a): i for i, a in enumerate(arrays)}
+    def lift(value):
+        if not isinstance(value, Array):
+            return value
+        index = indices.get(id(value))
+        if index is None:
+            index = indices[id(value)] = len(arrays)
+            arrays.append(value)
+        return _ArraySlot(index)
+    return _map_hyperparams(tree, lift), arrays
+
+def _restore_array_hyperparams(tree, arrays):
+    return _map_hyperparams(
+        tree,
+        lambda value: arrays[value.index] if isinstance(value, _ArraySlot)
+        else value
+    )
+
+# Initialization runs once, so limit backend optimizations to cut compile time
+@partial(
+    jax.jit,
+    static_argnums=(0, 2, 3, 4),
+    compiler_options={"xla_backend_optimization_level": 1}
+)
+def _jit_init(
+    module_treedef, module_leaves, x_treedef, x_leaves, mesh, rng, arrays
+):
+    # Parameters that are already initialized and array hyperparameters, such
+    # as PRNG keys, are traced rather than static, so they are neither baked
+    # into the program as constants nor part of the cache key. ``mesh`` is
+    # only part of the cache key, parameters are sharded on the mesh set by
+    # ``mlax.sharding.use_mesh`` as they are initialized
+    module = _restore_array_hyperparams(
+        module_treedef.unflatten(module_leaves), arrays
+    )
+    x = x_treedef.unflatten([lax.full(s.shape, 0, s.dtype) for s in x_leaves])
+    # Only array hyperparameters set by ``setup`` are returned, the others are
+    # restored from the arguments
+    module, new_arrays = _lift_array_hyperparams(
+        module(x, rng, True)[1], arrays
+    )
+    return module, new_arrays[len(arrays):]
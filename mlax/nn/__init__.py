@@ -2,9 +2,15 @@ from mlax.nn.linear import Linear
 from mlax.nn.bias import Bias
 from mlax.nn.scaler import Scaler
 from mlax.nn.conv import Conv
-from mlax.nn.z_norm import ZNorm
+from mlax.nn.z_norm import ZNorm, sync_z_norm
 from mlax.nn.f import F, FRng
 from mlax.nn.series import Series, SeriesRng
+from mlax.nn.stacked import Stacked, StackedRng
+from mlax.nn.remat import Remat, RematRng
 from mlax.nn.parallel import Parallel, ParallelRng
 from mlax.nn.embed import Embed
+from mlax.nn.hash_embed import HashEmbed
+from mlax.nn.pq_embed import PQEmbed
 from mlax.nn.recurrent import Recurrent, RecurrentRng
+from mlax.nn.quantized import QuantizedLinear, QuantizedConv, quantize
+from mlax.nn.fold import Folded, fold
@@ -0,0 +1,319 @@
+"""Alternative lowerings of ``lax.conv_general_dilated`` and an autotuner that
+picks the fastest one per input shape, cached on disk.
+"""
+import os
+import json
+from math import prod
+from timeit import default_timer
+import numpy as np
+import jax
+from jax import (
+    numpy as jnp,
+    lax
+)
+
+ALGORITHMS = (
+    "direct", "channel_last", "channel_first", "im2col", "fft", "matmul"
+)
+
+# Number of inputs of the traced shape the candidates are benchmarked on
+TUNE_BATCH_SIZE = 32
+TUNE_N_REPEATS = 5
+# Candidates are timed on their own, where the direct lowering cannot fuse with
+# neighboring operations and the others' layout changes look free, so they
+# must win by a wide margin to pay off in a model
+TUNE_MIN_SPEEDUP = 0.25
+
+_caches = {}
+
+def _cache_path():
+    return os.environ.get(
+        "MLAX_CONV_AUTOTUNE_CACHE",
+        os.path.join(
+            os.path.expanduser("~"), ".cache", "mlax", "conv_autotune.json"
+        )
+    )
+
+def _load_cache(path):
+    if path not in _caches:
+        try:
+            with open(path) as f:
+                _caches[path] = json.load(f)
+        except (OSError, ValueError):
+            _caches[path] = {}
+    return _caches[path]
+
+def _store(path, key, entry):
+    cache = _load_cache(path)
+    cache[key] = entry
+    # Merge with entries written by other processes, then replace atomically
+    try:
+        with open(path) as f:
+            cache = {**json.load(f), **cache}
+    except (OSError, ValueError):
+        pass
+    _caches[path] = cache
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(cache, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def _explicit_padding(x_spatial_shape, kernel_spatial_shape, strides, padding):
+    if isinstance(padding, str):
+        return tuple(
+            tuple(pair) for pair in lax.padtype_to_pads(
+                x_spatial_shape, kernel_spatial_shape, strides, padding
+            )
+        )
+    return padding
+
+def _is_one(dilation):
+    return dilation is None or all(d == 1 for d in dilation)
+
+def _channel_first_perms(dimension_numbers):
+    lhs_spec, rhs_spec, out_spec = dimension_numbers
+    return lhs_spec, rhs_spec, tuple(np.argsort(out_spec))
+
+def _channel_last_perms(dimension_numbers):
+    lhs_spec, rhs_spec, out_spec = dimension_numbers
+    return (
+        (lhs_spec[0], *lhs_spec[2:], lhs_spec[1]),
+        (rhs_spec[0], *rhs_spec[2:], rhs_spec[1]),
+        tuple(np.argsort((out_spec[0], *out_spec[2:], out_spec[1])))
+    )
+
+def _spatial_chars(n_spatial_dims):
+    return "".join(chr(97 + i) for i in range(n_spatial_dims))
+
+def applicable(
+    algorithm, x_shape, kernel_shape, dtype, strides, padding,
+    input_dilation, filter_dilation, dimension_numbers, feature_group_count,
+    batch_group_count
+):
+    """Whether ``algorithm`` can lower a convolution. ``x_shape`` includes the
+    batch axis.
+    """
+    if algorithm in ("direct", "channel_last", "channel_first"):
+        return True
+    if feature_group_count != 1 or batch_group_count != 1:
+        return False
+    lhs_spec, rhs_spec, _ = dimension_numbers
+    x_spatial_shape = [x_shape[i] for i in lhs_spec[2:]]
+    kernel_spatial_shape = [kernel_shape[i] for i in rhs_spec[2:]]
+    if algorithm == "im2col":
+        # Patches are prod(filter_shape) times the size of the input
+        return prod(kernel_spatial_shape) <= 9
+    if algorithm == "fft":
+        return (
+            _is_one(input_dilation) and _is_one(filter_dilation) and
+            jnp.dtype(dtype) in (jnp.float32, jnp.float64) and
+            # Only pays off for large filters
+            prod(kernel_spatial_shape) >= 9
+        )
+    if algorithm == "matmul":
+        return (
+            all(k == 1 for k in kernel_spatial_shape) and
+            _is_one(input_dilation) and
+            all(
+                pair == (0, 0) for pair in _explicit_padding(
+                    x_spatial_shape, kernel_spatial_shape, strides, padding
+                )
+            )
+        )
+    return False
+
+def lower_conv(
+    algorithm, x, kernel, strides, padding, input_dilation, filter_dilation,
+    dimension_numbers, feature_group_count, batch_group_count, precision,
+    accum_dtype
+):
+    """Apply ``lax.conv_general_dilated`` with ``algorithm``. Arguments are as
+    in ``lax.conv_general_dilated``. The output has the layout of
+    ``dimension_numbers``.
+    """
+    n_spatial_dims = x.ndim - 2
+    chars = _spatial_chars(n_spatial_dims)
+    if algorithm == "direct":
+        return lax.conv_general_dilated(
+            x, kernel, strides, padding, input_dilation, filter_dilation,
+            dimension_numbers, feature_group_count, batch_group_count,
+            precision, accum_dtype
+        )
+    elif algorithm == "channel_first":
+        x_perm, kernel_perm, out_perm = _channel_first_perms(dimension_numbers)
+        y = lax.conv_general_dilated(
+            lax.transpose(x, x_perm), lax.transpose(kernel, kernel_perm),
+            strides, padding, input_dilation, filter_dilation,
+            ("NC" + chars, "OI" + chars, "NC" + chars),
+            feature_group_count, batch_group_count, precision, accum_dtype
+        )
+        return lax.transpose(y, out_perm)
+
+    x_perm, kernel_perm, out_perm = _channel_last_perms(dimension_numbers)
+    x = lax.transpose(x, x_perm)
+    # (out_channels, *filter_shape, in_channels)
+    kernel = lax.transpose(kernel, kernel_perm)
+    if algorithm == "channel_last":
+        y = lax.conv_general_dilated(
+            x, kernel, strides, padding, input_dilation, filter_dilation,
+            ("N" + chars + "C", "O" + chars + "I", "N" + chars + "C"),
+            feature_group_count, batch_group_count, precision, accum_dtype
+        )
+    elif algorithm == "im2col":
+        # Patches of (batch, *out_spatial, in_channels * prod(filter_shape)),
+        # with the input channel as the major axis of the last dimension.
+        # Extraction convolves with one-hot filters, so keep it exact.
+        patches = lax.conv_general_dilated_patches(
+            x, kernel.shape[1:-1], strides, padding, input_dilation,
+            filter_dilation,
+            ("N" + chars + "C", "OI" + chars, "N" + chars + "C"),
+            lax.Precision.HIGHEST
+        )
+        kernel = lax.reshape(
+            lax.transpose(
+                kernel, (0, kernel.ndim - 1, *range(1, kernel.ndim - 1))
+            ),
+            (kernel.shape[0], prod(kernel.shape[1:]))
+        )
+        y = lax.dot_general(
+            patches, kernel, (((patches.ndim - 1,), (1,)), ((), ())),
+            precision, accum_dtype
+        )
+    elif algorithm == "matmul":
+        x = lax.slice(
+            x, (0,) * x.ndim, x.shape, (1, *strides, 1)
+        )
+        y = lax.dot_general(
+            x, lax.reshape(kernel, (kernel.shape[0], kernel.shape[-1])),
+            (((x.ndim - 1,), (1,)), ((), ())),
+            precision, accum_dtype
+        )
+    elif algorithm == "fft":
+        spatial_axes = tuple(range(1, n_spatial_dims + 1))
+        filter_shape = kernel.shape[1:-1]
+        pads = _explicit_padding(
+            x.shape[1:-1], filter_shape, strides, padding
+        )
+        x = lax.pad(
+            x, jnp.zeros((), x.dtype),
+            ((0, 0, 0), *((lo, hi, 0) for lo, hi in pads), (0, 0, 0))
+        )
+        size = x.shape[1:-1]
+        # Cross-correlation is the convolution with the flipped filter. The
+        # circular convolution is exact past the first filter_shape - 1
+        # outputs along each axis.
+        x_f = jnp.fft.rfftn(x, size, spatial_axes)
+        kernel_f = jnp.fft.rfftn(
+            jnp.flip(kernel, spatial_axes), size, spatial_axes
+        )
+        y = jnp.fft.irfftn(
+            jnp.einsum("n...i,o...i->n...o", x_f, kernel_f), size,
+            spatial_axes
+        )
+        y = lax.slice(
+            y,
+            (0, *(k - 1 for k in filter_shape), 0),
+            y.shape,
+            (1, *strides, 1)
+        )
+        y = lax.convert_element_type(
+            y, x.dtype if accum_dtype is None else accum_dtype
+        )
+    else:
+        raise ValueError(f"Unknown convolution algorithm {algorithm}.")
+    return lax.transpose(y, out_perm)
+
+def _cache_key(
+    x_shape, kernel_shape, dtype, strides, padding, input_dilation,
+    filter_dilation, dimension_numbers, feature_group_count,
+    batch_group_count, precision, accum_dtype
+):
+    device = jax.devices()[0]
+    return repr((
+        jax.default_backend(), device.device_kind, jnp.dtype(dtype).name,
+        tuple(x_shape), tuple(kernel_shape), strides, padding,
+        input_dilation, filter_dilation,
+        tuple(tuple(int(i) for i in spec) for spec in dimension_numbers),
+        feature_group_count, batch_group_count, str(precision),
+        None if accum_dtype is None else jnp.dtype(accum_dtype).name,
+        TUNE_BATCH_SIZE
+    ))
+
+def _time(fn, *args):
+    jax.block_until_ready(fn(*args))
+    best = float("inf")
+    for _ in range(TUNE_N_REPEATS):
+        start = default_timer()
+        jax.block_until_ready(fn(*args))
+        best = min(best, default_timer() - start)
+    return best
+
+def _select(times):
+    algorithm = min(times, key=times.get)
+    if times[algorithm] > (1.0 - TUNE_MIN_SPEEDUP) * times["direct"]:
+        return "direct"
+    return algorithm
+
+def autotune(
+    x_shape, kernel_shape, dtype, strides, padding, input_dilation,
+    filter_dilation, dimension_numbers, feature_group_count,
+    batch_group_count, precision, accum_dtype
+):
+    """Fastest applicable algorithm for a convolution of a batch of
+    ``TUNE_BATCH_SIZE`` inputs of ``x_shape``, which includes a batch axis of
+    size 1. The result is cached in memory and in the JSON file at the
+    ``MLAX_CONV_AUTOTUNE_CACHE`` environment variable, by default
+    ``~/.cache/mlax/conv_autotune.json``. Algorithms other than "direct"
+    are only picked if they are faster by at least ``TUNE_MIN_SPEEDUP``. Can
+    be called while tracing.
+    """
+    config = (
+        strides, padding, input_dilation, filter_dilation, dimension_numbers,
+        feature_group_count, batch_group_count
+    )
+    key = _cache_key(
+        x_shape, kernel_shape, dtype, *config, precision, accum_dtype
+    )
+    path = _cache_path()
+    entry = _load_cache(path).get(key)
+    if entry is not None:
+        # Select from the cached times, so entries follow the current margin
+        return _select(entry["times"])
+
+    with jax.ensure_compile_time_eval():
+        rng = np.random.default_rng(0)
+        x = jnp.asarray(
+            rng.standard_normal((TUNE_BATCH_SIZE, *x_shape)), dtype
+        )
+        kernel = jnp.asarray(rng.standard_normal(kernel_shape), dtype)
+
+        def apply(algorithm):
+            return jax.jit(jax.vmap(
+                lambda x, kernel: lower_conv(
+                    algorithm, x, kernel, *config, precision, accum_dtype
+                ),
+                in_axes=(0, None)
+            ))
+
+        expected = np.asarray(apply("direct")(x, kernel), np.float64)
+        threshold = (1e-3 if jnp.dtype(dtype).itemsize >= 4 else 5e-2) * (
+            max(1.0, float(np.max(np.abs(expected))))
+        )
+        times = {}
+        for algorithm in ALGORITHMS:
+            if not applicable(
+                algorithm, x_shape, kernel_shape, dtype, *config
+            ):
+                continue
+            fn = apply(algorithm)
+            y = np.asarray(fn(x, kernel), np.float64)
+            if y.shape != expected.shape or not (
+                np.max(np.abs(y - expected)) <= threshold
+            ):
+                continue
+            times[algorithm] = _time(fn, x, kernel)
+
+    algorithm = _select(times)
+    _store(path, key, {"algorithm": algorithm, "times": times})
+    return algorithm
@@ -8,6 +8,8 @@ from jax import (
     dtypes
 )
 from mlax import Parameter, Module
+from mlax.sharding import sharding_metadata, constrain_param_data
+from mlax.precision import policy_accum_dtype
 from mlax._utils import (
     _canon_int_sequence,
     _canon_opt_int_sequence,
@@ -15,6 +17,7 @@ from mlax._utils import (
     _canon_opt_dtype,
     _canon_precision_pair
 )
+from mlax.nn._conv_autotune import ALGORITHMS, applicable, lower_conv, autotune
 
 class Conv(Module):
     """Convolution transformation layer."""
@@ -33,7 +36,9 @@ class Conv(Module):
         precision=None,
         accum_dtype=None,
         kernel_initializer=nn.initializers.lecun_normal(),
-        dtype=jnp.float32
+        dtype=jnp.float32,
+        kernel_sharding=None,
+        algorithm: str="direct"
     ):
         """Initialize a Conv layer.
 
@@ -78,8 +83,23 @@ class Conv(Module):
             defined by ``jax.nn.initalizers <https://jax.readthedocs.io/en/latest/jax.nn.initializers.html>``.
             Default:: He normal.
         :param dtype: Type of initialized parameters. Default: float32.
+        :param kernel_sharding: Sequence of mesh axis names, tuples of mesh axis
+            names, or None for each axis of the kernel as stored, as in
+            ``jax.sharding.PartitionSpec``, on the mesh set by
+            ``mlax.sharding.use_mesh``. Default: None, no sharding annotation.
+        :param algorithm: How to lower the convolution. "direct" calls
+            `jax.lax.conv_general_dilated`_ with ``data_format``.
+            "channel_last" and "channel_first" transpose to that layout
+            around the call. "im2col" extracts patches and applies a
+            ``dot_general``. "fft" multiplies in the frequency domain, for
+            large filters. "matmul" applies 1x1 convolutions as a
+            ``dot_general``. "autotune" benchmarks the applicable algorithms
+            once per input shape, dtype, and backend when traced, caches the
+            fastest on disk, and uses it. Default: "direct".
         """
         super().__init__()
+        if algorithm not in (*ALGORITHMS, "autotune"):
+            raise ValueError(f"Unknown convolution algorithm {algorithm}.")
 
         self.rng = rng
         self.out_channels = int(out_channels)
@@ -98,8 +118,11 @@ class Conv(Module):
         self.accum_dtype = _canon_opt_dtype(accum_dtype)
         self.kernel_initializer = kernel_initializer
         self.dtype = dtypes.canonicalize_dtype(dtype)
+        self.algorithm = str(algorithm)
 
-        self.conv_kernel = Parameter(trainable=True)
+        self.conv_kernel = Parameter(
+            trainable=True, metadata=sharding_metadata(kernel_sharding)
+        )
         self.dimension_numbers = None
 
     def setup(self, x: Array) -> None:
@@ -171,6 +194,10 @@ class Conv(Module):
                 kernel_spec = "OI" + chars # OIab...
                 o_spec = i_spec
 
+        self.conv_kernel.data = constrain_param_data(
+            self.conv_kernel, self.conv_kernel.data
+        )
+
         i_spec = "N" + i_spec
         o_spec = "N" + o_spec
         self.dimension_numbers = lax.conv_dimension_numbers(
@@ -187,17 +214,41 @@ class Conv(Module):
     ) -> Array:
         n_spatial_dims = x.ndim - 1
         x = lax.broadcast(x, (1,))
-        x = lax.conv_general_dilated(
-            x,
-            lax.convert_element_type(self.conv_kernel.data, x.dtype),
+        config = (
             _canon_int_sequence(self.strides, n_spatial_dims),
             _canon_padding(self.padding, n_spatial_dims),
             _canon_opt_int_sequence(self.input_dilation, n_spatial_dims),
             _canon_opt_int_sequence(self.filter_dilation, n_spatial_dims),
             self.dimension_numbers,
             self.feature_group_count,
-            self.batch_group_count,
+            self.batch_group_count
+        )
+        # Without an own accumulation dtype, accumulate in the policy's, but
+        # keep the output in the input's dtype
+        accum_dtype = self.accum_dtype
+        if accum_dtype is None:
+            accum_dtype = policy_accum_dtype(x.dtype)
+        algorithm = self.algorithm
+        if algorithm == "autotune":
+            algorithm = autotune(
+                x.shape, self.conv_kernel.data.shape, x.dtype, *config,
+                self.precision, accum_dtype
+            )
+        elif not applicable(
+            algorithm, x.shape, self.conv_kernel.data.shape, x.dtype, *config
+        ):
+            raise ValueError(
+                f"Convolution algorithm {algorithm} does not apply to inputs "
+                f"of shape {x.shape[1:]} and dtype {x.dtype}."
+            )
+        y = lower_conv(
+            algorithm,
+            x,
+            lax.convert_element_type(self.conv_kernel.data, x.dtype),
+            *config,
             self.precision,
-            self.accum_dtype
+            accum_dtype
         )
-        return lax.squeeze(x, (0,))
+        if self.accum_dtype is None:
+            y = lax.convert_element_type(y, x.dtype)
+        return lax.squeeze(y, (0,))
@@ -1,5 +1,6 @@
 from typing import Tuple, Union, Hashable
 from mlax import Parameter, Module
+from mlax.sharding import sharding_metadata, constrain_param_data
 from jax import (
     Array,
     numpy as jnp,
@@ -15,7 +16,8 @@ class Embed(Module):
         vocab_size: int,
         embed_dim: int,
         embed_initializer=nn.initializers.lecun_normal(in_axis=-1),
-        dtype=jnp.float32
+        dtype=jnp.float32,
+        embed_sharding=None
     ):
         """Initialize an embedding layer.
  
@@ -27,6 +29,10 @@ class Embed(Module):
             `jax.nn.initalizers <https://jax.readthedocs.io/en/latest/jax.nn.initializers.html>`_.
             Default: He normal.
         :param dtype: Type of initialized parameters. Default: float32.
+        :param embed_sharding: Sequence of mesh axis names, tuples of mesh axis
+            names, or None for each axis of the embedding weight, as in
+            ``jax.sharding.PartitionSpec``, on the mesh set by
+            ``mlax.sharding.use_mesh``. Default: None, no sharding annotation.
         """
         super().__init__()
 
@@ -36,11 +42,16 @@ class Embed(Module):
         self.embed_initializer = embed_initializer
         self.dtype = dtypes.canonicalize_dtype(dtype)
 
-        self.embed_kernel = Parameter(trainable=True)
+        self.embed_kernel = Parameter(
+            trainable=True, metadata=sharding_metadata(embed_sharding)
+        )
 
     def setup(self, x: Array) -> None:
-        self.embed_kernel.data=self.embed_initializer(
-            self.rng, (self.vocab_size, self.embed_dim), self.dtype
+        self.embed_kernel.data = constrain_param_data(
+            self.embed_kernel,
+            self.embed_initializer(
+                self.rng, (self.vocab_size, self.embed_dim), self.dtype
+            )
         )
 
     def forward(
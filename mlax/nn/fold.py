@@ -0,0 +1,177 @@
+from typing import Any, Tuple, Union, Hashable
+from jax import (
+    Array,
+    numpy as jnp,
+    lax,
+    tree_util as jtu
+)
+from mlax import Parameter, Module
+from mlax.nn.linear import Linear
+from mlax.nn.conv import Conv
+from mlax.nn.z_norm import ZNorm
+from mlax.nn.scaler import Scaler
+from mlax.nn.bias import Bias
+from mlax.nn.series import Series
+from mlax.nn.stacked import Stacked, StackedRng
+
+class Folded(Module):
+    """``Linear`` or ``Conv`` layer followed by a per-channel bias, produced by
+    ``fold``. For inference only.
+    """
+    def __init__(self, layer: Module, bias: Array, axis: int):
+        """Initialize a folded layer.
+
+        :param layer: Initialized ``Linear`` or ``Conv`` layer.
+        :param bias: Bias of shape ``(n_channels,)``.
+        :param axis: Channel axis of ``layer``'s outputs. Negative axes count
+            from the end.
+        """
+        super().__init__()
+        self.layer = layer
+        self.axis = int(axis)
+        self.folded_bias = Parameter(trainable=False, data=bias)
+        self.initialized = True
+
+    def setup(self, x: Array) -> None:
+        pass
+
+    def forward(
+        self,
+        x: Array,
+        rng: None=None,
+        inference_mode: bool=False,
+        batch_axis_name: Union[Hashable, Tuple[Hashable]]=()
+    ) -> Array:
+        x, self.layer = self.layer(x, None, inference_mode, batch_axis_name)
+        return lax.add(
+            x,
+            lax.broadcast_in_dim(
+                lax.convert_element_type(self.folded_bias.data, x.dtype),
+                x.shape,
+                (self.axis % x.ndim,)
+            )
+        )
+
+def _channel_axis(layer):
+    # Channel axis of the outputs, counted from the start and from the end
+    if isinstance(layer, Linear):
+        return None, -1, layer.out_features
+    out_spec = layer.dimension_numbers.out_spec
+    axis, ndim = out_spec[1] - 1, len(out_spec) - 1
+    return axis, axis - ndim, layer.out_channels
+
+def _per_channel(kernel, in_features, channel_axis, n_channels):
+    axes = [i for i, n in enumerate(in_features) if n != 0]
+    if len(axes) == 0:
+        return lax.broadcast(kernel, (n_channels,))
+    if len(axes) == 1 and kernel.size in (1, n_channels) and (
+        axes[0] == channel_axis[0] or
+        axes[0] - len(in_features) == channel_axis[1]
+    ):
+        return jnp.broadcast_to(jnp.reshape(kernel, (-1,)), (n_channels,))
+    return None
+
+def _affine(layer, channel_axis, n_channels):
+    # Per-channel scale and shift equivalent to ``layer`` in inference mode
+    if isinstance(layer, ZNorm):
+        if (layer.axis == "channel_last" and channel_axis[1] == -1) or (
+            layer.axis == "channel_first" and channel_axis[0] == 0
+        ):
+            scale = lax.rsqrt(lax.add(
+                layer.moving_var.data,
+                lax.convert_element_type(
+                    layer.epsilon, layer.moving_var.data.dtype
+                )
+            ))
+            return scale, lax.neg(lax.mul(layer.moving_mean.data, scale))
+    elif isinstance(layer, Scaler):
+        scale = _per_channel(
+            layer.scaler_kernel.data, layer.in_features, channel_axis,
+            n_channels
+        )
+        if scale is not None:
+            return scale, jnp.zeros_like(scale)
+    elif isinstance(layer, Bias):
+        shift = _per_channel(
+            layer.bias_kernel.data, layer.in_features, channel_axis,
+            n_channels
+        )
+        if shift is not None:
+            return jnp.ones_like(shift), shift
+    return None
+
+def _scale_kernel(layer, scale):
+    layer = jtu.tree_map(lambda leaf: leaf, layer)
+    if isinstance(layer, Linear):
+        kernel = layer.linear_kernel.data
+        out_axis = 0 if layer.transposed_kernel else 1
+    else:
+        kernel = layer.conv_kernel.data
+        out_axis = layer.dimension_numbers.rhs_spec[0]
+    kernel = lax.mul(
+        kernel,
+        lax.broadcast_in_dim(
+            lax.convert_element_type(scale, kernel.dtype),
+            kernel.shape, (out_axis,)
+        )
+    )
+    if isinstance(layer, Linear):
+        layer.linear_kernel.data = kernel
+    else:
+        layer.conv_kernel.data = kernel
+    return layer
+
+def _fold_layers(layers):
+    folded = []
+    i = 0
+    while i < len(layers):
+        layer = layers[i]
+        i += 1
+        if not isinstance(layer, (Linear, Conv)):
+            folded.append(layer)
+            continue
+        *channel_axis, n_channels = _channel_axis(layer)
+        dtype = (
+            layer.linear_kernel.data if isinstance(layer, Linear)
+            else layer.conv_kernel.data
+        ).dtype
+        scale = jnp.ones((n_channels,), dtype)
+        shift = jnp.zeros((n_channels,), dtype)
+        start = i
+        while i < len(layers):
+            affine = _affine(layers[i], channel_axis, n_channels)
+            if affine is None:
+                break
+            a, b = (lax.convert_element_type(t, dtype) for t in affine)
+            scale, shift = lax.mul(a, scale), lax.add(lax.mul(a, shift), b)
+            i += 1
+        if i == start:
+            folded.append(layer)
+        else:
+            folded.append(
+                Folded(_scale_kernel(layer, scale), shift, channel_axis[1])
+            )
+    return folded
+
+def fold(module: Any) -> Any:
+    """Fold the ``ZNorm``, ``Scaler``, and ``Bias`` layers that follow a
+    ``Linear`` or ``Conv`` layer in a ``Series`` into its kernel and a single
+    per-channel bias. ``ZNorm`` layers are folded with their running
+    statistics, so the result is for inference only. Layers that do not act
+    per output channel, and ``Stacked`` layers, are left as is.
+
+    :param module: Initialized module.
+
+    :returns: ``module`` with folded layers.
+    """
+    def _fold(node):
+        if isinstance(node, Series):
+            node = jtu.tree_map(lambda leaf: leaf, node)
+            node.layers.data = _fold_layers(
+                [fold(layer) for layer in node.layers.data]
+            )
+        return node
+    return jtu.tree_map(
+        _fold, module,
+        is_leaf=lambda node: isinstance(node, (Series, Stacked, StackedRng))
+    )
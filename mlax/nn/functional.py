@@ -324,9 +324,12 @@ def z_norm(
     x: Array,
     axis: Union[str, int, Sequence[int]],
     batch_axis_name: Union[Hashable, Tuple[Hashable]]=(),
-    epsilon: float=1e-05
+    epsilon: float=1e-05,
+    scale: Optional[Array]=None,
+    shift: Optional[Array]=None
 ):
-    """Apply Z-score normalization.
+    """Apply Z-score normalization, optionally followed by an affine
+    transformation fused into the same pass.
 
     :param axis: "all", "channel_last", "channel_first", axis, or sequence of
         axes to normalize input features along. "all" indicates normalization
@@ -338,6 +341,10 @@ def z_norm(
     :param batch_axis_name: Hashable or tuple of hashable representing
         the batch axis name(s) to normalize along in addition to those in
         ``axis``. Default: (), no normlization along any batch axis.
+    :param scale: Optional array broadcastable to ``x``'s trailing axes to
+        multiply the normalized features by. Default: None, no scaling.
+    :param shift: Optional array broadcastable to ``x``'s trailing axes to add
+        to the normalized features. Default: None, no shifting.
 
     :returns: ``x`` with normalization applied.
     """
@@ -348,4 +355,4 @@ def z_norm(
     elif axis == "channel_first":
         axis = list(range(1, x.ndim))
     mean, variance = _compute_std_stats(x, axis, batch_axis_name)
-    return _standardize(x, axis, mean, variance, epsilon)
+    return _standardize(x, axis, mean, variance, epsilon, scale, shift)
@@ -0,0 +1,109 @@
+from typing import Tuple, Union, Hashable
+from mlax import Parameter, Module
+from mlax.sharding import sharding_metadata, constrain_param_data
+from jax import (
+    Array,
+    numpy as jnp,
+    nn,
+    lax,
+    random,
+    dtypes
+)
+
+def _mix(h):
+    # MurmurHash3 32-bit finalizer
+    h = lax.bitwise_xor(h, lax.shift_right_logical(h, jnp.uint32(16)))
+    h = lax.mul(h, jnp.uint32(0x85ebca6b))
+    h = lax.bitwise_xor(h, lax.shift_right_logical(h, jnp.uint32(13)))
+    h = lax.mul(h, jnp.uint32(0xc2b2ae35))
+    return lax.bitwise_xor(h, lax.shift_right_logical(h, jnp.uint32(16)))
+
+class HashEmbed(Module):
+    """Embedding layer with a table of hashed buckets. Each id is hashed by
+    ``n_hashes`` hash functions and its embedding is the sum of the selected
+    buckets, so distinct ids rarely share all buckets.
+    """
+    def __init__(
+        self,
+        rng: Array,
+        n_buckets: int,
+        embed_dim: int,
+        n_hashes: int=2,
+        embed_initializer=nn.initializers.lecun_normal(in_axis=-1),
+        dtype=jnp.float32,
+        embed_sharding=None
+    ):
+        """Initialize a hashed embedding layer.
+
+        :param rng: PRNG key.
+        :param n_buckets: Number of buckets, i.e. rows of the embedding weight.
+        :param embed_dim: Size of each embedding.
+        :param n_hashes: Number of hash functions. Default: 2.
+        :param embed_initializer: Initializer for embedding weight of shape
+            ``(n_buckets, embed_dim)`` as defined by
+            `jax.nn.initalizers <https://jax.readthedocs.io/en/latest/jax.nn.initializers.html>`_.
+            Default: He normal.
+        :param dtype: Type of initialized parameters. Default: float32.
+        :param embed_sharding: Sequence of mesh axis names, tuples of mesh axis
+            names, or None for each axis of the embedding weight, as in
+            ``jax.sharding.PartitionSpec``, on the mesh set by
+            ``mlax.sharding.use_mesh``. Default: None, no sharding annotation.
+        """
+        super().__init__()
+
+        self.rng = rng
+        self.n_buckets = int(n_buckets)
+        self.embed_dim = int(embed_dim)
+        self.n_hashes = int(n_hashes)
+        self.embed_initializer = embed_initializer
+        self.dtype = dtypes.canonicalize_dtype(dtype)
+
+        self.embed_kernel = Parameter(
+            trainable=True, metadata=sharding_metadata(embed_sharding)
+        )
+        self.hash_seeds = Parameter(trainable=False)
+
+    def setup(self, x: Array) -> None:
+        rng1, rng2 = random.split(self.rng)
+        self.embed_kernel.data = constrain_param_data(
+            self.embed_kernel,
+            self.embed_initializer(
+                rng1, (self.n_buckets, self.embed_dim), self.dtype
+            )
+        )
+        self.hash_seeds.data = random.bits(rng2, (self.n_hashes,), jnp.uint32)
+
+    def buckets(self, x: Array) -> Array:
+        """Buckets of ids.
+
+        :param x: Integer ids.
+
+        :returns: Bucket indices of shape ``(*x.shape, n_hashes)``.
+        """
+        h = lax.bitwise_xor(
+            lax.broadcast_in_dim(
+                lax.convert_element_type(x, jnp.uint32),
+                (*x.shape, self.n_hashes),
+                tuple(range(x.ndim))
+            ),
+            lax.broadcast_in_dim(
+                self.hash_seeds.data, (*x.shape, self.n_hashes), (x.ndim,)
+            )
+        )
+        return lax.convert_element_type(
+            lax.rem(_mix(h), jnp.uint32(self.n_buckets)), jnp.int32
+        )
+
+    def forward(
+        self,
+        x: Array,
+        rng: None=None,
+        inference_mode: bool=False,
+        batch_axis_name: Union[Hashable, Tuple[Hashable]]=()
+    ) -> Array:
+        return jnp.sum(
+            self.embed_kernel.data.at[self.buckets(x)].get(
+                mode="promise_in_bounds"
+            ),
+            axis=-2
+        )
@@ -7,6 +7,8 @@ from jax import (
     dtypes
 )
 from mlax import Parameter, Module
+from mlax.sharding import sharding_metadata, constrain_param_data
+from mlax.precision import policy_accum_dtype
 from mlax._utils import (
     _canon_opt_dtype,
     _canon_precision_pair
@@ -22,7 +24,8 @@ class Linear(Module):
         accum_dtype=None,
         transposed_kernel: bool=False,
         kernel_initializer=nn.initializers.lecun_normal(),
-        dtype=jnp.float32
+        dtype=jnp.float32,
+        kernel_sharding=None
     ):
         """Initialize a linear layer.
 
@@ -42,6 +45,10 @@ class Linear(Module):
             `jax.nn.initalizers <https://jax.readthedocs.io/en/latest/jax.nn.initializers.html>`_.
             Default: He normal.
         :param dtype: Type of initialized parameters. Default: float32.
+        :param kernel_sharding: Sequence of mesh axis names, tuples of mesh axis
+            names, or None for each axis of the kernel as stored, as in
+            ``jax.sharding.PartitionSpec``, on the mesh set by
+            ``mlax.sharding.use_mesh``. Default: None, no sharding annotation.
         """
         super().__init__()
 
@@ -53,7 +60,9 @@ class Linear(Module):
         self.transposed_kernel = transposed_kernel
         self.dtype = dtypes.canonicalize_dtype(dtype)
 
-        self.linear_kernel = Parameter(trainable=True)
+        self.linear_kernel = Parameter(
+            trainable=True, metadata=sharding_metadata(kernel_sharding)
+        )
 
     def setup(self, x: Array) -> None:
         self.linear_kernel.data = self.kernel_initializer(
@@ -63,6 +72,9 @@ class Linear(Module):
             self.linear_kernel.data = lax.transpose(
                 self.linear_kernel.data, (1, 0)
             )
+        self.linear_kernel.data = constrain_param_data(
+            self.linear_kernel, self.linear_kernel.data
+        )
 
     def forward(
         self,
@@ -72,10 +84,18 @@ class Linear(Module):
         batch_axis_name: Union[Hashable, Tuple[Hashable]]=()
     ) -> Array:
         contracting_dims = (1,) if self.transposed_kernel else (0,)
-        return lax.dot_general(
+        # Without an own accumulation dtype, accumulate in the policy's, but
+        # keep the output in the input's dtype
+        accum_dtype = self.accum_dtype
+        if accum_dtype is None:
+            accum_dtype = policy_accum_dtype(x.dtype)
+        y = lax.dot_general(
             x,
             lax.convert_element_type(self.linear_kernel.data, x.dtype),
             (((x.ndim - 1,), contracting_dims), ((), ())),
             self.precision,
-            self.accum_dtype
+            accum_dtype
         )
+        if self.accum_dtype is None:
+            y = lax.convert_element_type(y, x.dtype)
+        return y
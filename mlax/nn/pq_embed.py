@@ -0,0 +1,226 @@
+from functools import partial
+from typing import Tuple, Union, Hashable
+from mlax import Parameter, Module
+from mlax.sharding import sharding_metadata, constrain_param_data
+from jax import (
+    Array,
+    numpy as jnp,
+    nn,
+    lax,
+    random,
+    dtypes,
+    ops
+)
+
+# Number of points whose distances to the centroids are computed at once
+KMEANS_CHUNK_SIZE = 4096
+
+def _kmeans(points, n_centroids, n_iters, rng):
+    # Lloyd's algorithm on points of shape (n_points, dim), over chunks of
+    # points, so memory does not grow with n_points * n_centroids
+    n_points, dim = points.shape
+    centroids = points[
+        random.choice(rng, n_points, (n_centroids,), replace=False)
+    ]
+    chunk_size = min(KMEANS_CHUNK_SIZE, n_points)
+    n_chunks = -(-n_points // chunk_size)
+    chunks = jnp.reshape(
+        jnp.pad(points, ((0, n_chunks * chunk_size - n_points), (0, 0))),
+        (n_chunks, chunk_size, dim)
+    )
+    # Padding points are assigned to an extra, discarded centroid
+    valid = jnp.reshape(
+        jnp.arange(n_chunks * chunk_size) < n_points, (n_chunks, chunk_size)
+    )
+    accum_dtype = dtypes.result_type(points.dtype, jnp.float32)
+
+    def assign(centroids, chunk, valid):
+        distances = (
+            jnp.sum(centroids ** 2, -1) - 2 * chunk @ centroids.T
+        )
+        return jnp.where(valid, jnp.argmin(distances, -1), n_centroids)
+
+    def accumulate(centroids, carry, chunk_and_valid):
+        sums, counts = carry
+        chunk, valid = chunk_and_valid
+        codes = assign(centroids, chunk, valid)
+        sums = sums + ops.segment_sum(
+            chunk.astype(accum_dtype), codes, n_centroids + 1
+        )
+        counts = counts + ops.segment_sum(
+            jnp.ones(chunk_size, accum_dtype), codes, n_centroids + 1
+        )
+        return (sums, counts), None
+
+    def body(_, centroids):
+        (sums, counts), _ = lax.scan(
+            partial(accumulate, centroids),
+            (
+                jnp.zeros((n_centroids + 1, dim), accum_dtype),
+                jnp.zeros(n_centroids + 1, accum_dtype)
+            ),
+            (chunks, valid)
+        )
+        sums, counts = sums[:n_centroids], counts[:n_centroids, None]
+        return jnp.where(
+            counts > 0,
+            (sums / jnp.maximum(counts, 1)).astype(centroids.dtype),
+            centroids
+        )
+
+    centroids = lax.fori_loop(0, n_iters, body, centroids)
+    codes = lax.map(
+        lambda chunk_and_valid: assign(centroids, *chunk_and_valid),
+        (chunks, valid)
+    )
+    return jnp.reshape(codes, -1)[:n_points], centroids
+
+class PQEmbed(Module):
+    """Product-quantized embedding layer. Embeddings are split into
+    ``n_subspaces`` subvectors, each stored as a code into a per-subspace
+    codebook of ``n_centroids`` centroids.
+    """
+    def __init__(
+        self,
+        rng: Array,
+        vocab_size: int,
+        embed_dim: int,
+        n_subspaces: int,
+        n_centroids: int=256,
+        embed_initializer=nn.initializers.lecun_normal(in_axis=-1),
+        dtype=jnp.float32,
+        codebook_sharding=None
+    ):
+        """Initialize a product-quantized embedding layer.
+
+        :param rng: PRNG key.
+        :param vocab_size: Size of the vocabulary to embed.
+        :param embed_dim: Size of each embedding. Must be divisible by
+            ``n_subspaces``.
+        :param n_subspaces: Number of subvectors per embedding.
+        :param n_centroids: Number of centroids per subspace. Codes are stored
+            as uint8 if at most 256, else as uint16 if at most 65536.
+            Default: 256.
+        :param embed_initializer: Initializer for codebooks of shape
+            ``(n_subspaces, n_centroids, embed_dim // n_subspaces)`` as defined
+            by `jax.nn.initalizers <https://jax.readthedocs.io/en/latest/jax.nn.initializers.html>`_.
+            Codes are initialized uniformly at random. Default: He normal.
+        :param dtype: Type of initialized codebooks. Default: float32.
+        :param codebook_sharding: Sequence of mesh axis names, tuples of mesh
+            axis names, or None for each axis of the codebooks, as in
+            ``jax.sharding.PartitionSpec``, on the mesh set by
+            ``mlax.sharding.use_mesh``. Default: None, no sharding annotation.
+        """
+        super().__init__()
+
+        self.rng = rng
+        self.vocab_size = int(vocab_size)
+        self.embed_dim = int(embed_dim)
+        self.n_subspaces = int(n_subspaces)
+        self.n_centroids = int(n_centroids)
+        if self.embed_dim % self.n_subspaces != 0:
+            raise ValueError(
+                f"embed_dim={self.embed_dim} is not divisible by "
+                f"n_subspaces={self.n_subspaces}."
+            )
+        if self.n_centroids > 65536:
+            raise ValueError(
+                f"n_centroids={self.n_centroids} is greater than 65536."
+            )
+        self.embed_initializer = embed_initializer
+        self.dtype = dtypes.canonicalize_dtype(dtype)
+
+        self.codebooks = Parameter(
+            trainable=True, metadata=sharding_metadata(codebook_sharding)
+        )
+        self.codes = Parameter(trainable=False)
+
+    @property
+    def _code_dtype(self):
+        return jnp.uint8 if self.n_centroids <= 256 else jnp.uint16
+
+    def setup(self, x: Array) -> None:
+        rng1, rng2 = random.split(self.rng)
+        self.codebooks.data = constrain_param_data(
+            self.codebooks,
+            self.embed_initializer(
+                rng1,
+                (
+                    self.n_subspaces, self.n_centroids,
+                    self.embed_dim // self.n_subspaces
+                ),
+                self.dtype
+            )
+        )
+        self.codes.data = lax.convert_element_type(
+            random.randint(
+                rng2, (self.vocab_size, self.n_subspaces), 0, self.n_centroids
+            ),
+            self._code_dtype
+        )
+
+    @classmethod
+    def from_embed(
+        cls,
+        layer: Module,
+        n_subspaces: int,
+        n_centroids: int=256,
+        n_iters: int=10
+    ) -> "PQEmbed":
+        """Compress an initialized ``Embed`` layer by k-means clustering the
+        subvectors of its embeddings.
+
+        :param layer: Initialized ``Embed`` layer.
+        :param n_subspaces: Number of subvectors per embedding.
+        :param n_centroids: Number of centroids per subspace. Must not exceed
+            the vocabulary size. Default: 256.
+        :param n_iters: Number of k-means iterations. Default: 10.
+
+        :returns: Initialized product-quantized embedding layer.
+        """
+        kernel = layer.embed_kernel.data
+        vocab_size, embed_dim = kernel.shape
+        pq = cls(
+            layer.rng, vocab_size, embed_dim, n_subspaces, n_centroids,
+            dtype=kernel.dtype
+        )
+        subvectors = jnp.transpose(
+            jnp.reshape(kernel, (vocab_size, pq.n_subspaces, -1)), (1, 0, 2)
+        )
+        codes, codebooks = [], []
+        for i in range(pq.n_subspaces):
+            c, cb = _kmeans(
+                subvectors[i], pq.n_centroids, n_iters,
+                random.fold_in(layer.rng, i)
+            )
+            codes.append(c)
+            codebooks.append(cb)
+        pq.codebooks.data = jnp.stack(codebooks)
+        pq.codes.data = lax.convert_element_type(
+            jnp.stack(codes, -1), pq._code_dtype
+        )
+        pq.initialized = True
+        return pq
+
+    def forward(
+        self,
+        x: Array,
+        rng: None=None,
+        inference_mode: bool=False,
+        batch_axis_name: Union[Hashable, Tuple[Hashable]]=()
+    ) -> Array:
+        in_bounds = (x >= 0) & (x < self.vocab_size)
+        codes = lax.convert_element_type(
+            self.codes.data.at[x].get(mode="clip"), jnp.int32
+        )
+        embeddings = self.codebooks.data[
+            jnp.arange(self.n_subspaces), codes
+        ]
+        embeddings = jnp.reshape(embeddings, (*x.shape, self.embed_dim))
+        # Out of bounds ids are filled as in ``Embed``
+        fill = jnp.nan if jnp.issubdtype(self.dtype, jnp.inexact) else (
+            jnp.iinfo(self.dtype).min
+        )
+        return jnp.where(
+            in_bounds[..., None], embeddings, jnp.full_like(embeddings, fill)
+        )
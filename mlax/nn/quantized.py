@@ -0,0 +1,180 @@
+from typing import Any, Tuple, Union, Hashable
+from jax import (
+    Array,
+    numpy as jnp,
+    lax,
+    tree_util as jtu
+)
+from mlax import Parameter, Module
+from mlax.nn.linear import Linear
+from mlax.nn.conv import Conv
+from mlax._utils import (
+    _canon_int_sequence,
+    _canon_opt_int_sequence,
+    _canon_padding
+)
+
+def _quantize_kernel(kernel, reduce_axes):
+    # Symmetric per-output-channel int8 quantization
+    absmax = jnp.max(lax.abs(kernel), axis=reduce_axes, keepdims=True)
+    scale = lax.div(absmax, lax.convert_element_type(127, kernel.dtype))
+    scale = jnp.where(scale == 0, jnp.ones_like(scale), scale)
+    q = lax.convert_element_type(
+        lax.clamp(
+            lax.convert_element_type(-127, kernel.dtype),
+            lax.round(
+                lax.div(kernel, scale), lax.RoundingMethod.TO_NEAREST_EVEN
+            ),
+            lax.convert_element_type(127, kernel.dtype)
+        ),
+        jnp.int8
+    )
+    return q, jnp.squeeze(scale, reduce_axes)
+
+def _check_initialized(layer, kernel):
+    if kernel.data is None:
+        raise ValueError(
+            f"Cannot quantize an uninitialized {type(layer).__name__} layer. "
+            "Initialize it first, e.g. with layer.initialize(x)."
+        )
+
+def _scale_output(y, scale, feature_dim):
+    return lax.mul(
+        y,
+        lax.broadcast_in_dim(
+            lax.convert_element_type(scale, y.dtype), y.shape, (feature_dim,)
+        )
+    )
+
+class QuantizedLinear(Module):
+    """Linear layer with an int8 kernel and per-output-channel scales for
+    inference.
+    """
+    def __init__(self, layer: Linear):
+        """Quantize an initialized linear layer.
+
+        :param layer: Initialized ``Linear`` layer. Its kernel may have
+            leading axes, as in ``Stacked``.
+        """
+        super().__init__()
+        _check_initialized(layer, layer.linear_kernel)
+
+        self.precision = layer.precision
+        self.accum_dtype = layer.accum_dtype
+        self.transposed_kernel = layer.transposed_kernel
+        self.dtype = layer.dtype
+
+        kernel = layer.linear_kernel.data
+        in_axis = kernel.ndim - 1 if self.transposed_kernel else kernel.ndim - 2
+        q, scale = _quantize_kernel(kernel, (in_axis,))
+        self.linear_kernel = Parameter(
+            trainable=False, data=q, metadata=layer.linear_kernel.metadata
+        )
+        self.linear_scale = Parameter(trainable=False, data=scale)
+        self.initialized = True
+
+    def setup(self, x: Array) -> None:
+        pass
+
+    def forward(
+        self,
+        x: Array,
+        rng: None=None,
+        inference_mode: bool=False,
+        batch_axis_name: Union[Hashable, Tuple[Hashable]]=()
+    ) -> Array:
+        contracting_dims = (1,) if self.transposed_kernel else (0,)
+        y = lax.dot_general(
+            x,
+            lax.convert_element_type(self.linear_kernel.data, x.dtype),
+            (((x.ndim - 1,), contracting_dims), ((), ())),
+            self.precision,
+            self.accum_dtype
+        )
+        return _scale_output(y, self.linear_scale.data, y.ndim - 1)
+
+class QuantizedConv(Module):
+    """Convolution layer with an int8 kernel and per-output-channel scales for
+    inference.
+    """
+    def __init__(self, layer: Conv):
+        """Quantize an initialized convolution layer.
+
+        :param layer: Initialized ``Conv`` layer. Its kernel may have leading
+            axes, as in ``Stacked``.
+        """
+        super().__init__()
+        _check_initialized(layer, layer.conv_kernel)
+
+        self.strides = layer.strides
+        self.padding = layer.padding
+        self.input_dilation = layer.input_dilation
+        self.filter_dilation = layer.filter_dilation
+        self.feature_group_count = layer.feature_group_count
+        self.batch_group_count = layer.batch_group_count
+        self.precision = layer.precision
+        self.accum_dtype = layer.accum_dtype
+        self.dtype = layer.dtype
+        self.dimension_numbers = layer.dimension_numbers
+
+        kernel = layer.conv_kernel.data
+        rhs_spec = self.dimension_numbers.rhs_spec
+        offset = kernel.ndim - len(rhs_spec)
+        out_axis = offset + rhs_spec[0]
+        q, scale = _quantize_kernel(
+            kernel,
+            tuple(a for a in range(offset, kernel.ndim) if a != out_axis)
+        )
+        self.conv_kernel = Parameter(
+            trainable=False, data=q, metadata=layer.conv_kernel.metadata
+        )
+        self.conv_scale = Parameter(trainable=False, data=scale)
+        self.initialized = True
+
+    def setup(self, x: Array) -> None:
+        pass
+
+    def forward(
+        self,
+        x: Array,
+        rng: None=None,
+        inference_mode: bool=False,
+        batch_axis_name: Union[Hashable, Tuple[Hashable]]=()
+    ) -> Array:
+        n_spatial_dims = x.ndim - 1
+        x = lax.broadcast(x, (1,))
+        x = lax.conv_general_dilated(
+            x,
+            lax.convert_element_type(self.conv_kernel.data, x.dtype),
+            _canon_int_sequence(self.strides, n_spatial_dims),
+            _canon_padding(self.padding, n_spatial_dims),
+            _canon_opt_int_sequence(self.input_dilation, n_spatial_dims),
+            _canon_opt_int_sequence(self.filter_dilation, n_spatial_dims),
+            self.dimension_numbers,
+            self.feature_group_count,
+            self.batch_group_count,
+            self.precision,
+            self.accum_dtype
+        )
+        x = _scale_output(
+            x, self.conv_scale.data, self.dimension_numbers.out_spec[1]
+        )
+        return lax.squeeze(x, (0,))
+
+def quantize(module: Any) -> Any:
+    """Replace the ``Linear`` and ``Conv`` layers of an initialized module
+    with ``QuantizedLinear`` and ``QuantizedConv`` layers.
+
+    :param module: Initialized module.
+
+    :returns: ``module`` with int8 kernels.
+    """
+    def _quantize(node):
+        if isinstance(node, Linear):
+            return QuantizedLinear(node)
+        elif isinstance(node, Conv):
+            return QuantizedConv(node)
+        return node
+    return jtu.tree_map(
+        _quantize, module, is_leaf=lambda node: isinstance(node, (Linear, Conv))
+    )
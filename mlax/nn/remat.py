@@ -0,0 +1,107 @@
+from typing import Any, Callable, Optional, Sequence, Tuple, Union, Hashable
+import jax
+from jax import Array
+from mlax import Module
+
+def _policy(policy, names):
+    if callable(policy):
+        return policy
+    elif policy == "nothing":
+        return jax.checkpoint_policies.nothing_saveable
+    elif policy == "dots":
+        return jax.checkpoint_policies.dots_saveable
+    elif policy == "dots_no_batch":
+        return jax.checkpoint_policies.dots_with_no_batch_dims_saveable
+    elif policy == "names":
+        return jax.checkpoint_policies.save_only_these_names(*names)
+    raise ValueError(f"Unknown rematerialization policy: {policy}")
+
+def _remat_call(layer, x, rng, inference_mode, batch_axis_name, policy, names):
+    if not layer.initialized:
+        return layer(x, rng, inference_mode, batch_axis_name)
+    return jax.checkpoint(
+        lambda layer, x, rng: layer(x, rng, inference_mode, batch_axis_name),
+        policy=_policy(policy, names)
+    )(layer, x, rng)
+
+class Remat(Module):
+    """Wrapper that rematerializes the activations of a layer that does not
+    require rng in the backward pass.
+    """
+    def __init__(
+        self,
+        layer: Module,
+        policy: Union[str, Callable[..., bool]]="nothing",
+        names: Sequence[str]=()
+    ):
+        """Initialize a Remat layer.
+
+        :param layer: Layer to rematerialize.
+        :param policy: "nothing", "dots", "dots_no_batch", "names", or a
+            ``jax.checkpoint_policies`` policy. "nothing" saves no activations,
+            "dots" saves the outputs of matrix multiplications, "dots_no_batch"
+            saves those without batch dimensions, and "names" saves the
+            activations tagged with ``jax.ad_checkpoint.checkpoint_name`` and a
+            name in ``names``. Default: "nothing".
+        :param names: Names of the activations to save if ``policy`` is
+            "names". Default: ().
+        """
+        super().__init__()
+        self.layer = layer
+        self.policy = policy
+        self.names = tuple(names)
+        _policy(self.policy, self.names)
+
+    def setup(self, x: Any) -> None:
+        pass
+
+    def forward(
+        self,
+        x: Any,
+        rng: None=None,
+        inference_mode: bool=False,
+        batch_axis_name: Union[Hashable, Tuple[Hashable]]=()
+    ) -> Any:
+        x, self.layer = _remat_call(
+            self.layer, x, None, inference_mode, batch_axis_name,
+            self.policy, self.names
+        )
+        return x
+
+class RematRng(Module):
+    """Wrapper that rematerializes the activations of a layer that may require
+    rng in the backward pass.
+    """
+    def __init__(
+        self,
+        layer: Module,
+        policy: Union[str, Callable[..., bool]]="nothing",
+        names: Sequence[str]=()
+    ):
+        """Initialize a RematRng layer.
+
+        :param layer: Layer to rematerialize.
+        :param policy: See ``Remat``. Default: "nothing".
+        :param names: See ``Remat``. Default: ().
+        """
+        super().__init__()
+        self.layer = layer
+        self.policy = policy
+        self.names = tuple(names)
+        _policy(self.policy, self.names)
+
+    def setup(self, x: Any) -> None:
+        pass
+
+    def forward(
+        self,
+        x: Any,
+        rng: Optional[Array],
+        inference_mode: bool=False,
+        batch_axis_name: Union[Hashable, Tuple[Hashable]]=()
+    ) -> Any:
+        x, self.layer = _remat_call(
+            self.layer, x, rng, inference_mode, batch_axis_name,
+            self.policy, self.names
+        )
+        return x
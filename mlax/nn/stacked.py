@@ -0,0 +1,248 @@
+from types import FunctionType, MethodType
+from typing import Any, Iterable, Tuple, Union, Hashable
+import numpy as np
+from jax import (
+    Array,
+    dtypes,
+    numpy as jnp,
+    lax,
+    random,
+    tree_util as jtu
+)
+from mlax import Module, Parameter, hyperparams
+from mlax._utils import _needs_rng, _fingerprint
+
+def _is_prng_key(value):
+    # Typed PRNG keys, or raw keys, which are uint32 arrays
+    return isinstance(value, Array) and (
+        dtypes.issubdtype(value.dtype, dtypes.prng_key) or
+        value.dtype == np.uint32
+    )
+
+def _cell_contents(fn):
+    return () if fn.__closure__ is None else tuple(
+        cell.cell_contents for cell in fn.__closure__
+    )
+
+def _same_function(fn, other):
+    # Same code, defaults, and captured values
+    return fn.__code__ == other.__code__ and all(map(
+        _same_value,
+        (fn.__defaults__, fn.__kwdefaults__, _cell_contents(fn)),
+        (other.__defaults__, other.__kwdefaults__, _cell_contents(other))
+    ))
+
+def _same_value(value, other):
+    # Exact equality, except that functions built by the same code are
+    # compared by what they capture, as stacked layers share the first
+    # layer's functions
+    if value is other:
+        return True
+    if isinstance(value, FunctionType) and isinstance(other, FunctionType):
+        return _same_function(value, other)
+    if isinstance(value, MethodType) and isinstance(other, MethodType):
+        return _same_value(value.__func__, other.__func__) and _same_value(
+            value.__self__, other.__self__
+        )
+    if isinstance(value, (list, tuple)) and isinstance(other, (list, tuple)):
+        return type(value) is type(other) and len(value) == len(other) and all(
+            map(_same_value, value, other)
+        )
+    if isinstance(value, dict) and isinstance(other, dict):
+        return value.keys() == other.keys() and all(
+            _same_value(value[k], other[k]) for k in value
+        )
+    return bool(_fingerprint(value) == _fingerprint(other))
+
+def _same_hyperparam(value, other):
+    # PRNG keys may differ, and functions are compared by code, defaults, and
+    # captured values, so layers built by the same code with their own keys
+    # and lambdas can be stacked
+    if value is other:
+        return True
+    if _is_prng_key(value) and _is_prng_key(other):
+        return value.shape == other.shape and value.dtype == other.dtype
+    if isinstance(value, Module) and isinstance(other, Module):
+        return _same_structure(value, other)
+    if isinstance(value, (list, tuple)) and isinstance(other, (list, tuple)):
+        return type(value) is type(other) and len(value) == len(other) and all(
+            map(_same_hyperparam, value, other)
+        )
+    if isinstance(value, dict) and isinstance(other, dict):
+        return value.keys() == other.keys() and all(
+            _same_hyperparam(value[k], other[k]) for k in value
+        )
+    return _same_value(value, other)
+
+def _is_submodule(tree):
+    return lambda node: node is not tree and isinstance(node, Module)
+
+def _same_structure(tree, other):
+    # Whether ``tree`` and ``other`` have the same module types,
+    # hyperparameters up to ``_same_hyperparam``, PyTree structure, and
+    # parameter shapes and dtypes
+    if isinstance(tree, Module):
+        if type(tree) is not type(other) or (
+            tree.initialized is not other.initialized
+        ):
+            return False
+        tree_hyperparams = hyperparams(tree)
+        other_hyperparams = hyperparams(other)
+        if tree_hyperparams.keys() != other_hyperparams.keys() or not all(
+            _same_hyperparam(value, other_hyperparams[name])
+            for name, value in tree_hyperparams.items()
+        ):
+            return False
+        # Compare parameters field by field, as the module's own PyTree node
+        # compares hyperparameters exactly
+        children, _ = tree.tree_flatten_with_keys()
+        other_children, _ = other.tree_flatten_with_keys()
+        return [name for name, _ in children] == [
+            name for name, _ in other_children
+        ] and all(
+            _same_structure(child, other_child)
+            for (_, child), (_, other_child) in zip(children, other_children)
+        )
+
+    leaves, treedef = jtu.tree_flatten(tree, is_leaf=_is_submodule(tree))
+    other_leaves, other_treedef = jtu.tree_flatten(
+        other, is_leaf=_is_submodule(other)
+    )
+    if jtu.treedef_is_leaf(treedef):
+        return jtu.treedef_is_leaf(other_treedef) and (
+            jnp.shape(tree) == jnp.shape(other) and
+            jnp.result_type(tree) == jnp.result_type(other)
+        )
+    return treedef == other_treedef and all(
+        map(_same_structure, leaves, other_leaves)
+    )
+
+def _stack(layers):
+    leaves, treedef = jtu.tree_flatten(layers[0])
+    stacked = [[leaf] for leaf in leaves]
+    for layer in layers[1:]:
+        if not _same_structure(layers[0], layer):
+            raise ValueError(
+                "Stacked layers must have the same types, hyperparameters, "
+                "and parameter shapes and dtypes."
+            )
+        for leaves_list, leaf in zip(stacked, jtu.tree_leaves(layer)):
+            leaves_list.append(leaf)
+    return treedef.unflatten([jnp.stack(leaves) for leaves in stacked])
+
+def _is_stacked(layers):
+    return not isinstance(layers, list)
+
+def _init_stacked(layers):
+    if all(layer.initialized for layer in layers):
+        return _stack(layers)
+    return list(layers)
+
+class Stacked(Module):
+    """Identical layers that do not require rng in series, whose parameters
+    are stacked along a leading axis and applied with ``lax.scan``.
+    """
+    def __init__(self, layers: Iterable[Module]):
+        """Initialize a Stacked layer.
+
+        :param layers: Layers of the same type, hyperparameters, and
+            parameter shapes and dtypes to combine in series. PRNG keys may
+            differ, and functions are compared by code, defaults, and captured
+            values. Layers must map their input to an output of the same
+            shape and dtype. Layers are applied unrolled on the first call to
+            initialize them, and scanned over afterwards.
+        """
+        super().__init__()
+        layers = list(layers)
+        self.n_layers = len(layers)
+        self.layers = Parameter(trainable=None, data=_init_stacked(layers))
+
+    def setup(self, x: Any) -> None:
+        pass
+
+    def forward(
+        self,
+        x: Any,
+        rng: None=None,
+        inference_mode: bool=False,
+        batch_axis_name: Union[Hashable, Tuple[Hashable]]=()
+    ) -> Any:
+        if not _is_stacked(self.layers.data):
+            for i, layer in enumerate(self.layers.data):
+                x, self.layers.data[i] = layer(
+                    x, None, inference_mode, batch_axis_name
+                )
+            self.layers.data = _stack(self.layers.data)
+            return x
+
+        def body(x, layer):
+            return layer(x, None, inference_mode, batch_axis_name)
+        # Layers without parameters leave nothing to scan over
+        x, self.layers.data = lax.scan(
+            body, x, self.layers.data, length=self.n_layers
+        )
+        return x
+
+class StackedRng(Module):
+    """Identical layers that may require rng in series, whose parameters are
+    stacked along a leading axis and applied with ``lax.scan``.
+    """
+    def __init__(self, layers: Iterable[Module]):
+        """Initialize a StackedRng layer.
+
+        :param layers: Layers of the same type, hyperparameters, and
+            parameter shapes and dtypes to combine in series. PRNG keys may
+            differ, and functions are compared by code, defaults, and captured
+            values. Layers must map their input to an output of the same
+            shape and dtype. Layers are applied unrolled on the first call to
+            initialize them, and scanned over afterwards. PRNG keys are
+            derived as in ``SeriesRng``.
+        """
+        super().__init__()
+        layers = list(layers)
+        self.n_layers = len(layers)
+        self.layers = Parameter(trainable=None, data=_init_stacked(layers))
+
+    def setup(self, x: Any) -> None:
+        pass
+
+    def forward(
+        self,
+        x: Any,
+        rng: Array,
+        inference_mode: bool=False,
+        batch_axis_name: Union[Hashable, Tuple[Hashable]]=()
+    ) -> Any:
+        if not _is_stacked(self.layers.data):
+            needs_rng = _needs_rng(self.layers.data[0])
+        else:
+            needs_rng = _needs_rng(self.layers.data)
+
+        if not needs_rng:
+            keys = None
+        elif self.n_layers > 1:
+            keys = [random.fold_in(rng, i) for i in range(self.n_layers)]
+        else:
+            keys = [rng]
+
+        if not _is_stacked(self.layers.data):
+            for i, layer in enumerate(self.layers.data):
+                x, self.layers.data[i] = layer(
+                    x,
+                    None if keys is None else keys[i],
+                    inference_mode,
+                    batch_axis_name
+                )
+            self.layers.data = _stack(self.layers.data)
+            return x
+
+        def body(x, layer_and_key):
+            layer, key = layer_and_key
+            return layer(x, key, inference_mode, batch_axis_name)
+        x, self.layers.data = lax.scan(
+            body,
+            x,
+            (self.layers.data, None if keys is None else jnp.stack(keys)),
+            length=self.n_layers
+        )
+        return x
@@ -1,16 +1,19 @@
-from typing import Union, Sequence, Hashable, Tuple
+from typing import Any, Union, Sequence, Hashable, Tuple
 from jax import (
     Array,
     numpy as jnp,
     nn,
     lax,
     random,
-    dtypes
+    dtypes,
+    tree_util as jtu
 )
 from mlax import Parameter, Module
 from mlax._utils import (
     _canon_int_sequence,
+    _canon_axis_names,
     _compute_std_stats,
+    _merge_std_stats,
     _standardize
 )
 
@@ -24,7 +27,8 @@ class ZNorm(Module):
         momentum: float=0.9,
         mean_initializer=nn.initializers.zeros,
         variance_initializer=nn.initializers.ones,
-        dtype=jnp.float32
+        dtype=jnp.float32,
+        local_axis_name: Union[Hashable, Tuple[Hashable]]=()
     ):
         """Initialize a normalization layer.
 
@@ -45,6 +49,12 @@ class ZNorm(Module):
             ``jax.nn.initalizers <https://jax.readthedocs.io/en/latest/jax.nn.initializers.html>``.
             Default:: ones.
         :param dtype: Type of initialized parameters. Default: float32.
+        :param local_axis_name: Hashable or tuple of hashable representing
+            the batch axis name(s), typically device axes, to not normalize
+            along even if they are in ``batch_axis_name``. Normalizing with
+            per-device statistics saves a collective per call, but the running
+            statistics then differ between devices until merged with
+            ``sync_z_norm``. Default: (), normalization along all batch axes.
         """
         super().__init__()
 
@@ -57,7 +67,8 @@ class ZNorm(Module):
         self.mean_initializer = mean_initializer
         self.variance_initializer = variance_initializer
         self.dtype = dtypes.canonicalize_dtype(dtype)
-    
+        self.local_axis_name = local_axis_name
+
         self.moving_mean = Parameter(trainable=False)
         self.moving_var = Parameter(trainable=False)
 
@@ -91,28 +102,93 @@ class ZNorm(Module):
             axis = self.axis
 
         if inference_mode is True:
-            mean = lax.convert_element_type(self.moving_mean.data, x.dtype)
-            variance = lax.convert_element_type(self.moving_var.data, x.dtype)
+            mean, variance = self.moving_mean.data, self.moving_var.data
         else:
-            mean, variance = _compute_std_stats(x, axis, batch_axis_name)
+            local_axis_names = _canon_axis_names(self.local_axis_name)
+            mean, variance = _compute_std_stats(
+                x, axis,
+                tuple(
+                    name for name in _canon_axis_names(batch_axis_name)
+                    if name not in local_axis_names
+                )
+            )
 
-            # Update running stats
+            # Update running stats in the statistics' accumulation dtype
+            stats_dtype = mean.dtype
             one_m_momemtum = 1.0 - self.momentum
             self.moving_mean.data = lax.convert_element_type(lax.add(
                 lax.mul(
-                    lax.convert_element_type(self.moving_mean.data, x.dtype),
-                    lax.convert_element_type(self.momentum, x.dtype)
+                    lax.convert_element_type(self.moving_mean.data, stats_dtype),
+                    lax.convert_element_type(self.momentum, stats_dtype)
                 ),
-                lax.mul(mean, lax.convert_element_type(one_m_momemtum, x.dtype))
+                lax.mul(
+                    mean, lax.convert_element_type(one_m_momemtum, stats_dtype)
+                )
             ), self.moving_mean.data.dtype)
             self.moving_var.data = lax.convert_element_type(lax.add(
                 lax.mul(
-                    lax.convert_element_type(self.moving_var.data, x.dtype),
-                    lax.convert_element_type(self.momentum, x.dtype)
+                    lax.convert_element_type(self.moving_var.data, stats_dtype),
+                    lax.convert_element_type(self.momentum, stats_dtype)
                 ),
                 lax.mul(
-                    variance, lax.convert_element_type(one_m_momemtum, x.dtype)
+                    variance,
+                    lax.convert_element_type(one_m_momemtum, stats_dtype)
                 )
             ), self.moving_var.data.dtype)
 
         return _standardize(x, axis, mean, variance, self.epsilon)
+
+def sync_z_norm(
+    module: Any, axis_name: Union[Hashable, Tuple[Hashable]]
+) -> Any:
+    """Merge the running statistics of the ``ZNorm`` layers of ``module``
+    that have a ``local_axis_name`` across ``axis_name``, with two
+    collectives for all layers. Each layer's running mean becomes the mean of
+    the per-device running means, and its running variance the variance of the
+    mixture, computed as the mean of the per-device running variances plus the
+    variance of the per-device running means.
+    Must be called where ``axis_name`` is bound, e.g. in ``jax.shard_map``.
+
+    :param module: Module.
+    :param axis_name: Hashable or tuple of hashable representing the axis
+        name(s) to merge running statistics across.
+
+    :returns: ``module`` with merged running statistics.
+    """
+    module = jtu.tree_map(lambda leaf: leaf, module)
+    layers = [
+        layer for layer in jtu.tree_leaves(
+            module, is_leaf=lambda node: isinstance(node, ZNorm)
+        ) if isinstance(layer, ZNorm) and layer.local_axis_name != () and
+        layer.moving_mean.data is not None
+    ]
+    if len(layers) == 0:
+        return module
+
+    # Pack means and variances into one buffer each, merged with Chan's
+    # method as the batch statistics of ``ZNorm`` layers are
+    means, variances = [], []
+    for layer in layers:
+        means.append(jnp.ravel(
+            lax.convert_element_type(layer.moving_mean.data, jnp.float32)
+        ))
+        variances.append(jnp.ravel(
+            lax.convert_element_type(layer.moving_var.data, jnp.float32)
+        ))
+    means, variances = _merge_std_stats(
+        jnp.concatenate(means), jnp.concatenate(variances), axis_name
+    )
+
+    offset = 0
+    for layer in layers:
+        shape, size = layer.moving_mean.data.shape, layer.moving_mean.data.size
+        mean = lax.reshape(means[offset:offset + size], shape)
+        var = lax.reshape(variances[offset:offset + size], shape)
+        offset += size
+        layer.moving_mean.data = lax.convert_element_type(
+            mean, layer.moving_mean.data.dtype
+        )
+        layer.moving_var.data = lax.convert_element_type(
+            var, layer.moving_var.data.dtype
+        )
+    return module
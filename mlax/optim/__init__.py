@@ -0,0 +1,3 @@
+from mlax.optim.optimizer import Optimizer
+from mlax.optim.sgd import SGD, SGDState
+from mlax.optim.adam import Adam, AdamW, AdamState
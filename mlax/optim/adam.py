@@ -0,0 +1,132 @@
+from typing import Any, Callable, Dict, NamedTuple, Tuple, Union
+import numpy as np
+from jax import (
+    Array,
+    dtypes,
+    numpy as jnp,
+    lax
+)
+from mlax.optim.optimizer import Optimizer
+
+def _moment_dtype(dtype):
+    # Moments are kept in at least float32, as in low precision ``1 - b2``
+    # rounds to 0
+    return dtypes.result_type(dtype, np.float32)
+
+class AdamState(NamedTuple):
+    """State of an Adam optimizer. Moments are in at least float32."""
+    count: Array
+    mu: Dict[str, Array]
+    nu: Dict[str, Array]
+
+class Adam(Optimizer):
+    """Adam optimizer."""
+    def __init__(
+        self,
+        lr: Union[float, Callable[[Array], Any]]=1e-3,
+        b1: float=0.9,
+        b2: float=0.999,
+        eps: float=1e-8
+    ):
+        """Initialize an Adam optimizer.
+
+        :param lr: Learning rate, or function mapping the number of steps
+            taken so far, 0 on the first step, to the learning rate.
+            Default: 0.001.
+        :param b1: Exponential decay rate of the first moment. Default: 0.9.
+        :param b2: Exponential decay rate of the second moment. Default: 0.999.
+        :param eps: Small number added to the denominator for numerical
+            stability. Default: 1e-08.
+        """
+        super().__init__(lr)
+        self.b1 = float(b1)
+        self.b2 = float(b2)
+        self.eps = float(eps)
+        self.weight_decay = 0.0
+
+    def init_state(self, params: Dict[str, Array]) -> AdamState:
+        return AdamState(
+            jnp.zeros((), jnp.int32),
+            {
+                dtype: lax.full_like(p, 0, _moment_dtype(p.dtype))
+                for dtype, p in params.items()
+            },
+            {
+                dtype: lax.full_like(p, 0, _moment_dtype(p.dtype))
+                for dtype, p in params.items()
+            }
+        )
+
+    def update(
+        self,
+        gradients: Dict[str, Array],
+        params: Dict[str, Array],
+        state: AdamState
+    ) -> Tuple[Dict[str, Array], AdamState]:
+        count = state.count + 1
+        # Bias corrections are computed in float32
+        _count = lax.convert_element_type(count, jnp.float32)
+        bc1 = 1.0 - lax.pow(jnp.float32(self.b1), _count)
+        bc2 = 1.0 - lax.pow(jnp.float32(self.b2), _count)
+
+        new_params, mu, nu = {}, {}, {}
+        for dtype, p in params.items():
+            # Moments and the update are computed in the moments' dtype, and
+            # only the scaled update is cast to the parameters' dtype
+            accum_dtype = state.mu[dtype].dtype
+            g = lax.convert_element_type(gradients[dtype], accum_dtype)
+            b1 = lax.convert_element_type(self.b1, accum_dtype)
+            b2 = lax.convert_element_type(self.b2, accum_dtype)
+            one = lax.convert_element_type(1, accum_dtype)
+            m = lax.add(
+                lax.mul(state.mu[dtype], b1), lax.mul(g, lax.sub(one, b1))
+            )
+            v = lax.add(
+                lax.mul(state.nu[dtype], b2),
+                lax.mul(lax.integer_pow(g, 2), lax.sub(one, b2))
+            )
+            update = lax.div(
+                lax.div(m, lax.convert_element_type(bc1, accum_dtype)),
+                lax.add(
+                    lax.sqrt(
+                        lax.div(v, lax.convert_element_type(bc2, accum_dtype))
+                    ),
+                    lax.convert_element_type(self.eps, accum_dtype)
+                )
+            )
+            if self.weight_decay != 0.0:
+                update = lax.add(update, lax.mul(
+                    lax.convert_element_type(p, accum_dtype),
+                    lax.convert_element_type(self.weight_decay, accum_dtype)
+                ))
+            new_params[dtype] = lax.sub(p, lax.convert_element_type(
+                lax.mul(update, self._lr(state.count, accum_dtype)), p.dtype
+            ))
+            mu[dtype] = m
+            nu[dtype] = v
+        return new_params, AdamState(count, mu, nu)
+
+class AdamW(Adam):
+    """Adam optimizer with decoupled weight decay."""
+    def __init__(
+        self,
+        lr: Union[float, Callable[[Array], Any]]=1e-3,
+        b1: float=0.9,
+        b2: float=0.999,
+        eps: float=1e-8,
+        weight_decay: float=1e-4
+    ):
+        """Initialize an AdamW optimizer.
+
+        :param lr: Learning rate, or function mapping the number of steps
+            taken so far, 0 on the first step, to the learning rate.
+            Default: 0.001.
+        :param b1: Exponential decay rate of the first moment. Default: 0.9.
+        :param b2: Exponential decay rate of the second moment. Default: 0.999.
+        :param eps: Small number added to the denominator for numerical
+            stability. Default: 1e-08.
+        :param weight_decay: Decoupled weight decay, scaled by the learning
+            rate. Default: 1e-04.
+        """
+        super().__init__(lr, b1, b2, eps)
+        self.weight_decay = float(weight_decay)
@@ -0,0 +1,98 @@
+from typing import Any, Callable, Dict, Tuple, Union
+import jax
+from jax import (
+    Array,
+    lax
+)
+from mlax.flat import FlatParams
+
+class Optimizer:
+    """MLAX optimizer base class.
+
+    Optimizers update trainable parameters, typically the first half of
+    ``Module.partition``, or ``FlatParams``. Parameters and gradients are
+    packed into one contiguous buffer per dtype so that each update is fused
+    across all parameters of the same dtype.
+    """
+    def __init__(self, lr: Union[float, Callable[[Array], Any]]) -> None:
+        """Initialize optimizer hyperparameters.
+
+        :param lr: Learning rate, or function mapping the number of steps
+            taken so far, 0 on the first step, to the learning rate.
+        """
+        self.lr = lr
+
+    def init_state(self, params: Dict[str, Array]) -> Any:
+        """Initialize the optimizer state.
+
+        :param params: Dictionary of dtype names to parameter buffers.
+
+        :returns: Optimizer state.
+        """
+        raise NotImplementedError()
+
+    def update(
+        self,
+        gradients: Dict[str, Array],
+        params: Dict[str, Array],
+        state: Any
+    ) -> Tuple[Dict[str, Array], Any]:
+        """Update parameter buffers.
+
+        :param gradients: Dictionary of dtype names to gradient buffers.
+        :param params: Dictionary of dtype names to parameter buffers.
+        :param state: Optimizer state.
+
+        :returns: Updated parameter buffers.
+        :returns: Updated optimizer state.
+        """
+        raise NotImplementedError()
+
+    def init(self, params: Any) -> Any:
+        """Initialize the optimizer state for ``params``.
+
+        :param params: Trainable parameters or ``FlatParams``.
+
+        :returns: Optimizer state.
+        """
+        return self.init_state(_pack(params).buffers)
+
+    def step(self, gradients: Any, params: Any, state: Any) -> Tuple[Any, Any]:
+        """Perform a single optimization step.
+
+        :param gradients: Gradients with respect to ``params``, of the same
+            structure as ``params``.
+        :param params: Trainable parameters or ``FlatParams``.
+        :param state: Optimizer state for ``params``.
+
+        :returns: Updated ``params``.
+        :returns: Updated optimizer state.
+        """
+        flat_params = _pack(params)
+        buffers, state = self.update(
+            _pack(gradients).buffers, flat_params.buffers, state
+        )
+        flat_params = FlatParams(
+            buffers, flat_params.treedef, flat_params.slots
+        )
+        if isinstance(params, FlatParams):
+            return flat_params, state
+        return flat_params.unpack(), state
+
+    def jit(self, donate: bool=True) -> Callable[..., Tuple[Any, Any]]:
+        """Jit-compiled ``step``.
+
+        :param donate: Whether to donate the buffers of the parameters and
+            optimizer state to the updated parameters and optimizer state.
+            Donated arguments must not be reused. Default: True.
+
+        :returns: Jit-compiled ``step``.
+        """
+        return jax.jit(self.step, donate_argnums=(1, 2) if donate else ())
+
+    def _lr(self, count: Array, dtype: Any) -> Array:
+        lr = self.lr(count) if callable(self.lr) else self.lr
+        return lax.convert_element_type(lr, dtype)
+
+def _pack(params):
+    return params if isinstance(params, FlatParams) else FlatParams.pack(params)
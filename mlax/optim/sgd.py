@@ -0,0 +1,65 @@
+from typing import Any, Callable, Dict, NamedTuple, Tuple, Union
+from jax import (
+    Array,
+    numpy as jnp,
+    lax
+)
+from mlax.optim.optimizer import Optimizer
+
+class SGDState(NamedTuple):
+    """State of an SGD optimizer."""
+    count: Array
+    velocities: Dict[str, Array]
+
+class SGD(Optimizer):
+    """Stochastic gradient descent with optional (Nesterov) momentum."""
+    def __init__(
+        self,
+        lr: Union[float, Callable[[Array], Any]]=1e-2,
+        momentum: float=0.0,
+        nesterov: bool=False
+    ):
+        """Initialize an SGD optimizer.
+
+        :param lr: Learning rate, or function mapping the number of steps
+            taken so far, 0 on the first step, to the learning rate.
+            Default: 0.01.
+        :param momentum: Momentum. If 0, no velocities are kept. Default: 0.
+        :param nesterov: Whether to use Nesterov momentum. Default: False.
+        """
+        super().__init__(lr)
+        self.momentum = float(momentum)
+        self.nesterov = bool(nesterov)
+
+    def init_state(self, params: Dict[str, Array]) -> SGDState:
+        return SGDState(
+            jnp.zeros((), jnp.int32),
+            {} if self.momentum == 0.0 else {
+                dtype: lax.full_like(p, 0) for dtype, p in params.items()
+            }
+        )
+
+    def update(
+        self,
+        gradients: Dict[str, Array],
+        params: Dict[str, Array],
+        state: SGDState
+    ) -> Tuple[Dict[str, Array], SGDState]:
+        new_params = {}
+        velocities = {}
+        for dtype, p in params.items():
+            g = gradients[dtype]
+            lr_g = lax.mul(g, self._lr(state.count, g.dtype))
+            if self.momentum == 0.0:
+                new_params[dtype] = lax.sub(p, lr_g)
+            else:
+                momentum = lax.convert_element_type(self.momentum, g.dtype)
+                v = lax.add(lax.mul(state.velocities[dtype], momentum), lr_g)
+                if self.nesterov:
+                    new_params[dtype] = lax.sub(
+                        p, lax.add(lax.mul(v, momentum), lr_g)
+                    )
+                else:
+                    new_params[dtype] = lax.sub(p, v)
+                velocities[dtype] = v
+        return new_params, SGDState(state.count + 1, velocities)
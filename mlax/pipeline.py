@@ -0,0 +1,381 @@
+"""Pipeline-parallel execution of ``Series`` across devices."""
+from functools import partial
+from typing import (
+    Any, Callable, List, NamedTuple, Optional, Sequence, Tuple, Hashable
+)
+import jax
+from jax import (
+    Array,
+    numpy as jnp,
+    lax,
+    random,
+    tree_util as jtu
+)
+from mlax.module import is_trainable_param
+from mlax.train import _batched_call, _split_microbatches
+
+class PipelineOp(NamedTuple):
+    """Forward ("F") or backward ("B") pass of a stage on a microbatch."""
+    kind: str
+    stage: int
+    microbatch: int
+
+def _stage_ops(schedule, n_stages, n_microbatches, stage):
+    if schedule == "gpipe":
+        return (
+            [PipelineOp("F", stage, m) for m in range(n_microbatches)] +
+            [PipelineOp("B", stage, m) for m in range(n_microbatches)]
+        )
+    elif schedule == "1f1b":
+        n_warmup = min(n_stages - stage - 1, n_microbatches)
+        ops = [PipelineOp("F", stage, m) for m in range(n_warmup)]
+        for m in range(n_microbatches - n_warmup):
+            ops.append(PipelineOp("F", stage, n_warmup + m))
+            ops.append(PipelineOp("B", stage, m))
+        ops.extend(
+            PipelineOp("B", stage, m)
+            for m in range(n_microbatches - n_warmup, n_microbatches)
+        )
+        return ops
+    raise ValueError(f"Unknown pipeline schedule: {schedule}")
+
+def make_schedule(
+    schedule: str, n_stages: int, n_microbatches: int, backward: bool=True
+) -> List[Tuple[PipelineOp, ...]]:
+    """Simulate a pipeline schedule where every pass takes one time step.
+
+    :param schedule: "gpipe" or "1f1b".
+    :param n_stages: Number of stages.
+    :param n_microbatches: Number of microbatches.
+    :param backward: Whether to include backward passes. Default: True.
+
+    :returns: List of time steps, each a tuple of the passes run in parallel
+        on different stages during that step.
+    """
+    queues = [
+        [
+            op for op in _stage_ops(schedule, n_stages, n_microbatches, s)
+            if backward or op.kind == "F"
+        ] for s in range(n_stages)
+    ]
+    done = set()
+    ticks = []
+    while any(queues):
+        tick = []
+        for s, queue in enumerate(queues):
+            if not queue:
+                continue
+            op = queue[0]
+            if op.kind == "F":
+                ready = s == 0 or ("F", s - 1, op.microbatch) in done
+            else:
+                ready = ("F", s, op.microbatch) in done and (
+                    s == n_stages - 1 or ("B", s + 1, op.microbatch) in done
+                )
+            if ready:
+                tick.append(queue.pop(0))
+        if not tick:
+            raise RuntimeError("Pipeline schedule deadlocked.")
+        done.update(tick)
+        ticks.append(tuple(tick))
+    return ticks
+
+def bubble_fraction(
+    ticks: Sequence[Tuple[PipelineOp, ...]], n_stages: int
+) -> float:
+    """Fraction of stage time steps spent idle in a schedule."""
+    n_ops = sum(len(tick) for tick in ticks)
+    return 1.0 - n_ops / (len(ticks) * n_stages)
+
+def peak_activations(
+    ticks: Sequence[Tuple[PipelineOp, ...]], n_stages: int
+) -> int:
+    """Largest number of microbatches whose activations a stage holds at once
+    in a schedule.
+    """
+    in_flight = [0] * n_stages
+    peak = 0
+    for tick in ticks:
+        for op in tick:
+            in_flight[op.stage] += 1 if op.kind == "F" else -1
+        peak = max(peak, *in_flight)
+    return peak
+
+@partial(jax.jit, static_argnums=(3, 4))
+def _forward(stage, x, rng, inference_mode, batch_axis_name):
+    return jax.vmap(
+        stage.__call__,
+        in_axes=(0, None, None, None),
+        out_axes=(0, None),
+        axis_name=batch_axis_name
+    )(x, rng, inference_mode, batch_axis_name)
+
+@partial(jax.jit, static_argnums=(4, 5, 6, 7))
+def _forward_vjp(
+    trainables, non_trainables, x, rng, f, batch_axis_name, first, loss_fn,
+    y=None
+):
+    def fn(trainables, x):
+        stage = trainables.combine(non_trainables)
+        acts, stage = _batched_call(stage, x, rng, batch_axis_name)
+        if loss_fn is not None:
+            acts = loss_fn(acts, y)
+        return acts, stage.partition(f)[1]
+
+    if first:
+        acts, vjp_fn, non_trainables = jax.vjp(
+            lambda trainables: fn(trainables, x), trainables, has_aux=True
+        )
+    else:
+        acts, vjp_fn, non_trainables = jax.vjp(
+            fn, trainables, x, has_aux=True
+        )
+    return acts, vjp_fn, non_trainables
+
+@jax.jit
+def _backward(vjp_fn, cotangent):
+    return vjp_fn(cotangent)
+
+@jax.jit
+def _add(a, b):
+    return jtu.tree_map(lax.add, a, b)
+
+class Pipeline:
+    """Pipeline-parallel execution of a ``Series`` or ``SeriesRng`` split into
+    stages placed on different devices.
+
+    Batches are split into microbatches that flow through the stages following
+    a GPipe or 1F1B schedule. Passes are dispatched asynchronously, so
+    different stages run concurrently on their devices. Non-trainable
+    parameters of each stage are updated once per microbatch, in order.
+    """
+    def __init__(
+        self,
+        model: Any,
+        boundaries: Sequence[int],
+        devices: Optional[Sequence[Any]]=None,
+        n_microbatches: int=1,
+        schedule: str="1f1b",
+        f=is_trainable_param,
+        batch_axis_name: Hashable="N"
+    ):
+        """Initialize a pipeline.
+
+        :param model: Initialized ``Series`` or ``SeriesRng``.
+        :param boundaries: Indices of the layers starting each stage after the
+            first, e.g. ``(4, 8)`` for three stages of layers ``[0, 4)``,
+            ``[4, 8)``, and ``[8, n_layers)``.
+        :param devices: Device of each stage. Default: None, the first
+            ``jax.devices()``.
+        :param n_microbatches: Number of microbatches to split each batch into.
+            Default: 1.
+        :param schedule: "gpipe" or "1f1b". Default: "1f1b".
+        :param f: Filter selecting the trainable parameters. Default:
+            trainable parameters.
+        :param batch_axis_name: Hashable representing the batch axis name
+            passed to the stages. Default: "N".
+        """
+        if model.initialized is False:
+            raise ValueError("Pipeline requires an initialized model.")
+        layers = model.layers.data
+        bounds = [0, *boundaries, len(layers)]
+        self.n_stages = len(bounds) - 1
+        self.devices = list(
+            jax.devices()[:self.n_stages] if devices is None else devices
+        )
+        if len(self.devices) != self.n_stages:
+            raise ValueError(
+                f"{self.n_stages} stages but {len(self.devices)} devices."
+            )
+        self.stages = []
+        for start, stop, device in zip(bounds[:-1], bounds[1:], self.devices):
+            stage = type(model)(layers[start:stop])
+            stage.initialized = True
+            self.stages.append(jax.device_put(stage, device))
+        self._model_type = type(model)
+        self.n_microbatches = int(n_microbatches)
+        self.schedule = schedule
+        self.f = f
+        self.batch_axis_name = batch_axis_name
+        self.ticks = make_schedule(schedule, self.n_stages, self.n_microbatches)
+        self._optimizer_steps = {}
+
+    @property
+    def bubble_fraction(self) -> float:
+        """Fraction of idle stage time steps of a training step."""
+        return bubble_fraction(self.ticks, self.n_stages)
+
+    @property
+    def peak_activations(self) -> int:
+        """Largest number of microbatches whose activations a stage holds at
+        once during a training step.
+        """
+        return peak_activations(self.ticks, self.n_stages)
+
+    @property
+    def model(self) -> Any:
+        """Stages combined back into a single ``Series`` or ``SeriesRng``."""
+        model = self._model_type([
+            layer for stage in self.stages for layer in stage.layers.data
+        ])
+        model.initialized = True
+        return model
+
+    def _rng(self, rng, stage, microbatch):
+        if rng is None:
+            return None
+        return jax.device_put(
+            random.fold_in(random.fold_in(rng, microbatch), stage),
+            self.devices[stage]
+        )
+
+    def __call__(
+        self, x: Any, rng: Optional[Array]=None, inference_mode: bool=False
+    ) -> Any:
+        """Apply the stages on a batch.
+
+        :param x: Batched input features.
+        :param rng: PRNG key. Only necessary for some stages. Default: None.
+        :param inference_mode: Whether in inference or training mode. Default:
+            training mode.
+
+        :returns: Batched output features.
+        """
+        xs = _split_microbatches(x, self.n_microbatches)
+        acts = [
+            jtu.tree_map(lambda leaf: leaf[m], xs)
+            for m in range(self.n_microbatches)
+        ]
+        for tick in make_schedule(
+            "gpipe", self.n_stages, self.n_microbatches, backward=False
+        ):
+            for op in tick:
+                s, m = op.stage, op.microbatch
+                acts[m], self.stages[s] = _forward(
+                    self.stages[s],
+                    jax.device_put(acts[m], self.devices[s]),
+                    self._rng(rng, s, m),
+                    inference_mode,
+                    self.batch_axis_name
+                )
+        return jtu.tree_map(
+            lambda *leaves: jnp.concatenate(leaves), *acts
+        )
+
+    def value_and_grad(
+        self,
+        loss_fn: Callable[[Any, Any], Array],
+        x: Any,
+        y: Any,
+        rng: Optional[Array]=None
+    ) -> Tuple[Array, List[Any]]:
+        """Compute the loss and gradients of a batch following the schedule,
+        updating the stages' non-trainable parameters.
+
+        :param loss_fn: Function mapping batched predictions and targets to a
+            scalar loss.
+        :param x: Batched input features.
+        :param y: Batched targets.
+        :param rng: PRNG key. Only necessary for some stages. Default: None.
+
+        :returns: Loss averaged over microbatches.
+        :returns: Gradients of each stage's trainable parameters, on the
+            stage's device.
+        """
+        n_stages, n_microbatches = self.n_stages, self.n_microbatches
+        xs = _split_microbatches(x, n_microbatches)
+        ys = _split_microbatches(y, n_microbatches)
+        partitions = [stage.partition(self.f) for stage in self.stages]
+        trainables = [p[0] for p in partitions]
+        non_trainables = [p[1] for p in partitions]
+
+        acts = {}
+        vjp_fns = {}
+        cotangents = {}
+        losses = []
+        gradients = [None] * n_stages
+        scale = 1.0 / n_microbatches
+        for tick in self.ticks:
+            for op in tick:
+                s, m = op.stage, op.microbatch
+                device = self.devices[s]
+                if op.kind == "F":
+                    _x = acts.pop((s - 1, m)) if s > 0 else (
+                        jtu.tree_map(lambda leaf: leaf[m], xs)
+                    )
+                    last = s == n_stages - 1
+                    out, vjp_fns[(s, m)], non_trainables[s] = _forward_vjp(
+                        trainables[s],
+                        non_trainables[s],
+                        jax.device_put(_x, device),
+                        self._rng(rng, s, m),
+                        self.f,
+                        self.batch_axis_name,
+                        s == 0,
+                        loss_fn if last else None,
+                        jax.device_put(
+                            jtu.tree_map(lambda leaf: leaf[m], ys), device
+                        ) if last else None
+                    )
+                    if last:
+                        losses.append(out)
+                    else:
+                        acts[(s, m)] = out
+                else:
+                    if s == n_stages - 1:
+                        cotangent = jax.device_put(
+                            jnp.asarray(scale, losses[m].dtype), device
+                        )
+                    else:
+                        cotangent = jax.device_put(
+                            cotangents.pop((s + 1, m)), device
+                        )
+                    grads = _backward(vjp_fns.pop((s, m)), cotangent)
+                    if s > 0:
+                        cotangents[(s, m)] = grads[1]
+                    gradients[s] = grads[0] if gradients[s] is None else (
+                        _add(gradients[s], grads[0])
+                    )
+
+        self.stages = [
+            t.combine(n) for t, n in zip(trainables, non_trainables)
+        ]
+        return jnp.mean(jnp.stack(losses)), gradients
+
+    def init_optimizer(self, optimizer: Any) -> List[Any]:
+        """Initialize an optimizer state for each stage.
+
+        :param optimizer: ``mlax.optim.Optimizer``.
+
+        :returns: Optimizer state of each stage, on the stage's device.
+        """
+        return [
+            jax.jit(optimizer.init)(stage.partition(self.f)[0])
+            for stage in self.stages
+        ]
+
+    def apply_gradients(
+        self, optimizer: Any, gradients: List[Any], optim_states: List[Any]
+    ) -> List[Any]:
+        """Update the stages' trainable parameters on their devices.
+
+        :param optimizer: ``mlax.optim.Optimizer``.
+        :param gradients: Gradients returned by ``value_and_grad``.
+        :param optim_states: Optimizer states returned by ``init_optimizer``.
+
+        :returns: Updated optimizer states.
+        """
+        step = self._optimizer_steps.get(id(optimizer))
+        if step is None or step[0] is not optimizer:
+            step = (optimizer, jax.jit(optimizer.step))
+            self._optimizer_steps[id(optimizer)] = step
+        step = step[1]
+        new_states = []
+        for s, (stage, grads, state) in enumerate(
+            zip(self.stages, gradients, optim_states)
+        ):
+            trainables, non_trainables = stage.partition(self.f)
+            trainables, state = step(grads, trainables, state)
+            self.stages[s] = trainables.combine(non_trainables)
+            new_states.append(state)
+        return new_states
@@ -0,0 +1,296 @@
+"""Mixed-precision policies and loss scaling."""
+from contextlib import contextmanager
+from functools import reduce
+from typing import Any, NamedTuple, Optional
+from jax import (
+    Array,
+    numpy as jnp,
+    lax,
+    tree_util as jtu
+)
+from mlax.module import PathFilter, is_trainable_param
+from mlax.flat import FlatParams
+
+def cast_floating(tree: Any, dtype: Any) -> Any:
+    """Cast the floating-point leaves of a PyTree.
+
+    :param tree: PyTree of arrays, e.g. a module or input features.
+    :param dtype: Target dtype.
+
+    :returns: ``tree`` with its floating-point leaves cast to ``dtype``. Other
+        leaves are unchanged.
+    """
+    def cast(leaf):
+        if jnp.issubdtype(leaf.dtype, jnp.floating):
+            return lax.convert_element_type(leaf, dtype)
+        return leaf
+    return jtu.tree_map(cast, tree)
+
+class Policy:
+    """Model-wide mixed-precision policy.
+
+    Master parameters are kept in ``param_dtype``. Once per training step, the
+    parameters selected by ``f`` are cast to ``compute_dtype``, and the model
+    is applied on this compute copy with inputs cast to ``compute_dtype``.
+    Layers cast their weights to their inputs' dtype, so casting a copy of
+    weights that are already in ``compute_dtype`` is a no-op. Under
+    ``use_policy``, ``Linear`` and ``Conv`` layers without their own
+    ``accum_dtype`` accumulate their products in ``accum_dtype`` and return
+    outputs in ``compute_dtype``. Gradients are accumulated and averaged in
+    ``accum_dtype`` and cast back to ``param_dtype`` for the optimizer.
+    """
+    def __init__(
+        self,
+        param_dtype: Any=jnp.float32,
+        compute_dtype: Optional[Any]=None,
+        accum_dtype: Optional[Any]=None,
+        output_dtype: Optional[Any]=None,
+        f=is_trainable_param
+    ):
+        """Initialize a policy.
+
+        :param param_dtype: Dtype of the master parameters. Default: float32.
+        :param compute_dtype: Dtype of the inputs and compute copy of the
+            parameters. Default: None, ``param_dtype``.
+        :param accum_dtype: Dtype products of ``Linear`` and ``Conv`` layers
+            are accumulated in, and gradients are accumulated over
+            microbatches and averaged across devices in. Default: None,
+            ``param_dtype``.
+        :param output_dtype: Dtype of the model's outputs. Default: None,
+            ``param_dtype``.
+        :param f: Filter or ``PathFilter`` selecting the parameters to cast
+            to ``compute_dtype``, e.g. to exclude normalization parameters.
+            Default: trainable parameters.
+        """
+        self.param_dtype = jnp.dtype(param_dtype)
+        self.compute_dtype = self.param_dtype if compute_dtype is None else (
+            jnp.dtype(compute_dtype)
+        )
+        self.accum_dtype = self.param_dtype if accum_dtype is None else (
+            jnp.dtype(accum_dtype)
+        )
+        self.output_dtype = self.param_dtype if output_dtype is None else (
+            jnp.dtype(output_dtype)
+        )
+        self.f = f
+
+    def cast_to_param(self, tree: Any) -> Any:
+        """Cast the floating-point leaves of ``tree`` to ``param_dtype``."""
+        return cast_floating(tree, self.param_dtype)
+
+    def cast_to_compute(self, tree: Any) -> Any:
+        """Cast the floating-point leaves of ``tree`` to ``compute_dtype``."""
+        return cast_floating(tree, self.compute_dtype)
+
+    def cast_to_accum(self, tree: Any) -> Any:
+        """Cast the floating-point leaves of ``tree`` to ``accum_dtype``."""
+        return cast_floating(tree, self.accum_dtype)
+
+    def cast_to_output(self, tree: Any) -> Any:
+        """Cast the floating-point leaves of ``tree`` to ``output_dtype``."""
+        return cast_floating(tree, self.output_dtype)
+
+    def apply(self, module: Any) -> Any:
+        """Cast the trainable parameters of ``module`` to ``param_dtype``.
+
+        :param module: Module.
+
+        :returns: ``module`` with master parameters in ``param_dtype``.
+        """
+        trainables, non_trainables = module.partition()
+        return self.cast_to_param(trainables).combine(non_trainables)
+
+    def compute_copy(self, module: Any) -> Any:
+        """Cast the parameters of ``module`` selected by ``f`` to
+        ``compute_dtype``. Applying the copy skips the per-forward weight
+        casts, so keep it around for inference and refresh it after each
+        optimizer step.
+
+        :param module: Module, or one half of ``Module.partition``.
+
+        :returns: ``module`` with the selected parameters in
+            ``compute_dtype``.
+        """
+        if isinstance(self.f, PathFilter):
+            selected, unselected = module.partition_with_path(self.f)
+        else:
+            selected, unselected = module.partition(self.f)
+        return self.cast_to_compute(selected).combine(unselected)
+
+    def __repr__(self) -> str:
+        return (
+            f"Policy(param_dtype={self.param_dtype.name}, "
+            f"compute_dtype={self.compute_dtype.name}, "
+            f"accum_dtype={self.accum_dtype.name}, "
+            f"output_dtype={self.output_dtype.name})"
+        )
+
+_policies = []
+
+@contextmanager
+def use_policy(policy: Policy):
+    """Context manager setting the policy whose ``accum_dtype`` layers
+    accumulate their products in when traced. ``make_train_step`` applies the
+    model under its ``policy``.
+
+    :param policy: ``Policy``.
+    """
+    _policies.append(policy)
+    try:
+        yield policy
+    finally:
+        _policies.pop()
+
+def current_policy() -> Optional[Policy]:
+    """Innermost policy set by ``use_policy``, or None."""
+    return _policies[-1] if _policies else None
+
+def policy_accum_dtype(dtype: Any) -> Optional[Any]:
+    """Dtype products of ``dtype`` operands are accumulated in under the
+    current policy, or None if there is no policy or its ``accum_dtype`` is
+    not wider than ``dtype``.
+    """
+    policy = current_policy()
+    if policy is None or not jnp.issubdtype(dtype, jnp.floating):
+        return None
+    accum_dtype = policy.accum_dtype
+    if accum_dtype == dtype or jnp.promote_types(dtype, accum_dtype) != (
+        accum_dtype
+    ):
+        return None
+    return accum_dtype
+
+def all_finite(tree: Any) -> Array:
+    """Whether all leaves of ``tree`` are finite, computed on device with one
+    reduction per contiguous buffer.
+
+    :param tree: ``FlatParams``, or PyTree of arrays such as gradients.
+
+    :returns: Scalar boolean.
+    """
+    if not isinstance(tree, FlatParams):
+        tree = FlatParams.pack(tree)
+    finite = [jnp.all(jnp.isfinite(b)) for b in tree.buffers.values()]
+    return reduce(lax.bitwise_and, finite, jnp.array(True))
+
+class LossScaleState(NamedTuple):
+    """State of a dynamic loss scale."""
+    scale: Array
+    n_finite: Array
+
+class DynamicLossScale:
+    """Dynamic loss scale for low-precision training.
+
+    The loss is multiplied by the scale before differentiation, so small
+    gradients do not underflow, and the gradients are divided by it. If any
+    gradient is not finite, the step is skipped and the scale is decreased.
+    After ``period`` consecutive finite steps, the scale is increased, up to
+    ``max_scale``. The scaling and unscaling are computed in at least float32,
+    so they do not overflow in the dtype of a low-precision loss.
+    """
+    def __init__(
+        self,
+        init_scale: float=2.0 ** 15,
+        period: int=2000,
+        factor: float=2.0,
+        min_scale: float=1.0,
+        max_scale: float=2.0 ** 24
+    ):
+        """Initialize a dynamic loss scale.
+
+        :param init_scale: Initial scale. Default: 2^15.
+        :param period: Number of consecutive finite steps after which the
+            scale is multiplied by ``factor``. Default: 2000.
+        :param factor: Factor the scale is multiplied by after ``period``
+            finite steps and divided by after a non-finite step. Default: 2.
+        :param min_scale: Minimum scale. Default: 1.
+        :param max_scale: Maximum scale. Default: 2^24.
+        """
+        self.init_scale = float(init_scale)
+        self.period = int(period)
+        self.factor = float(factor)
+        self.min_scale = float(min_scale)
+        self.max_scale = float(max_scale)
+
+    def init(self) -> LossScaleState:
+        """Initialize the loss scale state.
+
+        :returns: Loss scale state.
+        """
+        return LossScaleState(
+            jnp.array(self.init_scale, jnp.float32), jnp.zeros((), jnp.int32)
+        )
+
+    def scale(self, loss: Array, state: LossScaleState) -> Array:
+        """Multiply ``loss`` by the scale.
+
+        :returns: Scaled loss in at least float32.
+        """
+        dtype = jnp.promote_types(loss.dtype, jnp.float32)
+        return lax.mul(
+            lax.convert_element_type(loss, dtype),
+            lax.convert_element_type(state.scale, dtype)
+        )
+
+    def unscale(self, gradients: Any, state: LossScaleState) -> Any:
+        """Divide the floating-point leaves of ``gradients`` by the scale, in
+        at least float32, keeping their dtypes.
+        """
+        def unscale(leaf):
+            if jnp.issubdtype(leaf.dtype, jnp.floating):
+                dtype = jnp.promote_types(leaf.dtype, jnp.float32)
+                return lax.convert_element_type(
+                    lax.div(
+                        lax.convert_element_type(leaf, dtype),
+                        lax.convert_element_type(state.scale, dtype)
+                    ),
+                    leaf.dtype
+                )
+            return leaf
+        return jtu.tree_map(unscale, gradients)
+
+    def adjust(self, finite: Array, state: LossScaleState) -> LossScaleState:
+        """Update the scale after a step.
+
+        :param finite: Scalar boolean, whether the step's gradients were
+            finite, e.g. from ``all_finite``.
+        :param state: Loss scale state.
+
+        :returns: Updated loss scale state.
+        """
+        n_finite = lax.add(state.n_finite, jnp.ones((), jnp.int32))
+        grow = lax.ge(n_finite, jnp.array(self.period, jnp.int32))
+        scale = lax.select(
+            finite,
+            lax.select(
+                grow,
+                lax.min(
+                    lax.mul(state.scale, self.factor),
+                    jnp.array(self.max_scale, jnp.float32)
+                ),
+                state.scale
+            ),
+            lax.max(
+                lax.div(state.scale, self.factor),
+                jnp.array(self.min_scale, jnp.float32)
+            )
+        )
+        n_finite = lax.select(
+            lax.bitwise_and(finite, lax.bitwise_not(grow)),
+            n_finite,
+            jnp.zeros((), jnp.int32)
+        )
+        return LossScaleState(scale, n_finite)
+
+    def select(self, finite: Array, new: Any, old: Any) -> Any:
+        """Keep ``new`` if ``finite``, else ``old``, without leaving the
+        device.
+
+        :param finite: Scalar boolean.
+        :param new: PyTree of updated arrays, e.g. parameters or optimizer
+            state.
+        :param old: PyTree of arrays of the same structure as ``new``.
+
+        :returns: ``new`` or ``old``.
+        """
+        return jtu.tree_map(lambda n, o: jnp.where(finite, n, o), new, old)
@@ -0,0 +1,138 @@
+"""Parameter sharding annotations."""
+from typing import Any, Callable, Hashable, Optional, Sequence, Tuple, Union
+import jax
+from jax import (
+    Array,
+    lax,
+    tree_util as jtu
+)
+from jax.sharding import Mesh, NamedSharding, PartitionSpec
+from mlax.module import Parameter, is_leaf_param
+from mlax._mesh import use_mesh, current_mesh
+
+def sharding_metadata(
+    sharding: Optional[Sequence[Union[None, Hashable, Tuple[Hashable, ...]]]]
+) -> Optional[dict]:
+    """Parameter metadata for a sharding annotation.
+
+    :param sharding: None, or sequence of mesh axis names, tuples of mesh axis
+        names, or None, one for each axis of the parameter's data, as in
+        ``jax.sharding.PartitionSpec``.
+
+    :returns: Metadata to pass to ``Parameter``, or None if ``sharding`` is
+        None.
+    """
+    if sharding is None:
+        return None
+    return {
+        "sharding": tuple(
+            tuple(axis) if isinstance(axis, list) else axis
+            for axis in sharding
+        )
+    }
+
+def _resolve_mesh(mesh):
+    mesh = current_mesh() if mesh is None else mesh
+    if mesh is None:
+        raise ValueError("No mesh given and no mesh set by use_mesh.")
+    return mesh
+
+def _named_sharding(param, mesh):
+    sharding = getattr(param, "sharding", None)
+    return NamedSharding(
+        mesh, PartitionSpec() if sharding is None else PartitionSpec(*sharding)
+    )
+
+def constrain_param_data(param: Parameter, data: Any) -> Any:
+    """Constrain ``data`` to ``param``'s sharding annotation on the current
+    mesh. Used by layers when initializing their parameters.
+
+    :param param: Parameter, possibly annotated with a ``sharding``.
+    :param data: Data of ``param``.
+
+    :returns: ``data``, sharded if ``param`` is annotated and a mesh is set by
+        ``use_mesh``.
+    """
+    mesh = current_mesh()
+    if mesh is None or getattr(param, "sharding", None) is None:
+        return data
+    return lax.with_sharding_constraint(data, _named_sharding(param, mesh))
+
+def param_shardings(module: Any, mesh: Optional[Mesh]=None) -> Any:
+    """``NamedSharding`` of each parameter of ``module`` from its annotation.
+    Unannotated parameters are replicated.
+
+    :param module: Module.
+    :param mesh: Mesh. Default: None, the mesh set by ``use_mesh``.
+
+    :returns: ``module`` with the data of each leaf parameter replaced by its
+        ``NamedSharding``.
+    """
+    mesh = _resolve_mesh(mesh)
+    return jtu.tree_map(
+        lambda param: param._replace_data(jtu.tree_map(
+            lambda _: _named_sharding(param, mesh), param.data
+        )),
+        module,
+        is_leaf=is_leaf_param
+    )
+
+def shard(module: Any, mesh: Optional[Mesh]=None) -> Any:
+    """Place the parameters of ``module`` on ``mesh`` as annotated.
+
+    :param module: Module.
+    :param mesh: Mesh. Default: None, the mesh set by ``use_mesh``.
+
+    :returns: ``module`` with sharded parameters.
+    """
+    return jax.device_put(module, param_shardings(module, mesh))
+
+def constrain(module: Any, mesh: Optional[Mesh]=None) -> Any:
+    """Constrain the parameters of ``module`` to their annotated shardings
+    inside a jit-compiled function.
+
+    :param module: Module.
+    :param mesh: Mesh. Default: None, the mesh set by ``use_mesh``.
+
+    :returns: ``module`` with constrained parameters.
+    """
+    return lax.with_sharding_constraint(module, param_shardings(module, mesh))
+
+def jit_apply(
+    mesh: Optional[Mesh]=None,
+    inference_mode: bool=False,
+    batch_axis_name: Optional[Hashable]=None,
+    donate: bool=False
+) -> Callable[[Any, Any, Optional[Array]], Tuple[Any, Any]]:
+    """Jit-compiled ``Module.__call__`` that keeps the module's parameters
+    sharded as annotated.
+
+    :param mesh: Mesh. Default: None, the mesh set by ``use_mesh`` when
+        ``jit_apply`` is called.
+    :param inference_mode: Whether in inference or training mode. Default:
+        training mode.
+    :param batch_axis_name: If not None, inputs are batched along their
+        leading axis, which is vmapped over with this axis name. Default: None,
+        unbatched inputs.
+    :param donate: Whether to donate the module's buffers. Default: False.
+
+    :returns: Jit-compiled function taking a module, input features, and an
+        optional PRNG key, and returning the output features and the updated
+        module.
+    """
+    mesh = _resolve_mesh(mesh)
+
+    def apply(module, x, rng=None):
+        module = constrain(module, mesh)
+        if batch_axis_name is None:
+            y, module = module(x, rng, inference_mode)
+        else:
+            y, module = jax.vmap(
+                module.__call__,
+                in_axes=(0, None, None, None),
+                out_axes=(0, None),
+                axis_name=batch_axis_name
+            )(x, rng, inference_mode, batch_axis_name)
+        return y, constrain(module, mesh)
+
+    return jax.jit(apply, donate_argnums=(0,) if donate else ())
@@ -0,0 +1,698 @@
+"""Jit-compiled training steps."""
+from functools import partial
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, Union
+import jax
+from jax import (
+    Array,
+    numpy as jnp,
+    lax,
+    random,
+    tree_util as jtu
+)
+from jax.sharding import Mesh, NamedSharding, PartitionSpec
+from mlax.module import is_trainable_param
+from mlax.flat import FlatParams
+from mlax.precision import (
+    Policy, DynamicLossScale, all_finite, use_policy
+)
+from mlax.nn.z_norm import ZNorm, sync_z_norm
+
+def _batched_call(model, x, rng, batch_axis_name, device_axis_names=()):
+    return jax.vmap(
+        model.__call__,
+        in_axes=(0, None, None, None),
+        out_axes=(0, None),
+        axis_name=batch_axis_name
+    )(
+        x, rng, False,
+        (batch_axis_name, *device_axis_names) if device_axis_names
+        else batch_axis_name
+    )
+
+def _split_microbatches(x, n_microbatches):
+    def split(leaf):
+        if leaf.shape[0] % n_microbatches != 0:
+            raise ValueError(
+                f"Batch size {leaf.shape[0]} is not divisible by "
+                f"n_microbatches={n_microbatches}."
+            )
+        return lax.reshape(
+            leaf,
+            (n_microbatches, leaf.shape[0] // n_microbatches, *leaf.shape[1:])
+        )
+    return jtu.tree_map(split, x)
+
+def bucketed_pmean(
+    gradients: Any,
+    axis_name: Union[Hashable, Tuple[Hashable, ...]],
+    bucket_size: Optional[int]=None
+) -> FlatParams:
+    """Average gradients across devices with one collective per bucket rather
+    than one per parameter. Must be called where ``axis_name`` is bound, e.g.
+    in ``jax.shard_map`` or ``jax.pmap``.
+
+    :param gradients: Gradients, as a module or ``FlatParams``.
+    :param axis_name: Hashable or tuple of hashables representing the device
+        axes to average over.
+    :param bucket_size: Maximum number of elements per bucket. Default: None,
+        one bucket per dtype.
+
+    :returns: Averaged gradients as ``FlatParams``.
+    """
+    flat = gradients if isinstance(gradients, FlatParams) else (
+        FlatParams.pack(gradients)
+    )
+    buckets = []
+    for dtype, buffer in flat.buffers.items():
+        size = buffer.shape[0]
+        step = size if bucket_size is None else max(int(bucket_size), 1)
+        for start in range(0, size, step):
+            buckets.append(
+                (dtype, lax.slice_in_dim(buffer, start, min(start + step, size)))
+            )
+    reduced = lax.pmean([bucket for _, bucket in buckets], axis_name)
+
+    grouped = {}
+    for (dtype, _), bucket in zip(buckets, reduced):
+        grouped.setdefault(dtype, []).append(bucket)
+    buffers = {
+        dtype: lax.concatenate(group, 0) if len(group) > 1 else group[0]
+        for dtype, group in grouped.items()
+    }
+    return FlatParams(buffers, flat.treedef, flat.slots)
+
+def _padded_size(size, n_shards):
+    return -(-size // n_shards) * n_shards
+
+def _pad(buffer, n_shards):
+    padding = _padded_size(buffer.shape[0], n_shards) - buffer.shape[0]
+    if padding == 0:
+        return buffer
+    return lax.pad(
+        buffer, lax.convert_element_type(0, buffer.dtype), ((0, padding, 0),)
+    )
+
+def _state_specs(optim_state, device_axis_names):
+    return jtu.tree_map(
+        lambda leaf: PartitionSpec(device_axis_names) if jnp.ndim(leaf) == 1
+        else PartitionSpec(),
+        optim_state
+    )
+
+def init_sharded_optim_state(optimizer: Any, params: Any, mesh: Mesh) -> Any:
+    """Initialize an optimizer state sharded across all devices of ``mesh``
+    for ``make_train_step`` with ``shard_optim_state``.
+
+    Parameter buffers are padded to a multiple of the number of devices, and
+    the optimizer state's 1D buffers are split evenly across devices. Scalars
+    such as the step count are replicated.
+
+    :param optimizer: ``mlax.optim.Optimizer``.
+    :param params: Trainable parameters or ``FlatParams``.
+    :param mesh: ``jax.sharding.Mesh``.
+
+    :returns: Sharded optimizer state.
+    """
+    flat = params if isinstance(params, FlatParams) else (
+        FlatParams.pack(params)
+    )
+    n_shards = mesh.size
+    optim_state = jax.jit(optimizer.init_state)(
+        {dtype: _pad(b, n_shards) for dtype, b in flat.buffers.items()}
+    )
+    return jax.device_put(
+        optim_state,
+        jtu.tree_map(
+            lambda spec: NamedSharding(mesh, spec),
+            _state_specs(optim_state, tuple(mesh.axis_names))
+        )
+    )
+
+def _has_local_stats(node):
+    return isinstance(node, ZNorm) and node.local_axis_name != () and (
+        node.moving_mean.data is not None
+    )
+
+def _map_local_stats(model, fn):
+    def map_layer(node):
+        if _has_local_stats(node):
+            node = jtu.tree_map(lambda leaf: leaf, node)
+            node.moving_mean.data = fn(node.moving_mean.data)
+            node.moving_var.data = fn(node.moving_var.data)
+        return node
+    return jtu.tree_map(map_layer, model, is_leaf=_has_local_stats)
+
+def _any_local_stats(model):
+    return any(
+        _has_local_stats(node)
+        for node in jtu.tree_leaves(model, is_leaf=_has_local_stats)
+    )
+
+def _local_stats_specs(model, device_axis_names):
+    # Per-device running statistics are split along their leading axis, and
+    # everything else is replicated
+    return jtu.tree_map(
+        lambda node: jtu.tree_map(
+            lambda _: PartitionSpec(device_axis_names), node
+        ) if _has_local_stats(node) else PartitionSpec(),
+        model,
+        is_leaf=_has_local_stats
+    )
+
+def _check_local_stat(stat, mesh):
+    if jnp.ndim(stat) == 0 or jnp.shape(stat)[0] != mesh.size:
+        raise ValueError(
+            "Running statistics of ZNorm layers with a local_axis_name need a "
+            f"leading axis of size {mesh.size}, the number of devices. Use "
+            "shard_local_stats."
+        )
+    return stat
+
+def _squeeze(stat):
+    return lax.index_in_dim(stat, 0, keepdims=False)
+
+def _expand(stat):
+    return lax.broadcast(stat, (1,))
+
+def shard_local_stats(model: Any, mesh: Mesh) -> Any:
+    """Give the running statistics of the ``ZNorm`` layers of ``model`` that
+    have a ``local_axis_name`` a leading axis over all devices of ``mesh``,
+    split across them, for ``make_train_step`` with a ``mesh``. Each device
+    starts from the same statistics.
+
+    :param model: Initialized model.
+    :param mesh: ``jax.sharding.Mesh``.
+
+    :returns: ``model`` with per-device running statistics.
+    """
+    sharding = NamedSharding(mesh, PartitionSpec(tuple(mesh.axis_names)))
+    return _map_local_stats(
+        model,
+        lambda stat: jax.device_put(
+            jnp.broadcast_to(stat, (mesh.size, *stat.shape)), sharding
+        )
+    )
+
+@partial(jax.jit, static_argnums=1)
+def _merge_local_stats(model, mesh):
+    device_axis_names = tuple(mesh.axis_names)
+    return jax.shard_map(
+        lambda model: sync_z_norm(
+            _map_local_stats(model, _squeeze), device_axis_names
+        ),
+        mesh=mesh,
+        in_specs=(_local_stats_specs(model, device_axis_names),),
+        out_specs=PartitionSpec()
+    )(model)
+
+def merge_local_stats(model: Any, mesh: Mesh) -> Any:
+    """Merge per-device running statistics, as given by
+    ``shard_local_stats``, across the devices of ``mesh`` with
+    ``mlax.nn.sync_z_norm``, and remove their leading axis.
+
+    :param model: Model with per-device running statistics.
+    :param mesh: ``jax.sharding.Mesh``.
+
+    :returns: ``model`` with replicated running statistics.
+    """
+    if not _any_local_stats(model):
+        return model
+    return _merge_local_stats(model, mesh)
+
+def _sync_local_stats(model, mesh):
+    # Like ``merge_local_stats``, but keeps the leading axis
+    device_axis_names = tuple(mesh.axis_names)
+    specs = _local_stats_specs(model, device_axis_names)
+    # Specs are wrapped in a tuple, as older jax releases call callable
+    # ``out_specs``, such as modules, to get the specs
+    return jax.shard_map(
+        lambda model: (_map_local_stats(
+            sync_z_norm(_map_local_stats(model, _squeeze), device_axis_names),
+            _expand
+        ),),
+        mesh=mesh,
+        in_specs=(specs,),
+        out_specs=(specs,)
+    )(model)[0]
+
+def make_train_step(
+    loss_fn: Callable[[Any, Any], Array],
+    optimizer: Any,
+    metrics_fn: Optional[Callable[[Any, Any], Dict[str, Array]]]=None,
+    f=is_trainable_param,
+    batch_axis_name: Hashable="N",
+    n_microbatches: int=1,
+    mesh: Optional[Mesh]=None,
+    bucket_size: Optional[int]=None,
+    shard_optim_state: bool=False,
+    policy: Optional[Policy]=None,
+    loss_scale: Optional[DynamicLossScale]=None,
+    donate: bool=True
+) -> Callable:
+    """Build a jit-compiled training step.
+
+    The step applies the model on a batch with ``jax.vmap``, computes the
+    gradients of the loss with respect to the parameters selected by ``f``,
+    updates them with ``optimizer``, and keeps the updated non-trainable
+    parameters (e.g. ``ZNorm`` running statistics). The loss and metrics are
+    added to on-device running sums.
+
+    With ``n_microbatches`` greater than 1, the batch is split into
+    microbatches that are scanned over with ``lax.scan``, accumulating the
+    gradients in one buffer per dtype, so peak activation memory scales with
+    the microbatch size. Non-trainable parameters are threaded through the
+    microbatches in order, as if each microbatch were a batch. Each microbatch
+    is applied with the PRNG key folded with its index. Gradients, loss, and
+    metrics are averaged over the microbatches.
+
+    With a ``mesh``, the step is data-parallel over all of the mesh's axes
+    with ``jax.shard_map``. The batch is split across devices and the model
+    and optimizer state are replicated. The model is called with the mesh's
+    axis names appended to ``batch_axis_name``, so layers such as ``ZNorm``
+    reduce over the global batch, unless the mesh's axes are in their
+    ``local_axis_name``. The running statistics of such layers differ between
+    devices, so they are carried with a leading axis over the devices, split
+    across them, as given by ``shard_local_stats``, and merged with
+    ``merge_local_stats``. Gradients are averaged across devices with
+    ``bucketed_pmean``, and PRNG keys are folded with the device index.
+
+    With ``shard_optim_state``, the optimizer state is sharded across devices
+    instead of replicated, as initialized by ``init_sharded_optim_state``.
+    Gradients are reduce-scattered, each device updates its slice of the
+    flattened parameters, and the updated slices are all-gathered.
+
+    With a mixed-precision ``policy``, the trainable parameters are cast to
+    the policy's compute copy once per step, outside of the microbatch loop,
+    and the model is applied on it under ``use_policy`` with inputs cast to
+    the compute dtype and predictions cast to the output dtype. Gradients
+    with respect to the compute copy are accumulated and averaged across
+    devices in the accumulation dtype, then cast back to the dtypes of the
+    master parameters for the optimizer.
+
+    With a ``loss_scale``, the optimizer state is a tuple of the optimizer's
+    state and a ``LossScaleState``. The loss is scaled before
+    differentiation and the gradients are unscaled. If any gradient is not
+    finite, which is checked on device, the parameters, optimizer state, and
+    non-trainable parameters are left unchanged and the scale is decreased.
+    The running sums then include "skipped", the number of skipped steps.
+
+    :param loss_fn: Function mapping batched predictions and targets to a
+        scalar loss.
+    :param optimizer: ``mlax.optim.Optimizer``.
+    :param metrics_fn: Optional function mapping batched predictions and
+        targets to a dictionary of scalar metrics. Default: None.
+    :param f: Filter selecting the trainable parameters. Default: trainable
+        parameters.
+    :param batch_axis_name: Hashable representing the batch axis name passed
+        to the model. Default: "N".
+    :param n_microbatches: Number of microbatches to split each batch into.
+        Must divide the batch size. Default: 1.
+    :param mesh: Optional ``jax.sharding.Mesh`` to data-parallelize over.
+        Default: None, single device.
+    :param bucket_size: See ``bucketed_pmean``. Only used with a ``mesh``.
+        Default: None, one bucket per dtype.
+    :param shard_optim_state: Whether the optimizer state is sharded across
+        the devices of ``mesh``. Default: False, replicated.
+    :param policy: Optional ``mlax.precision.Policy``. Default: None, full
+        precision.
+    :param loss_scale: Optional ``mlax.precision.DynamicLossScale``.
+        Default: None, no loss scaling.
+    :param donate: Whether to donate the model, optimizer state, and running
+        sums buffers. Default: True.
+
+    :returns: Jit-compiled function taking a model, optimizer state, running
+        sums, batched inputs, batched targets, and a PRNG key, and returning
+        the updated model, optimizer state, and running sums. Running sums are
+        a dictionary of metric names, including "loss", to scalars, or None to
+        start from zeros.
+    """
+    n_microbatches = int(n_microbatches)
+    device_axis_names = () if mesh is None else tuple(mesh.axis_names)
+    if shard_optim_state and mesh is None:
+        raise ValueError("shard_optim_state requires a mesh.")
+
+    def _loss(trainables, non_trainables, x, y, rng, scale_state):
+        model = trainables.combine(non_trainables)
+        if policy is not None:
+            x = policy.cast_to_compute(x)
+        if policy is None:
+            preds, model = _batched_call(
+                model, x, rng, batch_axis_name, device_axis_names
+            )
+        else:
+            with use_policy(policy):
+                preds, model = _batched_call(
+                    model, x, rng, batch_axis_name, device_axis_names
+                )
+            preds = policy.cast_to_output(preds)
+        loss = loss_fn(preds, y)
+        if loss_scale is None:
+            return loss, (loss, preds, model)
+        return loss_scale.scale(loss, scale_state), (loss, preds, model)
+
+    def _gradients(trainables, non_trainables, x, y, rng, scale_state):
+        (_, (loss, preds, model)), gradients = jax.value_and_grad(
+            _loss, has_aux=True
+        )(trainables, non_trainables, x, y, rng, scale_state)
+        metrics = {"loss": loss}
+        if metrics_fn is not None:
+            metrics.update(metrics_fn(preds, y))
+        if policy is not None:
+            gradients = policy.cast_to_accum(gradients)
+        return gradients, model.partition(f)[1], metrics
+
+    def _accumulated_gradients(
+        trainables, non_trainables, x, y, rng, scale_state
+    ):
+        flat_trainables = FlatParams.pack(
+            trainables if policy is None else policy.cast_to_accum(trainables)
+        )
+
+        def body(carry, batch):
+            buffers, non_trainables = carry
+            x, y, index = batch
+            # Distinct keys per microbatch, as for distinct batches
+            micro_rng = None if rng is None else random.fold_in(rng, index)
+            gradients, non_trainables, metrics = _gradients(
+                trainables, non_trainables, x, y, micro_rng, scale_state
+            )
+            buffers = jtu.tree_map(
+                lax.add, buffers, FlatParams.pack(gradients).buffers
+            )
+            return (buffers, non_trainables), metrics
+
+        buffers = jtu.tree_map(jnp.zeros_like, flat_trainables.buffers)
+        (buffers, non_trainables), metrics = lax.scan(
+            body,
+            (buffers, non_trainables),
+            (
+                _split_microbatches(x, n_microbatches),
+                _split_microbatches(y, n_microbatches),
+                jnp.arange(n_microbatches, dtype=jnp.uint32)
+            )
+        )
+        buffers = jtu.tree_map(
+            lambda b: lax.div(
+                b, lax.convert_element_type(n_microbatches, b.dtype)
+            ),
+            buffers
+        )
+        metrics = jtu.tree_map(lambda m: jnp.mean(m, axis=0), metrics)
+        gradients = FlatParams(
+            buffers, flat_trainables.treedef, flat_trainables.slots
+        )
+        return gradients, non_trainables, metrics
+
+    def _sharded_step(gradients, trainables, optim_state):
+        n_shards = mesh.size
+        index = lax.axis_index(device_axis_names)
+        flat_gradients = gradients if isinstance(gradients, FlatParams) else (
+            FlatParams.pack(gradients)
+        )
+        flat_trainables = FlatParams.pack(trainables)
+
+        gradient_shards = {}
+        param_shards = {}
+        for dtype, buffer in flat_trainables.buffers.items():
+            shard_size = _padded_size(buffer.shape[0], n_shards) // n_shards
+            gradient_shards[dtype] = lax.div(
+                lax.psum_scatter(
+                    _pad(flat_gradients.buffers[dtype], n_shards),
+                    device_axis_names,
+                    tiled=True
+                ),
+                lax.convert_element_type(n_shards, buffer.dtype)
+            )
+            param_shards[dtype] = lax.dynamic_slice_in_dim(
+                _pad(buffer, n_shards), index * shard_size, shard_size
+            )
+        param_shards, optim_state = optimizer.update(
+            gradient_shards, param_shards, optim_state
+        )
+        buffers = {
+            dtype: lax.slice_in_dim(
+                lax.all_gather(
+                    param_shards[dtype], device_axis_names, tiled=True
+                ),
+                0, buffer.shape[0]
+            ) for dtype, buffer in flat_trainables.buffers.items()
+        }
+        return FlatParams(
+            buffers, flat_trainables.treedef, flat_trainables.slots
+        ).unpack(), optim_state
+
+    def _to_master(gradients, trainables):
+        if isinstance(gradients, FlatParams):
+            gradients = gradients.unpack()
+        return jtu.tree_map(
+            lambda g, p: lax.convert_element_type(g, p.dtype),
+            gradients, trainables
+        )
+
+    def train_step(model, optim_state, sums, x, y, rng=None):
+        trainables, non_trainables = model.partition(f)
+        scale_state = None
+        if loss_scale is not None:
+            optim_state, scale_state = optim_state
+            old = (trainables, non_trainables, optim_state)
+        params = trainables if policy is None else (
+            policy.compute_copy(trainables)
+        )
+        if device_axis_names and rng is not None:
+            rng = random.fold_in(rng, lax.axis_index(device_axis_names))
+        if n_microbatches > 1:
+            gradients, non_trainables, metrics = _accumulated_gradients(
+                params, non_trainables, x, y, rng, scale_state
+            )
+        else:
+            gradients, non_trainables, metrics = _gradients(
+                params, non_trainables, x, y, rng, scale_state
+            )
+        if loss_scale is not None:
+            gradients = loss_scale.unscale(gradients, scale_state)
+        if shard_optim_state:
+            metrics = lax.pmean(metrics, device_axis_names)
+            if loss_scale is not None:
+                # Each device only updates its slice, so agree on skipping
+                finite = lax.pmin(
+                    lax.convert_element_type(all_finite(gradients), jnp.int32),
+                    device_axis_names
+                ) == 1
+            if policy is not None:
+                gradients = _to_master(gradients, trainables)
+            trainables, optim_state = _sharded_step(
+                gradients, trainables, optim_state
+            )
+        else:
+            if device_axis_names:
+                gradients = bucketed_pmean(
+                    gradients, device_axis_names, bucket_size
+                )
+                metrics = lax.pmean(metrics, device_axis_names)
+            if loss_scale is not None:
+                finite = all_finite(gradients)
+            if policy is not None:
+                gradients = _to_master(gradients, trainables)
+            trainables, optim_state = optimizer.step(
+                gradients, trainables, optim_state
+            )
+        if loss_scale is not None:
+            trainables, non_trainables, optim_state = loss_scale.select(
+                finite, (trainables, non_trainables, optim_state), old
+            )
+            optim_state = (optim_state, loss_scale.adjust(finite, scale_state))
+            metrics["skipped"] = lax.convert_element_type(
+                lax.bitwise_not(finite), jnp.float32
+            )
+
+        if sums is None:
+            sums = {
+                name: jnp.zeros((), jnp.float32) for name in metrics
+            }
+        sums = {
+            name: lax.add(
+                sums[name], lax.convert_element_type(value, sums[name].dtype)
+            ) for name, value in metrics.items()
+        }
+        return trainables.combine(non_trainables), optim_state, sums
+
+    if mesh is not None:
+        def local_train_step(model, *args):
+            # Per-device running statistics have a leading axis of size 1 here
+            model, optim_state, sums = train_step(
+                _map_local_stats(model, _squeeze), *args
+            )
+            return _map_local_stats(model, _expand), optim_state, sums
+
+        def sharded_train_step(model, optim_state, sums, x, y, rng=None):
+            _map_local_stats(model, lambda stat: _check_local_stat(stat, mesh))
+            model_spec = _local_stats_specs(model, device_axis_names)
+            batch_spec = PartitionSpec(device_axis_names)
+            state_spec = _state_specs(optim_state, device_axis_names) if (
+                shard_optim_state
+            ) else PartitionSpec()
+            # Collectives over the vmapped batch axis are not supported with
+            # check_vma, so the specs above are not checked
+            return jax.shard_map(
+                local_train_step,
+                mesh=mesh,
+                in_specs=(
+                    model_spec, state_spec, PartitionSpec(),
+                    batch_spec, batch_spec, PartitionSpec()
+                ),
+                out_specs=(model_spec, state_spec, PartitionSpec()),
+                check_vma=False
+            )(model, optim_state, sums, x, y, rng)
+        return jax.jit(
+            sharded_train_step, donate_argnums=(0, 1, 2) if donate else ()
+        )
+    return jax.jit(train_step, donate_argnums=(0, 1, 2) if donate else ())
+
+class Trainer:
+    """Training loop state that only synchronizes with the host every
+    ``sync_every`` steps.
+    """
+    def __init__(
+        self,
+        model: Any,
+        optimizer: Any,
+        loss_fn: Callable[[Any, Any], Array],
+        metrics_fn: Optional[Callable[[Any, Any], Dict[str, Array]]]=None,
+        f=is_trainable_param,
+        batch_axis_name: Hashable="N",
+        n_microbatches: int=1,
+        mesh: Optional[Mesh]=None,
+        bucket_size: Optional[int]=None,
+        shard_optim_state: bool=False,
+        policy: Optional[Policy]=None,
+        loss_scale: Optional[DynamicLossScale]=None,
+        sync_every: int=100,
+        sync_stats_every: Optional[int]=None
+    ):
+        """Initialize a trainer.
+
+        :param model: Initialized model.
+        :param optimizer: ``mlax.optim.Optimizer``.
+        :param loss_fn: See ``make_train_step``.
+        :param metrics_fn: See ``make_train_step``. Default: None.
+        :param f: Filter selecting the trainable parameters. Default:
+            trainable parameters.
+        :param batch_axis_name: See ``make_train_step``. Default: "N".
+        :param n_microbatches: See ``make_train_step``. Default: 1.
+        :param mesh: See ``make_train_step``. Default: None.
+        :param bucket_size: See ``make_train_step``. Default: None.
+        :param shard_optim_state: See ``make_train_step``. Default: False.
+        :param policy: See ``make_train_step``. The model's trainable
+            parameters are cast to its parameter dtype. Default: None.
+        :param loss_scale: See ``make_train_step``. Default: None.
+        :param sync_every: Number of steps between host synchronizations.
+            Default: 100.
+        :param sync_stats_every: Number of steps between merges of the
+            running statistics of ``ZNorm`` layers with a ``local_axis_name``
+            across the devices of ``mesh`` with ``sync_z_norm``. Default:
+            None, only merged by ``sync_stats``.
+        """
+        self.mesh = mesh
+        model = model if policy is None else policy.apply(model)
+        self.model = model
+        if shard_optim_state:
+            self.optim_state = init_sharded_optim_state(
+                optimizer, model.partition(f)[0], mesh
+            )
+        else:
+            self.optim_state = optimizer.init(model.partition(f)[0])
+        if loss_scale is not None:
+            self.optim_state = (self.optim_state, loss_scale.init())
+        self.sync_every = int(sync_every)
+        self.sync_stats_every = None if sync_stats_every is None else (
+            int(sync_stats_every)
+        )
+        self.sums = None
+        self.n_steps = 0
+        self._n_unsynced = 0
+        self._train_step = make_train_step(
+            loss_fn, optimizer, metrics_fn, f, batch_axis_name,
+            n_microbatches, mesh, bucket_size, shard_optim_state, policy,
+            loss_scale
+        )
+        self._sync_stats = None
+        if mesh is not None and _any_local_stats(self._model):
+            self._sync_stats = jax.jit(
+                partial(_sync_local_stats, mesh=mesh), donate_argnums=0
+            )
+
+    @property
+    def model(self) -> Any:
+        """Trained model. Per-device running statistics are merged across
+        the devices of ``mesh`` without changing those used for training.
+        """
+        if self.mesh is None:
+            return self._model
+        return merge_local_stats(self._model, self.mesh)
+
+    @model.setter
+    def model(self, model: Any) -> None:
+        self._model = model if self.mesh is None else (
+            shard_local_stats(model, self.mesh)
+        )
+
+    def _zero_sums(self, x, y, rng):
+        sums = jax.eval_shape(
+            self._train_step, self._model, self.optim_state, None, x, y, rng
+        )[2]
+        return jax.tree_util.tree_map(
+            lambda s: jnp.zeros(s.shape, s.dtype), sums
+        )
+
+    def step(
+        self, x: Any, y: Any, rng: Optional[Array]=None
+    ) -> Optional[Dict[str, float]]:
+        """Perform a training step.
+
+        :param x: Batched inputs.
+        :param y: Batched targets.
+        :param rng: PRNG key. Only necessary for some models. Default: None.
+
+        :returns: Dictionary of metrics averaged over the last
+            ``sync_every`` steps if this step synchronized with the host, else
+            None.
+        """
+        if self.sums is None:
+            self.sums = self._zero_sums(x, y, rng)
+        self._model, self.optim_state, self.sums = self._train_step(
+            self._model, self.optim_state, self.sums, x, y, rng
+        )
+        self.n_steps += 1
+        self._n_unsynced += 1
+        if self.sync_stats_every is not None and (
+            self.n_steps % self.sync_stats_every == 0
+        ):
+            self.sync_stats()
+        if self._n_unsynced >= self.sync_every:
+            return self.sync()
+        return None
+
+    def sync_stats(self) -> None:
+        """Merge the per-device running statistics of ``ZNorm`` layers with a
+        ``local_axis_name`` across the devices of ``mesh``, so training
+        continues from the merged statistics. Does nothing without such
+        layers.
+        """
+        if self._sync_stats is not None:
+            self._model = self._sync_stats(self._model)
+
+    def sync(self) -> Dict[str, float]:
+        """Transfer and reset the running metrics.
+
+        :returns: Dictionary of metrics averaged over the steps since the
+            last synchronization.
+        """
+        if self._n_unsynced == 0:
+            return {}
+        metrics = {
+            name: float(value) / self._n_unsynced
+            for name, value in jax.device_get(self.sums).items()
+        }
+        self.sums = jax.tree_util.tree_map(jnp.zeros_like, self.sums)
+        self._n_unsynced = 0
+        return metrics
@@ -11,9 +11,8 @@ setup(
     long_description_content_type="text/markdown",
     packages=find_packages(include=["mlax", "mlax.*"]),
     classifiers=[
-        "Programming Language :: Python :: 3.8",
-        "Programming Language :: Python :: 3.9",
         "Programming Language :: Python :: 3.10",
+        "Programming Language :: Python :: 3.11",
         "License :: OSI Approved :: MIT License",
         "Topic :: Scientific/Engineering",
         "Topic :: Scientific/Engineering :: Mathematics",
@@ -23,9 +22,10 @@ setup(
         "Topic :: Software Development :: Libraries",
         "Topic :: Software Development :: Libraries :: Python Modules"
     ],
+    python_requires=">=3.10",
     install_requires = [
-        "jax>=0.4.8",
-        "jaxlib>=0.4.7"
+        "jax>=0.6.1",
+        "jaxlib>=0.6.1"
     ],
     extras_require = {
         "dev" : [
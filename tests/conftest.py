@@ -0,0 +1,7 @@
+import os
+
+# Expose several host devices to test sharded and parallel code on CPU
+os.environ["XLA_FLAGS"] = " ".join([
+    os.environ.get("XLA_FLAGS", ""),
+    "--xla_force_host_platform_device_count=8"
+]).strip()
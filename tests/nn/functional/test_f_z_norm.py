@@ -1,6 +1,8 @@
 import pytest
+import numpy as np
 import jax
 from jax import (
+    numpy as jnp,
     random,
     nn
 )
@@ -49,3 +51,51 @@ def test_z_norm(input, axis, batch_axis_name, expected_output):
         z_norm, in_axes=(0, None, None), axis_name=batch_axis_name
     )(input, axis, batch_axis_name)
     assert_close_array(activations, expected_output)
+
+def test_z_norm_scale_shift():
+    x = random.normal(random.PRNGKey(5), (2, 4, 8))
+    scale = random.normal(random.PRNGKey(6), (8,))
+    shift = random.normal(random.PRNGKey(7), (4, 8))
+    activations = jax.vmap(
+        z_norm, in_axes=(0, None, None, None, None, None)
+    )(x, "all", (), 1e-05, scale, shift)
+    assert_close_array(
+        activations, nn.standardize(x, (1, 2)) * scale + shift
+    )
+
+def _standardize_reference(x, axis):
+    x = np.asarray(x, np.float64)
+    mean = x.mean(axis, keepdims=True)
+    return (x - mean) / np.sqrt(x.var(axis, keepdims=True) + 1e-05)
+
+@pytest.mark.parametrize("offset", [100.0, 100.3, 37.7])
+@pytest.mark.parametrize("dtype,threshold", [
+    (jnp.float32, 1e-4), (jnp.bfloat16, 2e-2)
+])
+def test_z_norm_offset(offset, dtype, threshold):
+    # 100.3 and 37.7 are not representable in bfloat16
+    x = (random.normal(random.PRNGKey(8), (4, 64)) + offset).astype(dtype)
+    activations = z_norm(x, "all")
+    assert activations.dtype == dtype
+    assert_close_array(
+        activations.astype(jnp.float32),
+        _standardize_reference(x, (0, 1)),
+        threshold
+    )
+
+@pytest.mark.parametrize("offset", [1000.0, 100.3])
+@pytest.mark.parametrize("dtype,threshold", [
+    (jnp.float32, 1e-3), (jnp.bfloat16, 3e-2)
+])
+def test_z_norm_offset_batch_axis(offset, dtype, threshold):
+    # Statistics merged across the batch axis
+    x = (random.normal(random.PRNGKey(9), (8, 16, 3)) + offset).astype(dtype)
+    activations = jax.vmap(
+        z_norm, in_axes=(0, None, None), axis_name="N"
+    )(x, "channel_last", "N")
+    assert activations.dtype == dtype
+    assert_close_array(
+        activations.astype(jnp.float32),
+        _standardize_reference(x, (0, 1)),
+        threshold
+    )
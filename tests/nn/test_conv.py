@@ -1,11 +1,18 @@
+import json
 import pytest
+import jax
 from jax import (
     numpy as jnp,
     random,
     nn
 )
 from mlax.nn import Conv
-from mlax._test_utils import layer_test_results, assert_equal_array
+from mlax.nn import _conv_autotune
+from mlax._test_utils import (
+    layer_test_results,
+    assert_equal_array,
+    assert_close_array
+)
 
 @pytest.mark.parametrize(
     "config,x,expected_output,expected_conv_kernel",
@@ -85,3 +92,96 @@ def test_conv(config, x, expected_output, expected_conv_kernel):
 
     assert_equal_array(i_acts, expected_output)
     assert_equal_array(new_i_layer.conv_kernel.data, expected_conv_kernel)
+
+@pytest.mark.parametrize(
+    "config,x_shape,algorithms",
+    [
+        (
+            {"filter_shape": 3, "padding": "SAME"},
+            (12, 10, 3),
+            ["channel_last", "channel_first", "im2col", "fft"]
+        ),
+        (
+            {
+                "filter_shape": (5, 3),
+                "strides": 2,
+                "padding": (1, (2, 0)),
+                "data_format": "channel_first"
+            },
+            (3, 12, 10),
+            ["channel_last", "channel_first", "fft"]
+        ),
+        (
+            {"filter_shape": 1, "strides": 2},
+            (12, 10, 3),
+            ["channel_last", "channel_first", "im2col", "matmul"]
+        ),
+        (
+            {
+                "filter_shape": 3,
+                "padding": 1,
+                "input_dilation": (1, 2),
+                "filter_dilation": 2,
+                "data_format": ("HWC", "HWIO", "CHW")
+            },
+            (12, 10, 3),
+            ["channel_last", "channel_first", "im2col"]
+        ),
+        (
+            {"filter_shape": 7, "strides": (1, 3), "padding": "SAME"},
+            (12, 10, 3),
+            ["channel_last", "channel_first", "fft"]
+        ),
+    ]
+)
+def test_conv_algorithms(config, x_shape, algorithms):
+    x = random.normal(random.PRNGKey(0), (2, *x_shape))
+    config = {"rng": random.PRNGKey(1), "out_channels": 6, **config}
+    expected = Conv(**config).initialize(x[0])
+    expected = jax.vmap(lambda x: expected(x, None, True)[0])(x)
+    for algorithm in _conv_autotune.ALGORITHMS[1:]:
+        layer = Conv(**config, algorithm=algorithm)
+        if algorithm in algorithms:
+            layer = layer.initialize(x[0])
+            acts = jax.vmap(lambda x: layer(x, None, True)[0])(x)
+            assert_close_array(acts, expected)
+        else:
+            with pytest.raises(ValueError):
+                layer.initialize(x[0])
+
+def test_conv_autotune(tmp_path, monkeypatch):
+    path = tmp_path / "conv_autotune.json"
+    monkeypatch.setenv("MLAX_CONV_AUTOTUNE_CACHE", str(path))
+    n_timed = 0
+    _time = _conv_autotune._time
+    def counted_time(*args):
+        nonlocal n_timed
+        n_timed += 1
+        return _time(*args)
+    monkeypatch.setattr(_conv_autotune, "_time", counted_time)
+
+    x = random.normal(random.PRNGKey(0), (4, 8, 8, 3))
+    config = {
+        "rng": random.PRNGKey(1), "out_channels": 4, "filter_shape": 3
+    }
+    expected = Conv(**config).initialize(x[0])
+    expected = jax.vmap(lambda x: expected(x, None, True)[0])(x)
+    layer = Conv(**config, algorithm="autotune").initialize(x[0])
+    assert n_timed == 5
+    acts = jax.jit(jax.vmap(lambda x: layer(x, None, True)[0]))(x)
+    assert_close_array(acts, expected)
+
+    # Tuned once per shape, and the winner is cached on disk
+    assert n_timed == 5
+    cache = json.loads(path.read_text())
+    assert len(cache) == 1
+    entry, = cache.values()
+    assert entry["algorithm"] in entry["times"]
+
+    # A fresh process reads the cache from disk
+    _conv_autotune._caches.clear()
+    Conv(**config, algorithm="autotune").initialize(x[0])
+    assert n_timed == 5
+
+    with pytest.raises(ValueError):
+        Conv(**config, algorithm="winograd")
@@ -0,0 +1,100 @@
+import pytest
+import jax
+from jax import (
+    random,
+    nn
+)
+from mlax.nn import (
+    Linear,
+    Conv,
+    ZNorm,
+    Scaler,
+    Bias,
+    F,
+    Series,
+    Parallel,
+    Folded,
+    fold
+)
+from mlax._test_utils import assert_close_array
+
+def _apply(model, x, inference_mode):
+    return jax.vmap(
+        model.__call__,
+        in_axes=(0, None, None, None),
+        out_axes=(0, None),
+        axis_name="N"
+    )(x, None, inference_mode, "N")
+
+def _trained(model, x):
+    # Initialize, then update ZNorm's running statistics
+    _, model = _apply(model, x, False)
+    _, model = _apply(model, x, False)
+    return model
+
+def _random_initializer(key, shape, dtype):
+    return random.uniform(key, shape, dtype, 0.5, 1.5)
+
+def test_fold_linear():
+    x = random.normal(random.PRNGKey(0), (8, 5, 4))
+    model = _trained(Series([
+        Linear(random.PRNGKey(1), 3, transposed_kernel=True),
+        ZNorm(random.PRNGKey(2), "channel_last"),
+        Scaler(random.PRNGKey(3), (0, -1), _random_initializer),
+        Bias(random.PRNGKey(4), (0, -1), _random_initializer),
+        F(nn.relu),
+        Linear(random.PRNGKey(5), 2),
+        Scaler(random.PRNGKey(6), (), _random_initializer),
+        # Not per channel
+        Bias(random.PRNGKey(7), (-1, -1), _random_initializer)
+    ]), x)
+    folded = fold(model)
+    layers = folded.layers.data
+    assert [type(layer) for layer in layers] == [Folded, F, Folded, Bias]
+    assert isinstance(layers[0].layer, Linear)
+
+    expected, _ = _apply(model, x, True)
+    acts, _ = _apply(folded, x, True)
+    assert_close_array(acts, expected)
+
+@pytest.mark.parametrize("data_format", ["channel_last", "channel_first"])
+def test_fold_conv(data_format):
+    channel_last = data_format == "channel_last"
+    x = random.normal(
+        random.PRNGKey(0), (8, 6, 6, 3) if channel_last else (8, 3, 6, 6)
+    )
+    in_features = (0, 0, -1) if channel_last else (-1, 0, 0)
+    model = _trained(Series([
+        Conv(
+            random.PRNGKey(1), 4, 3, padding=1, data_format=data_format
+        ),
+        ZNorm(random.PRNGKey(2), data_format),
+        Scaler(random.PRNGKey(3), in_features, _random_initializer),
+        Bias(random.PRNGKey(4), in_features, _random_initializer),
+        F(nn.relu)
+    ]), x)
+    folded = fold(model)
+    assert len(folded.layers.data) == 2
+    assert isinstance(folded.layers.data[0], Folded)
+
+    expected, _ = _apply(model, x, True)
+    acts, _ = _apply(folded, x, True)
+    assert_close_array(acts, expected)
+
+def test_fold_nested():
+    x = random.normal(random.PRNGKey(0), (8, 4))
+    model = _trained(Parallel([
+        Series([
+            Linear(random.PRNGKey(1), 3),
+            ZNorm(random.PRNGKey(2), "channel_last")
+        ]),
+        Series([Linear(random.PRNGKey(3), 3), F(nn.relu)])
+    ]), [x, x])
+    folded = fold(model)
+    assert isinstance(folded.layers.data[0].layers.data[0], Folded)
+    assert isinstance(folded.layers.data[1].layers.data[0], Linear)
+
+    expected, _ = _apply(model, [x, x], True)
+    acts, _ = _apply(folded, [x, x], True)
+    assert_close_array(acts[0], expected[0])
+    assert_close_array(acts[1], expected[1])
@@ -0,0 +1,68 @@
+from jax import (
+    numpy as jnp,
+    random
+)
+import pytest
+from mlax.nn import HashEmbed
+from mlax._test_utils import layer_test_results, assert_equal_array
+
+def range_initializer(key, shape, dtype):
+    return jnp.broadcast_to(
+        jnp.arange(shape[0], dtype=dtype)[:, None], shape
+    )
+
+@pytest.mark.parametrize(
+    "config,x",
+    [
+        (
+            {
+                "rng": random.PRNGKey(0),
+                "n_buckets": 7,
+                "embed_dim": 4,
+                "n_hashes": 2,
+                "embed_initializer": range_initializer,
+                "dtype": jnp.float32
+            },
+            jnp.arange(20)
+        ),
+        (
+            {
+                "rng": random.PRNGKey(1),
+                "n_buckets": 16,
+                "embed_dim": 3,
+                "n_hashes": 3,
+                "embed_initializer": range_initializer,
+                "dtype": jnp.int32
+            },
+            jnp.array([0, 10**9, -1], jnp.int32)
+        )
+    ]
+)
+def test_hash_embed(config, x):
+    layer, (t_acts, new_t_layer), (i_acts, new_i_layer) = layer_test_results(
+        HashEmbed, config, x
+    )
+    assert layer.embed_kernel.data.shape == (
+        config["n_buckets"], config["embed_dim"]
+    )
+    buckets = layer.buckets(x)
+    assert buckets.shape == (*x.shape, config["n_hashes"])
+    assert ((buckets >= 0) & (buckets < config["n_buckets"])).all()
+
+    # Each embedding is the sum of its buckets' rows
+    expected = jnp.broadcast_to(
+        jnp.sum(buckets, -1, dtype=config["dtype"])[:, None],
+        (*x.shape, config["embed_dim"])
+    )
+    assert_equal_array(t_acts, expected)
+    assert_equal_array(i_acts, expected)
+    assert_equal_array(new_t_layer.hash_seeds.data, layer.hash_seeds.data)
+
+def test_hash_embed_collisions():
+    layer = HashEmbed(random.PRNGKey(0), 1024, 8, n_hashes=2).initialize(
+        jnp.zeros((), jnp.int32)
+    )
+    buckets = layer.buckets(jnp.arange(10000))
+    # Distinct ids rarely share both buckets
+    pairs = buckets[:, 0] * 1024 + buckets[:, 1]
+    assert len(jnp.unique(pairs)) > 9000
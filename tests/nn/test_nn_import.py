@@ -7,11 +7,23 @@ def test_nn_import():
     assert hasattr(nn, "FRng")
     assert hasattr(nn, "Series")
     assert hasattr(nn, "SeriesRng")
+    assert hasattr(nn, "Stacked")
+    assert hasattr(nn, "StackedRng")
+    assert hasattr(nn, "Remat")
+    assert hasattr(nn, "RematRng")
     assert hasattr(nn, "Scaler")
     assert hasattr(nn, "Conv")
     assert hasattr(nn, "ZNorm")
+    assert hasattr(nn, "sync_z_norm")
     assert hasattr(nn, "Parallel")
     assert hasattr(nn, "ParallelRng")
     assert hasattr(nn, "Embed")
+    assert hasattr(nn, "HashEmbed")
+    assert hasattr(nn, "PQEmbed")
     assert hasattr(nn, "Recurrent")
     assert hasattr(nn, "RecurrentRng")
+    assert hasattr(nn, "QuantizedLinear")
+    assert hasattr(nn, "QuantizedConv")
+    assert hasattr(nn, "quantize")
+    assert hasattr(nn, "Folded")
+    assert hasattr(nn, "fold")
@@ -0,0 +1,69 @@
+from jax import (
+    numpy as jnp,
+    random
+)
+import pytest
+from mlax.nn import Embed, PQEmbed, pq_embed
+from mlax._test_utils import layer_test_results, assert_close_array
+
+@pytest.mark.parametrize(
+    "n_centroids,code_dtype", [(4, jnp.uint8), (300, jnp.uint16)]
+)
+def test_pq_embed(n_centroids, code_dtype):
+    config = {
+        "rng": random.PRNGKey(0),
+        "vocab_size": 10,
+        "embed_dim": 6,
+        "n_subspaces": 3,
+        "n_centroids": n_centroids
+    }
+    x = jnp.arange(11)
+    layer, (t_acts, new_t_layer), (i_acts, new_i_layer) = layer_test_results(
+        PQEmbed, config, x
+    )
+    assert layer.codebooks.data.shape == (3, n_centroids, 2)
+    assert layer.codes.data.shape == (10, 3)
+    assert layer.codes.data.dtype == code_dtype
+
+    expected = jnp.concatenate([
+        jnp.stack([
+            jnp.concatenate([
+                layer.codebooks.data[m, int(layer.codes.data[i, m])]
+                for m in range(3)
+            ]) for i in range(10)
+        ]),
+        jnp.full((1, 6), jnp.nan)
+    ])
+    assert_close_array(t_acts, expected)
+    assert_close_array(i_acts, expected)
+
+    with pytest.raises(ValueError):
+        PQEmbed(random.PRNGKey(0), 10, 7, 3)
+
+def test_pq_embed_from_embed():
+    # Embeddings with 4 distinct subvectors per subspace are compressed
+    # without loss
+    def initializer(key, shape, dtype):
+        return jnp.tile(
+            random.normal(key, (4, shape[1]), dtype), (shape[0] // 4, 1)
+        )
+    x = jnp.arange(64)
+    embed = Embed(random.PRNGKey(0), 64, 8, initializer).initialize(x[0])
+    pq = PQEmbed.from_embed(embed, 2, 4, n_iters=5)
+    assert pq.initialized
+    assert pq.codes.data.shape == (64, 2)
+
+    expected, _ = embed(x, None, inference_mode=True)
+    acts, _ = pq(x, None, inference_mode=True)
+    assert_close_array(acts, expected)
+
+def test_kmeans_chunks(monkeypatch):
+    points = random.normal(random.PRNGKey(0), (50, 3))
+    rng = random.PRNGKey(1)
+    expected_codes, expected_centroids = pq_embed._kmeans(points, 6, 4, rng)
+    # Chunks that do not divide the number of points
+    monkeypatch.setattr(pq_embed, "KMEANS_CHUNK_SIZE", 8)
+    codes, centroids = pq_embed._kmeans(points, 6, 4, rng)
+    assert codes.shape == (50,)
+    assert_close_array(centroids, expected_centroids)
+    assert_close_array(codes, expected_codes)
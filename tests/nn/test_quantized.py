@@ -0,0 +1,94 @@
+import pytest
+import jax
+from jax import (
+    numpy as jnp,
+    random,
+    nn
+)
+from mlax.nn import (
+    Linear,
+    Conv,
+    Bias,
+    F,
+    Series,
+    Stacked,
+    QuantizedLinear,
+    QuantizedConv,
+    quantize
+)
+from mlax._test_utils import assert_equal_array, assert_close_array
+
+@pytest.mark.parametrize("transposed_kernel", [False, True])
+def test_quantized_linear(transposed_kernel):
+    x = jnp.ones((2, 4), jnp.float32)
+    layer = Linear(
+        random.PRNGKey(0), 3,
+        transposed_kernel=transposed_kernel,
+        kernel_initializer=nn.initializers.constant(0.5)
+    ).initialize(x)
+    q_layer = QuantizedLinear(layer)
+    assert q_layer.linear_kernel.data.dtype == jnp.int8
+    assert_equal_array(q_layer.linear_kernel.data, jnp.full(
+        (3, 4) if transposed_kernel else (4, 3), 127, jnp.int8
+    ))
+    assert_close_array(q_layer.linear_scale.data, jnp.full((3,), 0.5 / 127))
+
+    y, _ = q_layer(x, None, inference_mode=True)
+    assert_close_array(y, jnp.full((2, 3), 2.0))
+
+@pytest.mark.parametrize("data_format", ["channel_last", "channel_first"])
+def test_quantized_conv(data_format):
+    x = random.normal(random.PRNGKey(1), (3, 8, 8) if (
+        data_format == "channel_first"
+    ) else (8, 8, 3))
+    layer = Conv(
+        random.PRNGKey(0), 4, 3, padding=1, data_format=data_format
+    ).initialize(x)
+    q_layer = QuantizedConv(layer)
+    assert q_layer.conv_kernel.data.dtype == jnp.int8
+    assert q_layer.conv_scale.data.shape == (4,)
+
+    expected, _ = layer(x, None, inference_mode=True)
+    y, _ = q_layer(x, None, inference_mode=True)
+    assert y.shape == expected.shape
+    assert_close_array(y, expected, 2e-2)
+
+def test_quantize_uninitialized():
+    with pytest.raises(ValueError, match="uninitialized Linear"):
+        QuantizedLinear(Linear(random.PRNGKey(0), 3))
+    with pytest.raises(ValueError, match="uninitialized Conv"):
+        QuantizedConv(Conv(random.PRNGKey(0), 4, 3))
+    with pytest.raises(ValueError):
+        quantize(Series([Linear(random.PRNGKey(0), 3)]))
+
+def test_quantize():
+    x = random.normal(random.PRNGKey(3), (6, 6, 3))
+    model = Series([
+        Conv(random.PRNGKey(0), 8, 3, padding=1),
+        F(jax.nn.relu),
+        F(lambda x: jnp.reshape(x, (-1,))),
+        Linear(random.PRNGKey(1), 10),
+        Bias(random.PRNGKey(2), -1)
+    ]).initialize(x)
+    q_model = quantize(model)
+    assert isinstance(q_model.layers.data[0], QuantizedConv)
+    assert isinstance(q_model.layers.data[3], QuantizedLinear)
+    assert isinstance(q_model.layers.data[4], Bias)
+
+    expected, _ = model(x, None, inference_mode=True)
+    y, _ = jax.jit(
+        lambda model, x: model(x, None, inference_mode=True)
+    )(q_model, x)
+    assert_close_array(y, expected, 2e-2)
+
+def test_quantize_stacked():
+    x = random.normal(random.PRNGKey(3), (4,))
+    _, model = Stacked([
+        Linear(random.PRNGKey(i), 4) for i in range(3)
+    ])(x, None)
+    q_model = quantize(model)
+    assert q_model.layers.data.linear_scale.data.shape == (3, 4)
+
+    expected, _ = model(x, None, inference_mode=True)
+    y, _ = q_model(x, None, inference_mode=True)
+    assert_close_array(y, expected, 2e-2)
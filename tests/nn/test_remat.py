@@ -0,0 +1,85 @@
+import pytest
+import jax
+from jax import (
+    numpy as jnp,
+    random,
+    tree_util as jtu
+)
+from jax.ad_checkpoint import checkpoint_name
+from mlax.nn import (
+    Remat,
+    RematRng,
+    Series,
+    SeriesRng,
+    Linear,
+    Bias,
+    F,
+    FRng
+)
+from mlax._test_utils import assert_close_array
+
+def _block():
+    return Series([
+        Linear(random.PRNGKey(0), 4),
+        Bias(random.PRNGKey(1), -1),
+        F(lambda x: checkpoint_name(jax.nn.tanh(x), "act"))
+    ])
+
+def _loss(model, x, rng=None):
+    y, _ = model(x, rng)
+    return jnp.sum(y ** 2)
+
+@pytest.mark.parametrize(
+    "policy,names",
+    [
+        ("nothing", ()),
+        ("dots", ()),
+        ("dots_no_batch", ()),
+        ("names", ("act",)),
+        (jax.checkpoint_policies.everything_saveable, ())
+    ]
+)
+def test_remat(policy, names):
+    x = random.normal(random.PRNGKey(2), (4,))
+    expected_y, model = Series([_block(), _block()])(x, None)
+    y, remat_model = Series([Remat(_block(), policy, names), _block()])(
+        x, None
+    )
+    assert_close_array(y, expected_y)
+    assert isinstance(remat_model.layers.data[0], Remat)
+
+    expected = jax.grad(_loss)(model, x)
+    grads = jax.grad(_loss)(remat_model, x)
+    jtu.tree_map(
+        assert_close_array,
+        jtu.tree_leaves(grads), jtu.tree_leaves(expected)
+    )
+    assert "remat" in str(jax.make_jaxpr(jax.grad(_loss))(remat_model, x))
+
+def test_remat_rng():
+    x = random.normal(random.PRNGKey(2), (4,))
+    rng = random.PRNGKey(3)
+    def block():
+        return SeriesRng([
+            Linear(random.PRNGKey(0), 4),
+            FRng(lambda x, rng: x + random.normal(rng, x.shape))
+        ])
+
+    expected_y, model = SeriesRng([block(), Linear(random.PRNGKey(4), 4)])(
+        x, rng
+    )
+    y, remat_model = SeriesRng(
+        [RematRng(block()), Linear(random.PRNGKey(4), 4)]
+    )(x, rng)
+    assert_close_array(y, expected_y)
+
+    expected = jax.grad(_loss)(model, x, rng)
+    grads = jax.grad(_loss)(remat_model, x, rng)
+    jtu.tree_map(
+        assert_close_array,
+        jtu.tree_leaves(grads), jtu.tree_leaves(expected)
+    )
+
+def test_remat_invalid_policy():
+    with pytest.raises(ValueError):
+        Remat(_block(), "everything")
@@ -0,0 +1,155 @@
+import pytest
+import jax
+from jax import (
+    numpy as jnp,
+    random,
+    tree_util as jtu
+)
+from mlax import Module, Parameter
+from mlax.nn import (
+    Stacked,
+    StackedRng,
+    Series,
+    SeriesRng,
+    Linear,
+    Bias,
+    ZNorm,
+    F,
+    FRng
+)
+from mlax._test_utils import assert_close_array
+
+def _block(i):
+    # Each block has its own lambda
+    return Series([
+        Linear(random.PRNGKey(2 * i), 4),
+        Bias(random.PRNGKey(2 * i + 1), -1),
+        ZNorm(random.PRNGKey(0), "channel_last"),
+        F(lambda x: jax.nn.relu(x))
+    ])
+
+class _Offset(Module):
+    def __init__(self, rng):
+        super().__init__()
+        self.rng = rng  # Not a PRNG key
+        self.offset = Parameter(trainable=True, data=jnp.zeros(4))
+        self.initialized = True
+
+    def setup(self, x):
+        pass
+
+    def forward(self, x, rng=None, inference_mode=False, batch_axis_name=()):
+        return x + self.rng + self.offset.data
+
+def _apply(model, x, rng=None, inference_mode=False):
+    return jax.vmap(
+        model.__call__,
+        in_axes=(0, None, None, None),
+        out_axes=(0, None),
+        axis_name="N"
+    )(x, rng, inference_mode, "N")
+
+def _assert_stacked(stacked, series):
+    for i, layer in enumerate(series.layers.data):
+        for a, b in zip(
+            jtu.tree_leaves(stacked.layers.data), jtu.tree_leaves(layer)
+        ):
+            assert_close_array(a[i], b)
+
+def test_stacked():
+    x = random.normal(random.PRNGKey(7), (8, 4))
+    series = Series([_block(i) for i in range(3)])
+    stacked = Stacked([_block(i) for i in range(3)])
+    assert isinstance(stacked.layers.data, list)
+
+    # Lazy initialization matches Series
+    expected, series = _apply(series, x)
+    acts, stacked = _apply(stacked, x)
+    assert stacked.initialized
+    assert not isinstance(stacked.layers.data, list)
+    assert_close_array(acts, expected)
+    _assert_stacked(stacked, series)
+
+    # Scanned application matches Series
+    for inference_mode in (False, True):
+        expected, series = _apply(series, x, None, inference_mode)
+        acts, stacked = _apply(stacked, x, None, inference_mode)
+        assert_close_array(acts, expected)
+    _assert_stacked(stacked, series)
+
+    # Initialized layers are stacked eagerly
+    layers = [_block(i).initialize(x[0]) for i in range(3)]
+    assert not isinstance(Stacked(layers).layers.data, list)
+    with pytest.raises(ValueError):
+        Stacked([Linear(random.PRNGKey(0), 4), Linear(random.PRNGKey(1), 3)])(
+            x[0], None
+        )
+
+    # Layers with parameters of the same shapes but different hyperparameters
+    with pytest.raises(ValueError):
+        Stacked([
+            Linear(random.PRNGKey(0), 4).initialize(x[0]),
+            Linear(
+                random.PRNGKey(1), 4, precision="highest"
+            ).initialize(x[0])
+        ])
+    with pytest.raises(ValueError):
+        Stacked([
+            Series([Linear(random.PRNGKey(0), 4), F(jax.nn.relu)]),
+            Series([Linear(random.PRNGKey(1), 4), F(jax.nn.gelu)])
+        ])(x[0], None)
+
+    # Functions with the same code but different captured values, or methods
+    # bound to different instances
+    def scaled(scale):
+        return Series([Linear(random.PRNGKey(0), 4), F(lambda x: x * scale)])
+    with pytest.raises(ValueError):
+        Stacked([scaled(scale) for scale in (1, 2, 3)])(x[0], None)
+    offsets = [_Offset(1), _Offset(2)]
+    with pytest.raises(ValueError):
+        Stacked([
+            Series([Linear(random.PRNGKey(0), 4), F(offset.forward)])
+            for offset in offsets
+        ])(x[0], None)
+    acts, _ = Stacked([scaled(2) for _ in range(3)])(x[0], None)
+    assert acts.shape == (4,)
+
+    # Only PRNG keys are exempt, not hyperparameters named ``rng``
+    with pytest.raises(ValueError):
+        Stacked([_Offset(1), _Offset(2)])
+
+@pytest.mark.parametrize("n_layers", [1, 3])
+def test_stacked_rng(n_layers):
+    x = random.normal(random.PRNGKey(7), (4,))
+    rng = random.PRNGKey(8)
+    # Stacked layers must share the same function
+    noise = lambda x, rng: x + random.normal(rng, x.shape)
+    def layers():
+        return [
+            SeriesRng([Linear(random.PRNGKey(i), 4), FRng(noise)])
+            for i in range(n_layers)
+        ]
+
+    expected, series = SeriesRng(layers())(x, rng)
+    acts, stacked = StackedRng(layers())(x, rng)
+    assert_close_array(acts, expected)
+
+    expected, _ = series(x, rng)
+    acts, _ = jax.jit(lambda m, x, rng: m(x, rng))(stacked, x, rng)
+    assert_close_array(acts, expected)
+
+def test_stacked_no_params():
+    x = jnp.ones((4,))
+    double = lambda x: 2 * x
+    stacked = Stacked([F(double) for _ in range(3)])
+    for _ in range(2):
+        acts, stacked = stacked(x, None)
+        assert_close_array(acts, 8 * x)
+
+    noise = lambda x, rng: x + random.normal(rng, x.shape)
+    rng = random.PRNGKey(0)
+    expected, _ = SeriesRng([FRng(noise) for _ in range(3)])(x, rng)
+    stacked = StackedRng([FRng(noise) for _ in range(3)])
+    for _ in range(2):
+        acts, stacked = stacked(x, rng)
+        assert_close_array(acts, expected)
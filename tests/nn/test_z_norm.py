@@ -1,11 +1,11 @@
 import pytest
+import jax
 from jax import (
     numpy as jnp,
     random,
-    nn,
-    lax
+    nn
 )
-from mlax.nn import ZNorm
+from mlax.nn import ZNorm, sync_z_norm
 from mlax._test_utils import (
     layer_test_results,
     assert_equal_array,
@@ -114,3 +114,55 @@ def test_batch_norm(
     assert_close_array(i_acts, expected_infer_output)
     assert_equal_array(new_i_layer.moving_mean.data, initial_moving_mean)
     assert_equal_array(new_i_layer.moving_var.data, initial_moving_var)
+
+def test_local_axis_name():
+    # (devices, batch, features), each device's batch has a different mean
+    x = random.normal(random.PRNGKey(0), (4, 8, 3)) + jnp.arange(4.0)[
+        :, None, None
+    ]
+    layer = ZNorm(
+        random.PRNGKey(1), "channel_last", local_axis_name="D"
+    ).initialize(x[0, 0])
+
+    def apply(layer, x):
+        return jax.vmap(
+            layer.__call__,
+            in_axes=(0, None, None, None),
+            out_axes=(0, None),
+            axis_name="N"
+        )(x, None, False, ("N", "D"))
+
+    acts, layers = jax.vmap(
+        apply, in_axes=(None, 0), axis_name="D"
+    )(layer, x)
+    assert_close_array(acts, nn.standardize(x, 1))
+    assert_close_array(layers.moving_mean.data, x.mean(1) * 0.1)
+    assert_close_array(layers.moving_var.data, 0.9 + x.var(1) * 0.1)
+
+    synced = jax.vmap(
+        lambda layer: sync_z_norm(layer, "D"), axis_name="D"
+    )(layers)
+    moving_mean = layers.moving_mean.data
+    moving_var = layers.moving_var.data
+    expected_mean = moving_mean.mean(0)
+    # Mean of the variances plus variance of the means
+    expected_var = (
+        moving_var.mean(0) + ((moving_mean - expected_mean) ** 2).mean(0)
+    )
+    assert_close_array(
+        synced.moving_mean.data, jnp.broadcast_to(expected_mean, (4, 3))
+    )
+    assert_close_array(
+        synced.moving_var.data, jnp.broadcast_to(expected_var, (4, 3))
+    )
+
+    # Large per-device means with a small variance, where E[x^2] - E[x]^2
+    # cancels to 0 in float32
+    layers.moving_mean.data = 3000.0 + jnp.array(
+        [-0.5, -0.25, 0.25, 0.5]
+    )[:, None] * jnp.ones((4, 3))
+    layers.moving_var.data = jnp.full((4, 3), 0.01)
+    synced = jax.vmap(
+        lambda layer: sync_z_norm(layer, "D"), axis_name="D"
+    )(layers)
+    assert_close_array(synced.moving_var.data, jnp.full((4, 3), 0.16625))
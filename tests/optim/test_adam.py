@@ -0,0 +1,71 @@
+import pytest
+from jax import (
+    numpy as jnp,
+    random,
+    tree_util as jtu
+)
+from mlax.nn import Linear, Bias
+from mlax.optim import Adam, AdamW
+from mlax._test_utils import assert_close_array
+
+def _reference(p, g, m, v, count, lr, b1, b2, eps, weight_decay):
+    m = b1 * m + (1 - b1) * g
+    v = b2 * v + (1 - b2) * g ** 2
+    m_hat = m / (1 - b1 ** count)
+    v_hat = v / (1 - b2 ** count)
+    return p - lr * (m_hat / (jnp.sqrt(v_hat) + eps) + weight_decay * p), m, v
+
+@pytest.mark.parametrize(
+    "cls,config",
+    [
+        (Adam, {"lr": 0.01}),
+        (Adam, {"lr": 0.1, "b1": 0.8, "b2": 0.99, "eps": 1e-6}),
+        (AdamW, {"lr": 0.01, "weight_decay": 0.1})
+    ]
+)
+def test_adam(cls, config):
+    optimizer = cls(**config)
+    model = Linear(random.PRNGKey(0), 4).initialize(jnp.ones((2, 3)))
+    params = model.partition()[0]
+    state = optimizer.init(params)
+
+    p = params.linear_kernel.data
+    m = jnp.zeros_like(p)
+    v = jnp.zeros_like(p)
+    for count in range(1, 4):
+        g = jnp.full_like(p, 0.1 * count)
+        grads = jtu.tree_map(lambda _: g, params)
+        params, state = optimizer.step(grads, params, state)
+        p, m, v = _reference(
+            p, g, m, v, count,
+            config["lr"],
+            config.get("b1", 0.9),
+            config.get("b2", 0.999),
+            config.get("eps", 1e-8),
+            config.get("weight_decay", 0.0)
+        )
+        assert_close_array(params.linear_kernel.data, p, 1e-05)
+    assert int(state.count) == 3
+
+def test_adam_bfloat16():
+    model = Bias(random.PRNGKey(0), 0, dtype=jnp.bfloat16).initialize(
+        jnp.ones((3,))
+    )
+    params = model.partition()[0]
+    optimizer = Adam(1e-3)
+    state = optimizer.init(params)
+    assert state.mu["bfloat16"].dtype == jnp.float32
+    assert state.nu["bfloat16"].dtype == jnp.float32
+
+    p = params.bias_kernel.data
+    for count in range(1, 4):
+        grads = jtu.tree_map(
+            lambda p: jnp.full_like(p, 0.1 * count), params
+        )
+        params, state = optimizer.step(grads, params, state)
+    # Each step moves the weights by about the learning rate
+    assert params.bias_kernel.data.dtype == jnp.bfloat16
+    assert_close_array(
+        params.bias_kernel.data.astype(jnp.float32),
+        p.astype(jnp.float32) - 3e-3, 1e-02
+    )
@@ -0,0 +1,9 @@
+from mlax import optim
+
+def test_optim_import():
+    assert hasattr(optim, "Optimizer")
+    assert hasattr(optim, "SGD")
+    assert hasattr(optim, "SGDState")
+    assert hasattr(optim, "Adam")
+    assert hasattr(optim, "AdamW")
+    assert hasattr(optim, "AdamState")
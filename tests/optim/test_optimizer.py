@@ -0,0 +1,30 @@
+import pytest
+from jax import (
+    numpy as jnp,
+    random,
+    tree_util as jtu
+)
+from mlax.nn import Linear
+from mlax.optim import SGD, Adam, AdamW
+from mlax._test_utils import assert_equal_array
+
+@pytest.mark.parametrize("cls", [SGD, Adam, AdamW])
+def test_lr_schedule_count(cls):
+    counts = []
+    def schedule(count):
+        counts.append(int(count))
+        return jnp.where(count == 0, 0.0, 0.1)
+    optimizer = cls(schedule)
+    model = Linear(random.PRNGKey(0), 4).initialize(jnp.ones((2, 3)))
+    params = model.partition()[0]
+    state = optimizer.init(params)
+    grads = jtu.tree_map(jnp.ones_like, params)
+
+    # Schedules are called with the number of steps taken so far
+    new_params, state = optimizer.step(grads, params, state)
+    assert_equal_array(new_params.linear_kernel.data, params.linear_kernel.data)
+    new_params, state = optimizer.step(grads, new_params, state)
+    assert not jnp.array_equal(
+        new_params.linear_kernel.data, params.linear_kernel.data
+    )
+    assert counts == [0, 1]
@@ -0,0 +1,72 @@
+import pytest
+from jax import (
+    numpy as jnp,
+    random,
+    tree_util as jtu
+)
+from mlax import FlatParams
+from mlax.nn import Series, Linear, Bias
+from mlax.optim import SGD
+from mlax._test_utils import assert_close_array
+
+def _trainables():
+    model = Series([
+        Linear(random.PRNGKey(0), 4),
+        Bias(random.PRNGKey(1), (0, -1), dtype=jnp.bfloat16)
+    ]).initialize(jnp.ones((2, 3)))
+    return model.partition()[0]
+
+def _reference(p, g, v, lr, momentum, nesterov):
+    v = v * momentum + g * lr
+    update = v * momentum + g * lr if nesterov else v
+    return p - update, v
+
+@pytest.mark.parametrize(
+    "config",
+    [
+        {"lr": 0.1},
+        {"lr": 0.1, "momentum": 0.9},
+        {"lr": lambda count: 0.1 / (count + 1), "momentum": 0.9, "nesterov": True}
+    ]
+)
+def test_sgd(config):
+    optimizer = SGD(**config)
+    params = _trainables()
+    grads = jtu.tree_map(lambda p: jnp.full_like(p, 0.5), params)
+    state = optimizer.init(params)
+
+    lr = config["lr"]
+    momentum = config.get("momentum", 0.0)
+    nesterov = config.get("nesterov", False)
+    expected = params
+    velocities = jtu.tree_map(jnp.zeros_like, params)
+    step = optimizer.jit()
+    for count in range(3):
+        _lr = lr(count) if callable(lr) else lr
+        updated = jtu.tree_map(
+            lambda p, g, v: _reference(p, g, v, _lr, momentum, nesterov),
+            expected, grads, velocities
+        )
+        expected = jtu.tree_map(lambda _, pv: pv[0], params, updated)
+        velocities = jtu.tree_map(lambda _, pv: pv[1], params, updated)
+        params, state = step(
+            jtu.tree_map(jnp.copy, grads), params, state
+        )
+
+    assert int(state.count) == 3
+    assert jtu.tree_structure(params) == jtu.tree_structure(expected)
+    jtu.tree_map(
+        lambda a, b: assert_close_array(a, b, 1e-02), params, expected
+    )
+
+def test_sgd_flat_params():
+    optimizer = SGD(0.1, 0.9)
+    params = FlatParams.pack(_trainables())
+    state = optimizer.init(params)
+    assert set(state.velocities.keys()) == {"float32", "bfloat16"}
+    grads = jtu.tree_map(lambda b: jnp.ones_like(b), params)
+    new_params, state = optimizer.step(grads, params, state)
+    assert isinstance(new_params, FlatParams)
+    assert_close_array(
+        new_params.buffers["float32"], params.buffers["float32"] - 0.1
+    )
@@ -0,0 +1,51 @@
+import jax
+from jax import (
+    numpy as jnp,
+    random,
+    tree_util as jtu
+)
+from mlax import FlatParams
+from mlax.nn import Series, Linear, Bias, ZNorm
+from mlax._test_utils import assert_equal_array, assert_equal_pytree
+
+def _model():
+    model = Series([
+        Linear(random.PRNGKey(0), 4),
+        Bias(random.PRNGKey(1), (0, -1), dtype=jnp.bfloat16),
+        Linear(random.PRNGKey(2), 3),
+        ZNorm(random.PRNGKey(3), "channel_last")
+    ])
+    return model.initialize(jnp.ones((2, 5)))
+
+def test_flat_params():
+    model = _model()
+    flat, non_trainables = FlatParams.partition(model)
+    assert set(flat.buffers.keys()) == {"float32", "bfloat16"}
+    assert flat.sizes == {"float32": 5 * 4 + 4 * 3, "bfloat16": 4}
+    assert_equal_array(
+        flat.buffers["float32"][:20],
+        model.layers.data[0].linear_kernel.data.reshape(-1)
+    )
+
+    trainables = flat.unpack()
+    assert_equal_pytree(trainables, model.filter())
+    assert jtu.tree_structure(trainables) == jtu.tree_structure(model.filter())
+    combined = flat.combine(non_trainables)
+    assert_equal_pytree(combined, model)
+
+def test_flat_params_jit():
+    model = _model()
+    flat, non_trainables = FlatParams.partition(model)
+
+    @jax.jit
+    def _step(flat, non_trainables):
+        model = flat.combine(non_trainables)
+        flat, non_trainables = FlatParams.partition(model)
+        return jtu.tree_map(lambda b: b * 2, flat), non_trainables
+
+    new_flat, new_non_trainables = _step(flat, non_trainables)
+    assert jtu.tree_structure(new_flat) == jtu.tree_structure(flat)
+    assert_equal_pytree(
+        new_flat.buffers, jtu.tree_map(lambda b: b * 2, flat.buffers)
+    )
+    assert_equal_pytree(new_non_trainables, non_trainables)
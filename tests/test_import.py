@@ -5,4 +5,15 @@ def test_import():
     assert hasattr(mlax, "is_trainable_param")
     assert hasattr(mlax, "is_non_trainable_param")
     assert hasattr(mlax, "is_leaf_param")
+    assert hasattr(mlax, "PathFilter")
     assert hasattr(mlax, "Module")
+    assert hasattr(mlax, "FlatParams")
+    assert hasattr(mlax, "make_train_step")
+    assert hasattr(mlax, "Trainer")
+    assert hasattr(mlax, "bucketed_pmean")
+    assert hasattr(mlax, "init_sharded_optim_state")
+    assert hasattr(mlax, "shard_local_stats")
+    assert hasattr(mlax, "merge_local_stats")
+    assert hasattr(mlax, "sharding")
+    assert hasattr(mlax, "precision")
+    assert hasattr(mlax, "Pipeline")
@@ -0,0 +1,309 @@
+import numpy as np
+import jax
+from jax import (
+    numpy as jnp,
+    random,
+    tree_util as jtu
+)
+from mlax import Module, Parameter, PathFilter, is_non_trainable_param
+from mlax.nn import Series, Stacked, Linear, ZNorm
+from mlax.module import _jit_init
+from mlax._test_utils import (
+    TraceCounter,
+    assert_equal_array,
+    assert_equal_pytree,
+    assert_close_array
+)
+
+class _Foo(Module):
+    def __init__(self):
+        super().__init__()
+        self.a = Parameter(trainable=True, data=jnp.ones(2))
+        self.b = 1
+        self.c = None
+
+    def setup(self, x):
+        pass
+
+    def forward(self, x, rng=None, inference_mode=False, batch_axis_name=()):
+        return x
+
+def test_layout_cache():
+    foo = _Foo()
+    leaves, treedef = jtu.tree_flatten(foo)
+    assert len(leaves) == 1
+    assert foo._layout() is jtu.tree_unflatten(treedef, leaves)._layout()
+
+    # Changing the kind of a field invalidates the cached layout
+    foo.c = Parameter(trainable=False, data=jnp.zeros(3))
+    leaves, _ = jtu.tree_flatten(foo)
+    assert len(leaves) == 2
+    assert foo._layout().param_names == ("a", "c")
+    assert foo._layout().hyperparam_names == ("b",)
+
+    # Adding a field invalidates the cached layout
+    foo.d = _Foo()
+    leaves, treedef = jtu.tree_flatten(foo)
+    assert len(leaves) == 3
+    new_foo = jtu.tree_unflatten(treedef, leaves)
+    assert new_foo.b == 1
+    assert new_foo.initialized is False
+    assert isinstance(new_foo.d, _Foo)
+    assert "_module_layout" not in repr(new_foo)
+
+def test_parameter():
+    param = Parameter(trainable=True, data=jnp.ones(2))
+    assert param.metadata is None
+    leaves, treedef = jtu.tree_flatten(param)
+    new_param = jtu.tree_unflatten(treedef, leaves)
+    assert new_param.trainable is True
+    assert new_param.metadata is None
+
+    # Attribute-style metadata
+    param.name = "kernel"
+    assert param.metadata == {"name": "kernel"}
+    leaves, treedef = jtu.tree_flatten(param)
+    new_param = jtu.tree_unflatten(treedef, leaves)
+    assert new_param.name == "kernel"
+    assert new_param.metadata == {"name": "kernel"}
+    del new_param.name
+    assert new_param.metadata is None
+
+    param = Parameter(trainable=False, metadata={"name": "mean"})
+    assert param.name == "mean"
+    assert not hasattr(param, "__dict__")
+
+def test_structural_hash():
+    x = jnp.ones((2, 3))
+    config = {"rng": random.PRNGKey(0), "out_features": 4}
+    counter = TraceCounter(Linear.__call__)
+    fwd_jit = jax.jit(counter)
+
+    layer1, layer2 = Linear(**config), Linear(**config)
+    assert layer1 == layer2
+    assert hash(layer1) == hash(layer2)
+    _, init_layer1 = fwd_jit(layer1, x, None)
+    _, init_layer2 = fwd_jit(layer2, x, None)
+    assert counter.count == 1
+
+    # Equal-valued but distinct PRNG keys
+    assert Linear(**config) == Linear(random.PRNGKey(0), 4)
+
+    # Initialized modules are equal only if they hold identical parameters
+    assert init_layer1 != init_layer2
+    leaves, treedef = jtu.tree_flatten(init_layer1)
+    assert jtu.tree_unflatten(treedef, leaves) == init_layer1
+
+    # Different hyperparameters
+    assert Linear(**config) != Linear(random.PRNGKey(1), 4)
+    assert Linear(**config) != Linear(random.PRNGKey(0), 5)
+
+def test_mutable_hyperparams(monkeypatch):
+    foo = _Foo()
+    foo.b = [1, [2, 3]]
+    foo.c = {"d": [4]}
+    # Hyperparameters are stored as is
+    assert isinstance(foo.b, list) and isinstance(foo.c, dict)
+    hash_before = hash(foo)
+    assert foo == jtu.tree_map(lambda leaf: leaf, foo)
+
+    # Changing a hyperparameter in place changes the hash
+    copy = jtu.tree_map(lambda leaf: leaf, foo)
+    foo.b[1][1] = 4
+    assert hash(foo) != hash_before
+    hash_before = hash(foo)
+    foo.c["d"] = 5
+    assert hash(foo) != hash_before
+    assert foo == copy  # ``copy`` shares the mutated hyperparameters
+
+    # Hashing does not transfer arrays to the host, nor does comparing
+    # modules holding the same arrays
+    layer = Linear(random.PRNGKey(0), 4)
+    def no_transfer(*args, **kwargs):
+        raise AssertionError("host transfer")
+    monkeypatch.setattr(np, "asarray", no_transfer)
+    hash(layer)
+    leaves, treedef = jtu.tree_flatten(layer)
+    assert jtu.tree_unflatten(treedef, leaves) == layer
+
+def test_call_initializes_in_place():
+    model = Series([
+        Linear(random.PRNGKey(0), 4),
+        ZNorm(random.PRNGKey(1), "channel_last")
+    ])
+    x = jnp.ones((2, 3))
+    _, init_model = model(x, None)
+    assert init_model is model
+    assert model.initialized and model.layers.data[0].initialized
+    assert model.layers.data[0].linear_kernel.data is not None
+
+def test_partition_combine():
+    model = Series([
+        Linear(random.PRNGKey(0), 4),
+        ZNorm(random.PRNGKey(1), "channel_last")
+    ])
+    _, model = model(jnp.ones((2, 3)), None)
+
+    # Parameter nodes are new, their data is shared
+    trainables, non_trainables = model.partition()
+    linear, z_norm = trainables.layers.data
+    assert linear.linear_kernel is not model.layers.data[0].linear_kernel
+    assert linear.linear_kernel.data is model.layers.data[0].linear_kernel.data
+    assert z_norm.moving_mean.data is None
+    linear, z_norm = non_trainables.layers.data
+    assert linear.linear_kernel.data is None
+    assert z_norm.moving_mean is not model.layers.data[1].moving_mean
+    assert z_norm.moving_mean.data is model.layers.data[1].moving_mean.data
+
+    combined = trainables.combine(non_trainables)
+    assert_equal_pytree(combined, model)
+    assert jtu.tree_structure(combined) == jtu.tree_structure(model)
+    linear, z_norm = combined.layers.data
+    assert linear.linear_kernel is not trainables.layers.data[0].linear_kernel
+    assert linear.linear_kernel.data is model.layers.data[0].linear_kernel.data
+    assert z_norm.moving_var is not non_trainables.layers.data[1].moving_var
+    assert z_norm.moving_var.data is model.layers.data[1].moving_var.data
+
+    trainables, non_trainables = model.partition_with_path(
+        lambda path, _: "linear_kernel" in jtu.keystr(path)
+    )
+    assert_equal_pytree(trainables, model.filter())
+    assert_equal_pytree(non_trainables, model.filter(inverse=True))
+
+def test_partition_combine_no_leak():
+    model = Series([
+        Linear(random.PRNGKey(0), 4),
+        ZNorm(random.PRNGKey(1), "channel_last")
+    ]).initialize(jnp.ones((3,)))
+    x = jnp.ones((2, 3))
+
+    def loss(trainables, non_trainables, path_filter=None):
+        if path_filter is None:
+            combined = trainables.combine(non_trainables)
+        else:
+            combined = path_filter.combine(trainables, non_trainables)
+        y, _ = jax.vmap(
+            combined.__call__,
+            in_axes=(0, None, None, None),
+            out_axes=(0, None),
+            axis_name="N"
+        )(x, None, False, "N")
+        return jnp.sum(y)
+
+    path_filter = PathFilter(lambda path: "linear_kernel" in jtu.keystr(path))
+    for trainables, non_trainables, f in (
+        (*model.partition(), None),
+        (*model.partition_with_path(path_filter), path_filter),
+        (model.filter(), model.filter(inverse=True), None)
+    ):
+        jax.value_and_grad(loss)(trainables, non_trainables, f)
+        jax.jit(loss, static_argnums=2)(trainables, non_trainables, f)
+        # ZNorm's in-place updates of the traced copy do not leak
+        for tree in (model, trainables, non_trainables):
+            for leaf in jtu.tree_leaves(tree):
+                assert not isinstance(leaf, jax.core.Tracer)
+                assert isinstance(leaf, jax.Array)
+
+def test_path_filter():
+    model = Series([
+        Linear(random.PRNGKey(0), 4),
+        ZNorm(random.PRNGKey(1), "channel_last")
+    ])
+    _, model = model(jnp.ones((2, 3)), None)
+
+    calls = []
+    def _f(path):
+        calls.append(path)
+        return "linear_kernel" in jtu.keystr(path)
+    path_filter = PathFilter(_f)
+
+    trainables, non_trainables = model.partition_with_path(path_filter)
+    assert len(calls) == 3
+    assert_equal_pytree(trainables, model.filter())
+    assert_equal_pytree(non_trainables, model.filter(inverse=True))
+    assert_equal_pytree(path_filter.combine(trainables, non_trainables), model)
+
+    # Mask is cached by PyTree structure
+    _, model = model(jnp.ones((2, 3)), None)
+    assert_equal_pytree(model.filter_with_path(path_filter), model.filter())
+    assert len(calls) == 3
+
+    path_filter = PathFilter.from_regex(r"moving_(mean|var)")
+    assert_equal_pytree(
+        model.filter_with_path(path_filter), model.filter(is_non_trainable_param)
+    )
+
+def test_abstract_init():
+    model = Series([
+        Linear(random.PRNGKey(0), 4),
+        ZNorm(random.PRNGKey(1), "channel_last")
+    ])
+    x = jax.ShapeDtypeStruct((2, 3), jnp.float32)
+    y, abstract_model = model.abstract_init(x)
+    assert y.shape == (2, 4)
+    assert model.initialized is False
+    assert abstract_model.initialized is True
+    linear, z_norm = abstract_model.layers.data
+    assert isinstance(linear.linear_kernel.data, jax.ShapeDtypeStruct)
+    assert linear.linear_kernel.data.shape == (3, 4)
+    assert z_norm.moving_mean.data.shape == (4,)
+
+    init_model = abstract_model.materialize()
+    _, expected_model = model(jnp.ones((2, 3)), None, inference_mode=True)
+    jtu.tree_map(assert_close_array, init_model, expected_model)
+    assert jtu.tree_structure(init_model) == jtu.tree_structure(expected_model)
+
+def test_initialize():
+    model = Series([
+        Linear(random.PRNGKey(0), 4),
+        ZNorm(random.PRNGKey(1), "channel_last")
+    ])
+    init_model = model.initialize(jnp.ones((2, 3)))
+    assert model.initialized is False
+    assert init_model.initialized is True
+    _, expected_model = model(jnp.ones((2, 3)), None, inference_mode=True)
+    jtu.tree_map(assert_close_array, init_model, expected_model)
+    assert init_model.initialize(jnp.ones((2, 3))) is init_model
+
+def test_initialize_array_hyperparams():
+    # Input shape not used by other tests, which share compiled programs
+    x = jnp.ones((2, 5))
+    models = [
+        Series([
+            Linear(random.PRNGKey(i), 4),
+            ZNorm(random.PRNGKey(i + 1), "channel_last")
+        ])
+        for i in range(3)
+    ]
+    cache_size = _jit_init._cache_size()
+    for model in models:
+        init_model = model.initialize(x)
+        _, expected_model = model(x, None, inference_mode=True)
+        jtu.tree_map(assert_close_array, init_model, expected_model)
+        # The original keys are kept, not copies
+        assert init_model.layers.data[0].rng is model.layers.data[0].rng
+
+    # PRNG keys are traced, so modules differing only in them share a program
+    assert _jit_init._cache_size() == cache_size + 1
+
+def test_initialize_partially_initialized():
+    x = jnp.ones((2, 4))
+    partial_model = Series([
+        Stacked([
+            Linear(random.PRNGKey(i), 4).initialize(x) for i in range(3)
+        ]),
+        Linear(random.PRNGKey(9), 2)
+    ])
+    # Same structure, different arrays
+    partial_models = [
+        partial_model, jtu.tree_map(lambda leaf: 2 * leaf, partial_model)
+    ]
+    cache_size = _jit_init._cache_size()
+    for partial_model in partial_models:
+        init_model = partial_model.initialize(x)
+        _, expected_model = partial_model(x, None, inference_mode=True)
+        jtu.tree_map(assert_equal_array, init_model, expected_model)
+
+    # Initialized parameters are traced, not static, so they are neither
+    # baked into the program nor part of the cache key
+    assert _jit_init._cache_size() == cache_size + 1
@@ -0,0 +1,84 @@
+import pytest
+import jax
+from jax import (
+    numpy as jnp,
+    random,
+    tree_util as jtu
+)
+from mlax import make_train_step
+from mlax.pipeline import (
+    Pipeline,
+    PipelineOp,
+    make_schedule,
+    bubble_fraction,
+    peak_activations
+)
+from mlax.nn import Series, Linear, Bias, ZNorm, F
+from mlax.optim import SGD
+from mlax._test_utils import assert_close_array
+
+def _model():
+    keys_iter = iter(random.split(random.PRNGKey(0), 8))
+    return Series([
+        layer for _ in range(3) for layer in (
+            Linear(next(keys_iter), 4),
+            Bias(next(keys_iter), -1),
+            ZNorm(random.PRNGKey(1), "channel_last"),
+            F(jax.nn.tanh)
+        )
+    ]).initialize(jnp.ones((4,)))
+
+def _loss_fn(preds, targets):
+    return jnp.mean((preds - targets) ** 2)
+
+@pytest.mark.parametrize("schedule", ["gpipe", "1f1b"])
+def test_schedule(schedule):
+    ticks = make_schedule(schedule, 4, 8)
+    ops = [op for tick in ticks for op in tick]
+    assert len(ops) == len(set(ops)) == 2 * 4 * 8
+    assert all(len({op.stage for op in tick}) == len(tick) for tick in ticks)
+    assert ticks[0] == (PipelineOp("F", 0, 0),)
+    assert bubble_fraction(ticks, 4) == pytest.approx(3 / 11)
+    assert peak_activations(ticks, 4) == (8 if schedule == "gpipe" else 4)
+
+    forward = make_schedule(schedule, 4, 8, backward=False)
+    assert len(forward) == 8 + 4 - 1
+
+    with pytest.raises(ValueError):
+        make_schedule("interleaved", 4, 8)
+
+@pytest.mark.skipif(jax.device_count() < 3, reason="requires 3 devices")
+@pytest.mark.parametrize("schedule", ["gpipe", "1f1b"])
+def test_pipeline(schedule):
+    x = random.normal(random.PRNGKey(2), (8, 4))
+    y = random.normal(random.PRNGKey(3), (8, 4))
+    optimizer = SGD(0.1, momentum=0.9)
+
+    pipeline = Pipeline(
+        _model(), (4, 8), jax.devices()[:3], n_microbatches=4,
+        schedule=schedule
+    )
+    assert pipeline.n_stages == 3
+    assert 0 < pipeline.bubble_fraction < 1
+    for stage, device in zip(pipeline.stages, jax.devices()[:3]):
+        assert jtu.tree_leaves(stage)[0].devices() == {device}
+
+    # Matches microbatched training on a single device
+    model = _model()
+    state = optimizer.init(model.partition()[0])
+    train_step = make_train_step(_loss_fn, optimizer, n_microbatches=4)
+    states = pipeline.init_optimizer(optimizer)
+    for _ in range(2):
+        model, state, sums = train_step(model, state, None, x, y)
+        loss, gradients = pipeline.value_and_grad(_loss_fn, x, y)
+        assert len(gradients) == 3
+        states = pipeline.apply_gradients(optimizer, gradients, states)
+        assert_close_array(loss, sums["loss"])
+    jtu.tree_map(assert_close_array, pipeline.model, model)
+
+    expected, _ = jax.vmap(model.__call__, in_axes=(0, None, None))(x, None, True)
+    assert_close_array(pipeline(x, inference_mode=True), expected)
+
+def test_pipeline_uninitialized():
+    with pytest.raises(ValueError):
+        Pipeline(Series([Linear(random.PRNGKey(0), 4)]), ())
@@ -0,0 +1,212 @@
+import pytest
+import numpy as np
+import jax
+from jax import (
+    numpy as jnp,
+    random,
+    tree_util as jtu
+)
+from jax.sharding import Mesh
+from mlax import PathFilter, make_train_step, init_sharded_optim_state
+from mlax.precision import (
+    Policy, cast_floating, all_finite, DynamicLossScale, use_policy
+)
+from mlax.nn import Series, Linear, Bias, ZNorm
+from mlax.optim import SGD
+from mlax._test_utils import assert_close_array
+
+def _model():
+    return Series([
+        Linear(random.PRNGKey(0), 3),
+        Bias(random.PRNGKey(1), -1),
+        ZNorm(random.PRNGKey(2), "channel_last")
+    ]).initialize(jnp.ones((4,)))
+
+def _loss_fn(preds, targets):
+    return jnp.mean((preds - targets) ** 2)
+
+def test_cast_floating():
+    tree = {"a": jnp.ones(2, jnp.float32), "b": jnp.ones(2, jnp.int32)}
+    cast = cast_floating(tree, jnp.bfloat16)
+    assert cast["a"].dtype == jnp.bfloat16
+    assert cast["b"].dtype == jnp.int32
+
+def test_policy():
+    policy = Policy(compute_dtype=jnp.bfloat16)
+    assert policy.param_dtype == jnp.float32
+    assert policy.accum_dtype == jnp.float32
+    assert policy.output_dtype == jnp.float32
+
+    model = policy.compute_copy(_model())
+    assert model.layers.data[0].linear_kernel.data.dtype == jnp.bfloat16
+    assert model.layers.data[1].bias_kernel.data.dtype == jnp.bfloat16
+    # Non-trainable parameters are not cast
+    assert model.layers.data[2].moving_mean.data.dtype == jnp.float32
+
+    policy = Policy(
+        compute_dtype=jnp.bfloat16, f=PathFilter.from_regex("linear_kernel")
+    )
+    model = policy.compute_copy(_model())
+    assert model.layers.data[0].linear_kernel.data.dtype == jnp.bfloat16
+    assert model.layers.data[1].bias_kernel.data.dtype == jnp.float32
+
+    model = policy.apply(model)
+    assert model.layers.data[0].linear_kernel.data.dtype == jnp.float32
+
+def test_use_policy():
+    x = jnp.ones((2, 4), jnp.bfloat16)
+    model = jax.vmap(
+        Linear(random.PRNGKey(0), 3).initialize(x[0]).__call__,
+        in_axes=(0, None), out_axes=(0, None)
+    )
+    jaxpr = str(jax.make_jaxpr(lambda x: model(x, None))(x))
+    assert "preferred_element_type=float32" not in jaxpr
+
+    policy = Policy(compute_dtype=jnp.bfloat16, accum_dtype=jnp.float32)
+    with use_policy(policy):
+        jaxpr = str(jax.make_jaxpr(lambda x: model(x, None))(x))
+        acts, _ = model(x, None)
+    # Products are accumulated in float32, outputs stay in bfloat16
+    assert "preferred_element_type=float32" in jaxpr
+    assert acts.dtype == jnp.bfloat16
+
+@pytest.mark.parametrize("n_microbatches", [1, 2])
+def test_train_step_policy(n_microbatches):
+    x = random.normal(random.PRNGKey(3), (8, 4))
+    y = random.normal(random.PRNGKey(4), (8, 3))
+    optimizer = SGD(0.1)
+    policy = Policy(compute_dtype=jnp.bfloat16, output_dtype=jnp.float32)
+
+    model = _model()
+    expected, _, expected_sums = make_train_step(
+        _loss_fn, optimizer, n_microbatches=n_microbatches
+    )(model, optimizer.init(model.partition()[0]), None, x, y)
+
+    model = _model()
+    train_step = make_train_step(
+        _loss_fn, optimizer, n_microbatches=n_microbatches, policy=policy
+    )
+    jaxpr = str(jax.make_jaxpr(train_step)(
+        model, optimizer.init(model.partition()[0]), None, x, y
+    ))
+    assert "bf16" in jaxpr
+    model, state, sums = train_step(
+        model, optimizer.init(model.partition()[0]), None, x, y
+    )
+    # Master parameters stay in full precision
+    assert model.layers.data[0].linear_kernel.data.dtype == jnp.float32
+    assert model.layers.data[2].moving_var.data.dtype == jnp.float32
+    assert_close_array(sums["loss"], expected_sums["loss"], 5e-2)
+    for a, b in zip(jtu.tree_leaves(model), jtu.tree_leaves(expected)):
+        assert_close_array(a, b, 5e-2)
+
+def test_all_finite():
+    assert bool(all_finite({"a": jnp.ones(3), "b": jnp.ones(2, jnp.float16)}))
+    assert not bool(all_finite({"a": jnp.ones(3), "b": jnp.array([1, jnp.nan])}))
+    assert not bool(all_finite([jnp.array([jnp.inf], jnp.bfloat16)]))
+
+def test_dynamic_loss_scale():
+    loss_scale = DynamicLossScale(8.0, period=2, factor=2.0, min_scale=2.0)
+    state = loss_scale.init()
+    assert_close_array(loss_scale.scale(jnp.array(3.0), state), 24.0)
+    assert_close_array(
+        loss_scale.unscale({"g": jnp.array(24.0)}, state)["g"], 3.0
+    )
+
+    state = loss_scale.adjust(jnp.array(True), state)
+    assert float(state.scale) == 8.0 and int(state.n_finite) == 1
+    state = loss_scale.adjust(jnp.array(True), state)
+    assert float(state.scale) == 16.0 and int(state.n_finite) == 0
+    state = loss_scale.adjust(jnp.array(True), state)
+    state = loss_scale.adjust(jnp.array(False), state)
+    assert float(state.scale) == 8.0 and int(state.n_finite) == 0
+    for _ in range(3):
+        state = loss_scale.adjust(jnp.array(False), state)
+    assert float(state.scale) == 2.0
+
+    # Growth is clamped to max_scale
+    loss_scale = DynamicLossScale(8.0, period=1, max_scale=12.0)
+    state = loss_scale.adjust(jnp.array(True), loss_scale.init())
+    assert float(state.scale) == 12.0
+
+def test_loss_scale_float16():
+    loss_scale = DynamicLossScale(2.0 ** 15)
+    state = loss_scale.init()
+    # 2^15 * 4 overflows float16
+    loss = jnp.array(4.0, jnp.float16)
+    scaled = loss_scale.scale(loss, state)
+    assert scaled.dtype == jnp.float32
+    assert float(scaled) == 2.0 ** 17
+
+    grads = jax.grad(lambda l: loss_scale.scale(l, state))(loss)
+    grads = loss_scale.unscale({"g": grads}, state)["g"]
+    assert grads.dtype == jnp.float16
+    assert float(grads) == 1.0
+
+    # Unscaling by a scale beyond the float16 range
+    state = state._replace(scale=jnp.array(2.0 ** 20, jnp.float32))
+    grads = loss_scale.unscale(
+        {"g": jnp.array(2.0 ** 14, jnp.float16)}, state
+    )["g"]
+    assert float(grads) == 2.0 ** -6
+
+def test_train_step_loss_scale():
+    x = random.normal(random.PRNGKey(3), (8, 4))
+    y = random.normal(random.PRNGKey(4), (8, 3))
+    optimizer = SGD(0.1, 0.9)
+    loss_scale = DynamicLossScale(2.0 ** 10, period=1)
+
+    model = _model()
+    expected, expected_state, expected_sums = make_train_step(
+        _loss_fn, optimizer
+    )(model, optimizer.init(model.partition()[0]), None, x, y)
+
+    train_step = make_train_step(_loss_fn, optimizer, loss_scale=loss_scale)
+    model = _model()
+    model, (state, scale_state), sums = train_step(
+        model, (optimizer.init(model.partition()[0]), loss_scale.init()),
+        None, x, y
+    )
+    assert_close_array(sums["loss"], expected_sums["loss"])
+    assert float(sums["skipped"]) == 0.0
+    assert float(scale_state.scale) == 2.0 ** 11
+    for a, b in zip(jtu.tree_leaves(model), jtu.tree_leaves(expected)):
+        assert_close_array(a, b)
+
+    # A non-finite step is skipped on device
+    leaves = [jnp.copy(leaf) for leaf in jtu.tree_leaves(model)]
+    model, (state, scale_state), sums = train_step(
+        model, (state, scale_state), sums, x.at[0, 0].set(jnp.inf), y
+    )
+    assert float(sums["skipped"]) == 1.0
+    assert float(scale_state.scale) == 2.0 ** 10
+    assert int(state.count) == 1
+    for a, b in zip(jtu.tree_leaves(model), leaves):
+        assert_close_array(a, b)
+
+@pytest.mark.skipif(jax.device_count() < 4, reason="requires 4 devices")
+def test_sharded_loss_scale():
+    x = random.normal(random.PRNGKey(3), (8, 4))
+    y = random.normal(random.PRNGKey(4), (8, 3))
+    optimizer = SGD(0.1)
+    loss_scale = DynamicLossScale(2.0 ** 10)
+    mesh = Mesh(np.array(jax.devices()[:4]), ("data",))
+    train_step = make_train_step(
+        _loss_fn, optimizer, mesh=mesh, shard_optim_state=True,
+        loss_scale=loss_scale
+    )
+
+    model = _model()
+    leaves = [jnp.copy(leaf) for leaf in jtu.tree_leaves(model)]
+    state = (
+        init_sharded_optim_state(optimizer, model.partition()[0], mesh),
+        loss_scale.init()
+    )
+    # Only the last device sees a non-finite input
+    model, (state, scale_state), sums = train_step(
+        model, state, None, x.at[7, 0].set(jnp.nan), y
+    )
+    assert float(sums["skipped"]) == 1.0
+    assert float(scale_state.scale) == 2.0 ** 9
+    for a, b in zip(jtu.tree_leaves(model), leaves):
+        assert_close_array(a, b)
@@ -0,0 +1,96 @@
+import pytest
+import numpy as np
+import jax
+from jax import (
+    numpy as jnp,
+    random,
+    tree_util as jtu
+)
+from jax.sharding import Mesh, NamedSharding, PartitionSpec
+from mlax import sharding
+from mlax.nn import Series, Linear, Bias, Conv, Embed
+from mlax._test_utils import assert_close_array
+
+pytestmark = pytest.mark.skipif(
+    jax.device_count() < 4, reason="requires 4 devices"
+)
+
+def _mesh():
+    return Mesh(np.array(jax.devices()[:4]).reshape(2, 2), ("data", "model"))
+
+def _mlp(column_sharding=None, row_sharding=None):
+    return Series([
+        Linear(random.PRNGKey(0), 8, kernel_sharding=column_sharding),
+        Bias(random.PRNGKey(1), -1),
+        Linear(random.PRNGKey(2), 4, kernel_sharding=row_sharding)
+    ])
+
+def test_annotations():
+    layer = Linear(random.PRNGKey(0), 8, kernel_sharding=[None, "model"])
+    assert layer.linear_kernel.sharding == (None, "model")
+    assert not hasattr(Linear(random.PRNGKey(0), 8).linear_kernel, "sharding")
+    assert Conv(
+        random.PRNGKey(0), 8, 3, kernel_sharding=("model", None, None, None)
+    ).conv_kernel.sharding == ("model", None, None, None)
+    assert Embed(
+        random.PRNGKey(0), 16, 8, embed_sharding=(("data", "model"), None)
+    ).embed_kernel.sharding == (("data", "model"), None)
+
+def test_init_sharding():
+    mesh = _mesh()
+    x = jnp.ones((6,))
+    with sharding.use_mesh(mesh):
+        assert sharding.current_mesh() is mesh
+        model = _mlp((None, "model"), ("model", None)).initialize(x)
+        embed = Embed(
+            random.PRNGKey(0), 16, 8, embed_sharding=("model", None)
+        ).initialize(jnp.zeros((3,), jnp.int32))
+        conv = Conv(
+            random.PRNGKey(0), 4, 3, kernel_sharding=("model", None, None, None)
+        ).initialize(jnp.ones((5, 5, 2)))
+    assert sharding.current_mesh() is None
+    unsharded = _mlp((None, "model"), ("model", None)).initialize(x)
+    assert len(unsharded.layers.data[0].linear_kernel.data.devices()) == 1
+
+    column, bias, row = model.layers.data
+    assert column.linear_kernel.data.sharding.is_equivalent_to(
+        NamedSharding(mesh, PartitionSpec(None, "model")), 2
+    )
+    assert row.linear_kernel.data.sharding.is_equivalent_to(
+        NamedSharding(mesh, PartitionSpec("model", None)), 2
+    )
+    assert embed.embed_kernel.data.sharding.is_equivalent_to(
+        NamedSharding(mesh, PartitionSpec("model", None)), 2
+    )
+    assert conv.conv_kernel.data.sharding.is_equivalent_to(
+        NamedSharding(mesh, PartitionSpec("model", None, None, None)), 4
+    )
+
+    # Same values as unsharded initialization
+    expected = _mlp().initialize(x)
+    for a, b in zip(jtu.tree_leaves(model), jtu.tree_leaves(expected)):
+        assert_close_array(a, b)
+
+def test_jit_apply():
+    mesh = _mesh()
+    x = random.normal(random.PRNGKey(3), (8, 6))
+    expected, _ = jax.vmap(
+        _mlp().initialize(x[0]).__call__, in_axes=(0, None)
+    )(x, None)
+
+    model = _mlp((None, "model"), ("model", None)).initialize(x[0])
+    with pytest.raises(ValueError):
+        sharding.jit_apply()
+    model = sharding.shard(model, mesh)
+    column = model.layers.data[0].linear_kernel.data
+    assert column.sharding.is_equivalent_to(
+        NamedSharding(mesh, PartitionSpec(None, "model")), 2
+    )
+    assert model.layers.data[1].bias_kernel.data.sharding.is_fully_replicated
+
+    x = jax.device_put(x, NamedSharding(mesh, PartitionSpec("data", None)))
+    acts, model = sharding.jit_apply(mesh, batch_axis_name="N")(model, x)
+    assert_close_array(acts, expected)
+    assert model.layers.data[2].linear_kernel.data.sharding.is_equivalent_to(
+        NamedSharding(mesh, PartitionSpec("model", None)), 2
+    )
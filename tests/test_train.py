@@ -0,0 +1,280 @@
+import pytest
+import numpy as np
+import jax
+from jax import (
+    numpy as jnp,
+    random,
+    tree_util as jtu
+)
+from jax.sharding import Mesh, NamedSharding, PartitionSpec
+from mlax import (
+    make_train_step,
+    init_sharded_optim_state,
+    shard_local_stats,
+    merge_local_stats,
+    Trainer
+)
+from mlax.nn import Series, SeriesRng, Linear, Bias, ZNorm, FRng
+from mlax.nn.functional import dropout
+from mlax.optim import SGD, AdamW
+from mlax._test_utils import assert_close_array
+
+def _model():
+    return Series([
+        Linear(random.PRNGKey(0), 3),
+        Bias(random.PRNGKey(1), -1),
+        ZNorm(random.PRNGKey(2), "channel_last")
+    ]).initialize(jnp.ones((4,)))
+
+def _loss_fn(preds, targets):
+    return jnp.mean((preds - targets) ** 2)
+
+def _data():
+    x = random.normal(random.PRNGKey(3), (8, 4))
+    y = random.normal(random.PRNGKey(4), (8, 3))
+    return x, y
+
+def test_make_train_step():
+    optimizer = SGD(0.1)
+    x, y = _data()
+
+    # Reference step
+    model = _model()
+    trainables, non_trainables = model.partition()
+    def _loss(trainables, non_trainables):
+        model = trainables.combine(non_trainables)
+        preds, model = jax.vmap(
+            model.__call__,
+            in_axes=(0, None, None, None),
+            out_axes=(0, None),
+            axis_name="N"
+        )(x, None, False, "N")
+        return _loss_fn(preds, y), model
+    (loss, updated), grads = jax.value_and_grad(_loss, has_aux=True)(
+        trainables, non_trainables
+    )
+    expected = jtu.tree_map(lambda p, g: p - 0.1 * g, trainables, grads)
+    expected = expected.combine(updated.partition()[1])
+
+    model = _model()
+    train_step = make_train_step(
+        _loss_fn, optimizer, lambda preds, _: {"mean": jnp.mean(preds)}
+    )
+    model, state, sums = train_step(
+        model, optimizer.init(model.partition()[0]), None, x, y
+    )
+    assert int(state.count) == 1
+    assert set(sums) == {"loss", "mean"}
+    assert_close_array(sums["loss"], loss)
+    jtu.tree_map(assert_close_array, model, expected)
+    assert jtu.tree_structure(model) == jtu.tree_structure(expected)
+
+    model, state, sums = train_step(model, state, sums, x, y)
+    assert int(state.count) == 2
+
+def test_trainer():
+    x, y = _data()
+    model = _model()
+    moving_mean = jnp.copy(model.layers.data[2].moving_mean.data)
+    trainer = Trainer(model, SGD(0.1, momentum=0.9), _loss_fn, sync_every=3)
+
+    history = [trainer.step(x, y) for _ in range(6)]
+    assert history[0] is None and history[1] is None
+    assert history[3] is None and history[4] is None
+    assert set(history[2]) == {"loss"}
+    assert history[5]["loss"] < history[2]["loss"]
+    assert trainer.n_steps == 6
+    assert trainer.sync() == {}
+    assert not jnp.allclose(trainer.model.layers.data[2].moving_mean.data, moving_mean)
+
+    trainer.step(x, y)
+    assert set(trainer.sync()) == {"loss"}
+
+def test_microbatches():
+    x, y = _data()
+    optimizer = SGD(0.1)
+    metrics_fn = lambda preds, _: {"mean": jnp.mean(preds)}
+
+    # Without batch statistics, microbatching matches the full batch
+    def model():
+        return Series([
+            Linear(random.PRNGKey(0), 3), Bias(random.PRNGKey(1), -1)
+        ]).initialize(jnp.ones((4,)))
+    expected = model()
+    expected, _, expected_sums = make_train_step(
+        _loss_fn, optimizer, metrics_fn
+    )(expected, optimizer.init(expected.partition()[0]), None, x, y)
+    activations = model()
+    activations, state, sums = make_train_step(
+        _loss_fn, optimizer, metrics_fn, n_microbatches=4
+    )(activations, optimizer.init(activations.partition()[0]), None, x, y)
+    assert int(state.count) == 1
+    jtu.tree_map(assert_close_array, activations, expected)
+    jtu.tree_map(assert_close_array, sums, expected_sums)
+
+    # Running statistics are updated once per microbatch
+    model = _model()
+    linear, bias, znorm = model.layers.data
+    moving_mean = znorm.moving_mean.data
+    for micro_x in (x[:4], x[4:]):
+        h = jax.vmap(lambda x: bias(linear(x, None)[0], None)[0])(micro_x)
+        moving_mean = 0.9 * moving_mean + 0.1 * jnp.mean(h, axis=0)
+    model, _, _ = make_train_step(_loss_fn, optimizer, n_microbatches=2)(
+        model, optimizer.init(model.partition()[0]), None, x, y
+    )
+    assert_close_array(model.layers.data[2].moving_mean.data, moving_mean)
+
+    with pytest.raises(ValueError):
+        make_train_step(_loss_fn, optimizer, n_microbatches=3)(
+            _model(), optimizer.init(_model().partition()[0]), None, x, y
+        )
+
+def test_microbatch_rngs():
+    x, y = _data()
+    rng = random.PRNGKey(5)
+    optimizer = SGD(0.1)
+    drop = lambda x, rng: dropout(x, rng, 0.5, 0)
+    def model():
+        return SeriesRng([
+            Linear(random.PRNGKey(0), 3), FRng(drop)
+        ]).initialize(jnp.ones((4,)), rng)
+    train_step = make_train_step(_loss_fn, optimizer, donate=False)
+    def step(x, y, rng):
+        m = model()
+        state = optimizer.init(m.partition()[0])
+        return train_step(m, state, None, x, y, rng)[0]
+
+    # Each microbatch gets the key folded with its index, so plain SGD on
+    # the accumulated gradients averages the per-microbatch updates
+    m = model()
+    microbatched, _, _ = make_train_step(
+        _loss_fn, optimizer, n_microbatches=2
+    )(m, optimizer.init(m.partition()[0]), None, x, y, rng)
+    expected = jtu.tree_map(
+        lambda a, b: (a + b) / 2,
+        step(x[:4], y[:4], random.fold_in(rng, 0)),
+        step(x[4:], y[4:], random.fold_in(rng, 1))
+    )
+    jtu.tree_map(assert_close_array, microbatched, expected)
+
+    # Dropout masks differ between microbatches
+    same_key = jtu.tree_map(
+        lambda a, b: (a + b) / 2,
+        step(x[:4], y[:4], rng),
+        step(x[4:], y[4:], rng)
+    )
+    assert not all(jtu.tree_leaves(jtu.tree_map(
+        lambda a, b: bool(jnp.allclose(a, b)), microbatched, same_key
+    )))
+    assert not jnp.array_equal(
+        random.key_data(random.fold_in(rng, 0)),
+        random.key_data(random.fold_in(rng, 1))
+    )
+
+@pytest.mark.skipif(jax.device_count() < 4, reason="requires 4 devices")
+@pytest.mark.parametrize("bucket_size", [None, 5])
+def test_data_parallel(bucket_size):
+    x, y = _data()
+    optimizer = SGD(0.1, momentum=0.9)
+    mesh = Mesh(np.array(jax.devices()[:4]), ("data",))
+
+    expected = _model()
+    expected_state = optimizer.init(expected.partition()[0])
+    train_step = make_train_step(_loss_fn, optimizer, donate=False)
+    model = _model()
+    state = optimizer.init(model.partition()[0])
+    dp_train_step = make_train_step(
+        _loss_fn, optimizer, mesh=mesh, bucket_size=bucket_size
+    )
+    x = jax.device_put(x, NamedSharding(mesh, PartitionSpec("data")))
+    y = jax.device_put(y, NamedSharding(mesh, PartitionSpec("data")))
+    for _ in range(2):
+        expected, expected_state, expected_sums = train_step(
+            expected, expected_state, None, x, y
+        )
+        model, state, sums = dp_train_step(model, state, None, x, y)
+
+    # ZNorm statistics and gradients are reduced over the global batch
+    assert_close_array(sums["loss"], expected_sums["loss"])
+    jtu.tree_map(assert_close_array, model, expected)
+
+@pytest.mark.skipif(jax.device_count() < 4, reason="requires 4 devices")
+def test_local_z_norm_stats():
+    x, y = _data()
+    x = x + jnp.repeat(jnp.arange(4.0), 2)[:, None]
+    mesh = Mesh(np.array(jax.devices()[:4]), ("data",))
+    model = Series([
+        Linear(random.PRNGKey(0), 3),
+        ZNorm(random.PRNGKey(2), "channel_last", local_axis_name="data")
+    ]).initialize(jnp.ones((4,)))
+    h = jax.vmap(lambda x: model.layers.data[0](x, None, True)[0])(x)
+    h = h.reshape(4, 2, 3)
+    moving_mean = h.mean(1) * 0.1
+    moving_var = 0.9 + h.var(1) * 0.1
+    expected_mean = moving_mean.mean(0)
+    expected_var = (moving_var + moving_mean ** 2).mean(0) - expected_mean ** 2
+
+    # Running statistics are per device, along a leading axis
+    optimizer = SGD(0.0)
+    train_step = make_train_step(_loss_fn, optimizer, mesh=mesh, donate=False)
+    state = optimizer.init(model.partition()[0])
+    with pytest.raises(ValueError):
+        train_step(model, state, None, x, y)
+    new_model, _, _ = train_step(
+        shard_local_stats(model, mesh), state, None, x, y
+    )
+    z_norm = new_model.layers.data[1]
+    assert z_norm.moving_mean.data.shape == (4, 3)
+    assert_close_array(z_norm.moving_mean.data, moving_mean)
+    assert_close_array(z_norm.moving_var.data, moving_var)
+    z_norm = merge_local_stats(new_model, mesh).layers.data[1]
+    assert_close_array(z_norm.moving_mean.data, expected_mean)
+    assert_close_array(z_norm.moving_var.data, expected_var)
+
+    trainer = Trainer(model, optimizer, _loss_fn, mesh=mesh)
+    trainer.step(
+        jax.device_put(x, NamedSharding(mesh, PartitionSpec("data"))),
+        jax.device_put(y, NamedSharding(mesh, PartitionSpec("data")))
+    )
+    z_norm = trainer.model.layers.data[1]
+    assert_close_array(z_norm.moving_mean.data, expected_mean)
+    assert_close_array(z_norm.moving_var.data, expected_var)
+
+    # Training continues from the merged statistics
+    trainer.sync_stats()
+    trainer.step(x, y)
+    z_norm = trainer.model.layers.data[1]
+    assert_close_array(
+        z_norm.moving_mean.data, 0.9 * expected_mean + moving_mean.mean(0)
+    )
+
+@pytest.mark.skipif(jax.device_count() < 4, reason="requires 4 devices")
+def test_sharded_optim_state():
+    x, y = _data()
+    optimizer = AdamW(0.1)
+    mesh = Mesh(np.array(jax.devices()[:4]), ("data",))
+
+    expected = _model()
+    expected_state = optimizer.init(expected.partition()[0])
+    train_step = make_train_step(_loss_fn, optimizer, mesh=mesh)
+    model = _model()
+    state = init_sharded_optim_state(optimizer, model.partition()[0], mesh)
+    sharded_train_step = make_train_step(
+        _loss_fn, optimizer, mesh=mesh, shard_optim_state=True
+    )
+    for _ in range(3):
+        expected, expected_state, _ = train_step(
+            expected, expected_state, None, x, y
+        )
+        model, state, _ = sharded_train_step(model, state, None, x, y)
+
+    # 15 parameters padded to 16, 4 per device
+    mu = state.mu["float32"]
+    assert mu.shape == (16,)
+    assert {shard.data.shape for shard in mu.addressable_shards} == {(4,)}
+    assert int(state.count) == 3
+    assert_close_array(mu[:15], expected_state.mu["float32"])
+    jtu.tree_map(assert_close_array, model, expected)
+
+    with pytest.raises(ValueError):
+        make_train_step(_loss_fn, optimizer, shard_optim_state=True)